@@ -0,0 +1,58 @@
+# ws_espacial/app/api/admission.py
+"""
+Middleware ASGI de control de admisión: con el proceso sobrecargado responde 503 con Retry-After
+sin ejecutar la ruta. Las sondas (/healthz, /readyz) y /metrics siempre se atienden.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import REQUESTS_REJECTED
+from app.core.serialization import dumps
+from app.services.admission import admission_controller
+
+EXEMPT_PATHS = frozenset({"/healthz", "/readyz", "/metrics"})
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._body = dumps({"detail": "Servicio sobrecargado. Reintente más tarde."})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        reason = admission_controller.overload_reason()
+        if reason is not None:
+            REQUESTS_REJECTED.labels(reason).inc()
+            await self._reject(send)
+            return
+
+        admission_controller.in_flight += 1
+        counted = True
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal counted
+            if message["type"] == "http.response.start" and counted:
+                # Una respuesta ya iniciada (p. ej. un stream SSE) deja de contar como trabajo en cola
+                counted = False
+                admission_controller.in_flight -= 1
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if counted:
+                admission_controller.in_flight -= 1
+
+    async def _reject(self, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(self._body)).encode()),
+                (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": self._body})
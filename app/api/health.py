@@ -0,0 +1,31 @@
+# ws_espacial/app/api/health.py
+"""
+Sondas para el orquestador: /healthz (el proceso responde y sus tareas de fondo, incluidas las del
+rol de líder o seguidor, siguen en marcha)
+y /readyz (puede recibir tráfico: BD inicializada y datos iniciales cargados, y no se está apagando).
+"""
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+from app.services import coordination
+from app.services.readiness import readiness, stopped_tasks
+
+router = APIRouter()
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz(request: Request) -> JSONResponse:
+    tasks = list(getattr(request.app.state, "background_tasks", []))
+    if coordination.worker_coordinator is not None:
+        tasks += coordination.worker_coordinator.tasks # Tareas del rol (sondeo, compactación, snapshot)
+    stopped = stopped_tasks(tasks)
+    if stopped and not readiness.shutting_down:
+        return JSONResponse({"status": "degraded", "stopped_tasks": stopped},
+                            status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return JSONResponse({"status": "ok"})
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz() -> JSONResponse:
+    state = readiness.status()
+    return JSONResponse(state, status_code=status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,123 @@
+# ws_espacial/app/api/metrics.py
+"""
+Exposición de métricas: middleware ASGI de latencia por ruta y endpoint GET /metrics
+(formato de texto de Prometheus), más los gauges que leen el estado de cachés y búferes.
+"""
+import datetime
+import time
+
+from fastapi import APIRouter, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.cache.rendered_cache import rendered_response_cache
+from app.core.metrics import CONTENT_TYPE, HTTP_REQUEST_DURATION, REGISTRY, CallbackCounter, CallbackGauge
+from app.security.auth_cache import auth_cache
+from app.services.admission import admission_controller
+from app.services import coordination
+from app.services.broadcaster import unit_broadcaster
+from app.services.geofence import geofence_engine
+from app.services.history import history_writer
+from app.services.ingest_buffer import ingest_buffer
+from app.services.refresh import on_demand_refresher
+from app.services import sources
+from app.services.sources import ISS_UNIT_ID
+
+router = APIRouter()
+
+
+class PrometheusMiddleware:
+    """
+    Mide cada petición HTTP hasta el inicio de la respuesta (así los streams SSE/NDJSON largos no
+    distorsionan el histograma). La ruta se etiqueta con su plantilla (/units/{unit_id}/history),
+    no con la URL, para acotar la cardinalidad; las peticiones sin ruta se agrupan en "unmatched".
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        observed = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, scope["method"], _route_label(scope), str(message["status"])
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not observed:
+                # Excepción sin respuesta: la registra el ServerErrorMiddleware como 500
+                HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"], _route_label(scope), "500")
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        return scope["path"] # Rutas de Starlette sin parámetros (docs, openapi.json)
+    return "unmatched"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+# --- Estado de otros componentes, leído en cada scrape ---
+
+def _data_age() -> dict:
+    ages = {("newest",): unit_data_cache.stats()["newest_data_age_seconds"]}
+    iss = unit_data_cache.peek(ISS_UNIT_ID)
+    if iss is not None:
+        timestamp = iss.timestamp if iss.timestamp.tzinfo else iss.timestamp.replace(tzinfo=datetime.timezone.utc)
+        ages[(ISS_UNIT_ID,)] = (datetime.datetime.now(datetime.timezone.utc) - timestamp).total_seconds()
+    return ages
+
+
+def _cache_hits() -> dict:
+    units, auth, rendered = unit_data_cache.stats(), auth_cache.stats(), rendered_response_cache.stats()
+    return {("units",): units["hits"], ("auth",): auth["hits"], ("rendered_response",): rendered["reuses"]}
+
+
+def _cache_misses() -> dict:
+    units, auth, rendered = unit_data_cache.stats(), auth_cache.stats(), rendered_response_cache.stats()
+    return {("units",): units["misses"], ("auth",): auth["misses"], ("rendered_response",): rendered["renders"]}
+
+
+CallbackGauge("unit_data_age_seconds", "Antigüedad del último api_timestamp (la unidad más reciente y la ISS).",
+              _data_age, ("unit",))
+CallbackCounter("cache_hits", "Aciertos de los cachés en memoria.", _cache_hits, ("cache",))
+CallbackCounter("cache_misses", "Fallos de los cachés en memoria.", _cache_misses, ("cache",))
+CallbackGauge("units_cached", "Unidades en el caché de lectura.", lambda: {(): unit_data_cache.stats()["units"]})
+CallbackGauge("stream_subscribers", "Clientes WebSocket/SSE suscritos.",
+              lambda: {(): unit_broadcaster.stats()["subscribers"]})
+CallbackGauge("ingest_buffer_pending", "Puntos aceptados pendientes de escribir.", lambda: {(): ingest_buffer.pending})
+CallbackCounter("ingest_dead_lettered", "Puntos aceptados descartados por no poder escribirse en la BD.",
+                lambda: {(): ingest_buffer.dead_lettered})
+CallbackGauge("history_buffer_pending", "Puntos de histórico pendientes de escribir.", lambda: {(): history_writer.pending})
+CallbackGauge("worker_is_leader", "1 si este worker tiene la concesión de líder (sondeo y snapshot).",
+              lambda: {(): int(coordination.worker_coordinator.is_leader)} if coordination.worker_coordinator else {})
+CallbackGauge("http_in_flight", "Peticiones HTTP admitidas que aún no han empezado a responder.",
+              lambda: {(): admission_controller.in_flight})
+CallbackGauge("db_executor_pending", "Operaciones pendientes en el executor de BD.",
+              lambda: {(): admission_controller.stats()["db_pending"]})
+CallbackGauge("event_loop_lag_seconds", "Último retraso medido del event loop.",
+              lambda: {(): admission_controller.loop_lag_seconds})
+CallbackCounter("geofence_events", "Eventos de entrada/salida de geocercas generados por este worker.",
+                lambda: {(): geofence_engine.stats()["events"]})
+CallbackGauge("geofence_events_pending", "Eventos de geocercas pendientes de escribir.",
+              lambda: {(): geofence_engine.pending})
+CallbackCounter("source_items_skipped", "Elementos inválidos descartados en las respuestas de las fuentes.",
+                lambda: {(name,): count for name, count in sources.skipped_items.items()}, ("source",))
+CallbackGauge("ondemand_refresh_in_flight", "Consultas a fuentes bajo demanda (max_age) en curso.",
+              lambda: {(): on_demand_refresher.stats()["in_flight"]})
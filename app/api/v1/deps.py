@@ -1,13 +1,20 @@
 # ws_prueba/app/api/v1/deps.py
+import logging
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
+from starlette.requests import HTTPConnection
 from fastapi.security import OAuth2PasswordBearer
 
-from app.db.session import is_token_active  # Función de session.py
+from app.db.async_session import is_token_active  # Versión awaitable de session.py
 from app.security import jwt_manager       # Módulo jwt_manager.py
 from app.models.token import TokenPayload    # Modelo Pydantic
 from app.core.config import settings       # Configuración de la app
+from app.core.metrics import REQUESTS_REJECTED
+from app.security.rate_limit import client_rate_limiter, ip_rate_limiter, retry_after_header
+from app.security.auth_cache import auth_cache, sync_revocation_epoch  # Caché de decisiones de auth
+
+logger = logging.getLogger(__name__)
 
 # El tokenUrl es informativo para la documentación de Swagger / OpenAPI.
 # Indica dónde se podrían obtener tokens (aunque en nuestro caso es administrativo).
@@ -17,8 +24,9 @@ async def get_current_active_client(token: str = Depends(oauth2_scheme)) -> Toke
     """
     Dependencia para obtener el cliente actual basado en un token JWT válido y activo.
     Pasos:
+    0. Si el token ya fue validado recientemente (caché en proceso) y no hubo revocaciones, se acepta sin más.
     1. Decodifica el token JWT para obtener el payload (verifica firma y estructura básica).
-    2. Verifica si el token completo existe y está activo en nuestra base de datos de tokens.
+    2. Verifica si el token (por su huella SHA-256) existe y está activo en nuestra base de datos de tokens.
     3. Compara el client_id del payload con el almacenado en la BD para ese token.
     """
     credentials_exception = HTTPException(
@@ -27,6 +35,14 @@ async def get_current_active_client(token: str = Depends(oauth2_scheme)) -> Toke
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    # 0. Caché de autenticación: evita la verificación de firma y la consulta a la BD
+    await sync_revocation_epoch()
+    token_key = jwt_manager.hash_token(token)
+    cached_payload = auth_cache.get(token_key)
+    if cached_payload is not None:
+        return cached_payload
+    generation = auth_cache.generation # Para descartar el resultado si hay una revocación mientras validamos
+
     # 1. Decodificar el token y obtener el payload
     payload: Optional[TokenPayload] = jwt_manager.verify_token_payload(token)
     
@@ -35,7 +51,7 @@ async def get_current_active_client(token: str = Depends(oauth2_scheme)) -> Toke
         raise credentials_exception
 
     # 2. Verificar si el token está en nuestra base de datos de tokens activos
-    active_token_data = is_token_active(token=token) # Espera Optional[dict] o None
+    active_token_data = await is_token_active(token_hash=token_key) # Espera Optional[dict] o None
     if not active_token_data:
         # Si el token no está en nuestra BD, se considera inválido o fue revocado
         raise HTTPException(
@@ -47,10 +63,50 @@ async def get_current_active_client(token: str = Depends(oauth2_scheme)) -> Toke
     # 3. Verificar consistencia entre el client_id del payload y el de la BD asociada al token
     if active_token_data.get("client_id") != payload.sub:
         # Esto sería un estado inconsistente, no debería ocurrir si la lógica es correcta.
-        print(f"ALERTA DE SEGURIDAD o INCONSISTENCIA: Discrepancia de client_id para el token. "
-              f"Payload sub: '{payload.sub}', DB client_id: '{active_token_data.get('client_id')}'")
+        logger.warning("ALERTA DE SEGURIDAD o INCONSISTENCIA: Discrepancia de client_id para el token. "
+                       "Payload sub: '%s', DB client_id: '%s'", payload.sub, active_token_data.get("client_id"))
         raise credentials_exception
         
     # Si todas las validaciones pasan, el payload (que es de tipo TokenPayload) es devuelto.
     # TokenPayload.sub contiene el client_id.
-    return payload
\ No newline at end of file
+    auth_cache.put(token_key, payload, generation)
+    return payload
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Demasiadas peticiones. Reintente más tarde.",
+        headers=retry_after_header(retry_after),
+    )
+
+async def get_rate_limited_client(client: TokenPayload = Depends(get_current_active_client)) -> TokenPayload:
+    """Como get_current_active_client, aplicando el límite de tasa del client_id (claim 'sub')."""
+    if settings.RATE_LIMIT_ENABLED:
+        retry_after = client_rate_limiter.acquire(client.sub)
+        if retry_after:
+            REQUESTS_REJECTED.labels("rate_limit_client").inc()
+            raise _too_many_requests(retry_after)
+    return client
+
+def client_ip(connection: HTTPConnection) -> str:
+    """IP de origen de una petición HTTP o de una conexión WebSocket."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = connection.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return connection.client.host if connection.client else "unknown"
+
+def ip_rate_limit_retry_after(connection: HTTPConnection) -> float:
+    """Segundos de espera si la IP superó su límite (el rechazo se cuenta); 0 si se admite."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return 0.0
+    retry_after = ip_rate_limiter.acquire(client_ip(connection))
+    if retry_after:
+        REQUESTS_REJECTED.labels("rate_limit_ip").inc()
+    return retry_after
+
+async def limit_public_by_ip(connection: HTTPConnection) -> None:
+    """Límite de tasa de las rutas públicas, por IP de origen."""
+    retry_after = ip_rate_limit_retry_after(connection)
+    if retry_after:
+        raise _too_many_requests(retry_after)
@@ -0,0 +1,26 @@
+# ws_espacial/app/api/v1/endpoints/admin_cache.py
+from fastapi import APIRouter
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.cache.rendered_cache import rendered_response_cache
+from app.cache.track_buffer import unit_tracks
+from app.security.rate_limit import client_rate_limiter, ip_rate_limiter
+from app.services import coordination
+from app.services.admission import admission_controller
+
+router = APIRouter()
+
+@router.get(
+    "/cache/stats",
+    summary="Estadísticas del caché de unidades (aciertos, fallos, antigüedad) y rol de este worker",
+)
+async def get_cache_stats():
+    coordinator = coordination.worker_coordinator
+    return {
+        "units": unit_data_cache.stats(),
+        "rendered_responses": rendered_response_cache.stats(),
+        "tracks": unit_tracks.stats(),
+        "worker": coordinator.stats() if coordinator is not None else None,
+        "admission": admission_controller.stats(),
+        "rate_limits": {"client": client_rate_limiter.stats(), "ip": ip_rate_limiter.stats()},
+    }
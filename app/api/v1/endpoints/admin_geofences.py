@@ -0,0 +1,88 @@
+# ws_espacial/app/api/v1/endpoints/admin_geofences.py
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, HTTPException, Query, Response, status
+
+from app.api.v1.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.config import settings
+from app.db import async_session as db_session
+from app.models.geofence import BulkGeofenceCreateInput, BulkGeofenceCreateResult, Geofence, GeofenceCreate
+from app.services.geofence import CIRCLE, POLYGON, geofence_engine
+
+router = APIRouter()
+
+def _to_row(fence: GeofenceCreate) -> tuple:
+    if fence.polygon is not None:
+        geometry = {"coordinates": [[lon, lat] for lon, lat in fence.polygon]}
+        return fence.name, POLYGON, json.dumps(geometry)
+    return fence.name, CIRCLE, json.dumps(fence.circle.model_dump())
+
+@router.post(
+    "/geofences",
+    response_model=Geofence,
+    status_code=status.HTTP_201_CREATED,
+    summary="Registra una geocerca (polígono [[lon, lat], ...] o círculo)",
+)
+async def create_geofence(fence: GeofenceCreate = Body(...)):
+    (fence_id,) = await db_session.create_geofences([_to_row(fence)])
+    # Recarga inmediata si este worker es el líder; los demás la verán en la próxima comprobación
+    geofence_engine.notify_changed()
+    return (await db_session.get_geofences(after_id=fence_id - 1, limit=1))[0]
+
+@router.post(
+    "/geofences/bulk",
+    response_model=BulkGeofenceCreateResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="Registra un lote de geocercas en una única transacción",
+)
+async def create_geofences_bulk(bulk_input: BulkGeofenceCreateInput = Body(...)):
+    ids = await db_session.create_geofences([_to_row(fence) for fence in bulk_input.geofences])
+    geofence_engine.notify_changed()
+    return BulkGeofenceCreateResult(ids=ids)
+
+@router.get(
+    "/geofences",
+    response_model=List[Geofence],
+    summary="Lista las geocercas registradas, paginado",
+    description=f"Geocercas por id. Paginación por cursor: `limit` (máx. {settings.GEOFENCE_PAGE_MAX_LIMIT}) y `after`; "
+                f"el cursor de la página siguiente llega en la cabecera {NEXT_CURSOR_HEADER}."
+)
+async def list_geofences(
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=settings.GEOFENCE_PAGE_MAX_LIMIT),
+    after: Optional[str] = Query(default=None, description=f"Cursor devuelto en {NEXT_CURSOR_HEADER}"),
+):
+    after_id = _decode_id_cursor(after) if after is not None else None
+    rows = await db_session.get_geofences(after_id=after_id, limit=limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(str(rows[-1]["id"]))
+    return rows
+
+@router.get(
+    "/geofences/stats",
+    summary="Estado del motor de geocercas en este worker (activo solo en el líder)",
+)
+async def get_geofence_stats():
+    return geofence_engine.stats()
+
+@router.delete(
+    "/geofences/{fence_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Elimina una geocerca (sus eventos pasados se conservan)",
+)
+async def delete_geofence(fence_id: int):
+    if not await db_session.delete_geofence(fence_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Geocerca no encontrada."
+        )
+    geofence_engine.notify_changed()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+def _decode_id_cursor(cursor: str) -> int:
+    value = decode_cursor(cursor)
+    if not value.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor 'after' inválido.")
+    return int(value)
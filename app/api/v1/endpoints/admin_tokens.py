@@ -1,10 +1,18 @@
 # ws_prueba/app/api/v1/endpoints/admin_tokens.py
-from fastapi import APIRouter, HTTPException, Body, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Body, Query, Response, status
+from typing import Dict, List, Optional
+import asyncio
+import datetime
 
 from app.security import jwt_manager
-from app.db import session as db_session
-from app.models.token import Token, ClientInfoInput, TokenRevokeInput, ActiveTokenAdminView
+from app.db import async_session as db_session
+from app.models.token import (
+    Token, ClientInfoInput, TokenRevokeInput, ActiveTokenAdminView,
+    BulkTokenGenerateInput, BulkTokenGenerateResult, BulkTokenRevokeInput, BulkTokenRevokeResult,
+)
+from app.security.auth_cache import auth_cache
+from app.api.v1.pagination import NEXT_CURSOR_HEADER, decode_json_cursor, encode_cursor
+from app.core.config import settings
 
 router = APIRouter() # Correcto
 
@@ -18,7 +26,7 @@ async def generate_token_for_client(client_info: ClientInfoInput = Body(...)):
     client_id = client_info.client_id
     access_token = jwt_manager.create_access_token(client_id=client_id)
 
-    if not db_session.store_token(client_id=client_id, token=access_token):
+    if not await db_session.store_token(client_id=client_id, token_hash=jwt_manager.hash_token(access_token)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="No se pudo almacenar el token."
@@ -31,7 +39,10 @@ async def generate_token_for_client(client_info: ClientInfoInput = Body(...)):
     summary="Revoca (elimina) un token JWT existente",
 )
 async def revoke_token(token_input: TokenRevokeInput = Body(...)):
-    rows_deleted = db_session.revoke_token(token=token_input.token)
+    token_hash = jwt_manager.hash_token(token_input.token)
+    rows_deleted = await db_session.revoke_token(token_hash=token_hash)
+    # Invalidación inmediata en este worker; los demás la detectan por la época de revocación
+    auth_cache.invalidate(token_hash)
     if rows_deleted == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,17 +50,99 @@ async def revoke_token(token_input: TokenRevokeInput = Body(...)):
         )
     return {"message": "Token revocado exitosamente."}
 
+def _issue_tokens(client_ids: List[str]) -> Dict[str, str]:
+    return {client_id: jwt_manager.create_access_token(client_id=client_id) for client_id in client_ids}
+
+@router.post(
+    "/tokens/generate/bulk",
+    response_model=BulkTokenGenerateResult,
+    status_code=status.HTTP_201_CREATED,
+    summary="Genera tokens JWT para un lote de clientes en una única transacción",
+)
+async def generate_tokens_bulk(bulk_input: BulkTokenGenerateInput = Body(...)):
+    client_ids = list(dict.fromkeys(bulk_input.client_ids)) # Sin duplicados, conservando el orden
+    # Firmar miles de JWT es CPU: se hace fuera del event loop
+    access_tokens = await asyncio.get_running_loop().run_in_executor(None, _issue_tokens, client_ids)
+    stored = set(await db_session.store_tokens_many(
+        [(client_id, jwt_manager.hash_token(access_token)) for client_id, access_token in access_tokens.items()]
+    ))
+    return BulkTokenGenerateResult(
+        tokens=[
+            Token(access_token=access_token, token_type="bearer", client_id=client_id)
+            for client_id, access_token in access_tokens.items() if client_id in stored
+        ],
+        existing=[client_id for client_id in client_ids if client_id not in stored],
+    )
+
+@router.post(
+    "/tokens/revoke/bulk",
+    response_model=BulkTokenRevokeResult,
+    status_code=status.HTTP_200_OK,
+    summary="Revoca un lote de tokens (JWT completos o sus huellas) en una única transacción",
+)
+async def revoke_tokens_bulk(bulk_input: BulkTokenRevokeInput = Body(...)):
+    token_hashes = list(dict.fromkeys(
+        [jwt_manager.hash_token(token) for token in bulk_input.tokens]
+        + [bytes.fromhex(token_hash) for token_hash in bulk_input.token_hashes]
+    ))
+    if len(token_hashes) > settings.TOKENS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {settings.TOKENS_BULK_MAX_ITEMS} tokens por petición."
+        )
+    rows_deleted = await db_session.revoke_tokens_many(token_hashes)
+    for token_hash in token_hashes:
+        auth_cache.invalidate(token_hash)
+    return BulkTokenRevokeResult(revoked=rows_deleted, not_found=len(token_hashes) - rows_deleted)
+
+def _to_db_timestamp(value: Optional[datetime.datetime]) -> Optional[str]:
+    # created_at se guarda como CURRENT_TIMESTAMP de SQLite: texto en UTC sin zona horaria
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
 @router.get(
     "/tokens/active",
     response_model=List[ActiveTokenAdminView],
-    summary="Lista todos los tokens JWT activos (para propósitos de demo/admin)",
+    summary="Lista los tokens JWT activos, paginado y filtrable",
+    description="Tokens de más reciente a más antiguo. Filtros opcionales por `client_id` y por rango de creación "
+                f"[`created_from`, `created_to`). Paginación por cursor: `limit` (máx. {settings.TOKENS_PAGE_MAX_LIMIT}) y `after`; "
+                f"el cursor de la página siguiente llega en la cabecera {NEXT_CURSOR_HEADER}. "
+                "Solo se muestra la huella SHA-256 de cada token."
 )
-async def list_active_tokens():
-    active_tokens_raw = db_session.get_active_tokens_for_admin()
+async def list_active_tokens(
+    response: Response,
+    client_id: Optional[str] = Query(default=None),
+    created_from: Optional[datetime.datetime] = Query(default=None),
+    created_to: Optional[datetime.datetime] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=settings.TOKENS_PAGE_MAX_LIMIT),
+    after: Optional[str] = Query(default=None, description=f"Cursor devuelto en {NEXT_CURSOR_HEADER}"),
+):
+    after_key = None
+    if after is not None:
+        after_key = decode_json_cursor(after)
+        if not (isinstance(after_key, list) and len(after_key) == 2
+                and isinstance(after_key[0], str) and isinstance(after_key[1], int)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor 'after' inválido.")
+
+    # Se pide una fila extra para saber si existe una página siguiente
+    active_tokens_raw = await db_session.get_active_tokens_for_admin(
+        limit=limit + 1,
+        client_id=client_id,
+        created_from=_to_db_timestamp(created_from),
+        created_to=_to_db_timestamp(created_to),
+        after=tuple(after_key) if after_key is not None else None,
+    )
+    if len(active_tokens_raw) > limit:
+        active_tokens_raw = active_tokens_raw[:limit]
+        last = active_tokens_raw[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([last["created_at"], last["id"]])
     return [
         ActiveTokenAdminView(
             client_id=row["client_id"],
-            token=row["token"],
+            token_hash=row["token_hash"],
             created_at=row["created_at"]
         ) for row in active_tokens_raw
     ]
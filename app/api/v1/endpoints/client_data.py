@@ -1,85 +1,513 @@
 # ws_espacial/app/api/v1/endpoints/client_data.py
-from fastapi import APIRouter, HTTPException, status # Quitamos Depends
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Literal, Optional, Tuple
+import logging
+import datetime
+import re
 
 # Modelos Pydantic para la respuesta
-from app.models.unit import UnitDataPublic
-# Ya no necesitamos TokenPayload ni get_current_active_client aquí
+from app.models.token import TokenPayload
+from app.models.unit import (
+    PositionBatchInput, PositionEstimate, UnitBatchInput, UnitBatchResult, UnitChanges, UnitData, UnitDataPublic
+)
 
-# Módulo de sesión de base de datos para interactuar con la BD
-from app.db import session as db_session
+# Capa de lectura: caché en memoria con respaldo en la BD
+from app.services import unit_store
+from app.services.position_estimator import estimate_unit_positions
+from app.services.refresh import on_demand_refresher
+from app.services.segment_store import export_unit_parts
+from app.cache.in_memory_cache import unit_data_cache
+from app.cache.rendered_cache import rendered_response_cache
+from app.cache.spatial_index import unit_spatial_index
+from app.cache.track_buffer import UnitTrack, column_to_json, track_stats, unit_tracks
+from app.api.v1.deps import get_rate_limited_client
+from app.api.v1.http_cache import cached_json_response, negotiated_response
+from app.api.v1.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.config import settings
+from app.core.serialization import dumps, encode_ndjson, encode_units, public_unit_dict
+from app.db import async_session
+from app.db.segments import MEDIA_TYPE as SEGMENT_MEDIA_TYPE
 
 # El unit_id que estamos buscando para el endpoint específico de la ISS
 ISS_UNIT_ID = "ISS-001"
 
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 router = APIRouter()
 
+def _render_unit(unit: UnitData) -> Tuple[bytes, Optional[datetime.datetime]]:
+    return dumps(public_unit_dict(unit)), unit.timestamp
+
+def _render_units(units: List[UnitData]) -> Tuple[bytes, Optional[datetime.datetime]]:
+    return encode_units(units), max((unit.timestamp for unit in units), default=None)
+
+def _parse_coordinates(value: str, count: int, name: str) -> List[float]:
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El parámetro '{name}' debe contener {count} números separados por comas."
+        )
+    return numbers
+
+async def _units_page_response(request: Request, after: Optional[str], limit: int) -> Response:
+    """Una página del listado; si hay más unidades, el cursor de la siguiente va en X-Next-Cursor."""
+    # Se pide una fila extra para saber si existe una página siguiente
+    rows = await async_session.get_iss_data_page(after=after, limit=limit + 1)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["unit_id"])
+    # Las filas ya tienen el formato de UnitDataPublic: se serializan directamente
+    return await negotiated_response(request, dumps(rows), headers=headers)
+
+async def _iter_units_ndjson(after: Optional[str], limit: Optional[int]) -> AsyncIterator[bytes]:
+    """
+    Recorre la tabla por bloques con el cursor por clave y emite una línea JSON por unidad.
+    Solo hay un bloque en memoria a la vez, tenga la flota el tamaño que tenga.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        chunk_size = settings.UNITS_STREAM_CHUNK_ROWS if remaining is None else min(remaining, settings.UNITS_STREAM_CHUNK_ROWS)
+        rows = await async_session.get_iss_data_page(after=after, limit=chunk_size)
+        if not rows:
+            return
+        yield encode_ndjson(rows)
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1]["unit_id"]
+        if remaining is not None:
+            remaining -= len(rows)
+
+def _wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    if format is not None:
+        return format == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def _geo_query(bbox: Optional[str], near: Optional[str], radius_km: Optional[float], k: Optional[int]) -> List[str]:
+    """Resuelve la consulta espacial con el índice y devuelve los unit_id resultantes."""
+    if bbox and near:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use 'bbox' o 'near', no ambos."
+        )
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = _parse_coordinates(bbox, 4, "bbox")
+        if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="bbox fuera de rango: longitudes en [-180, 180] y latitudes en [-90, 90]."
+            )
+        if min_lat > max_lat:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="bbox inválido: se espera min_lon,min_lat,max_lon,max_lat con min_lat <= max_lat."
+            )
+        return unit_spatial_index.query_bbox(min_lon, min_lat, max_lon, max_lat)[:settings.GEO_QUERY_MAX_RESULTS]
+    if not near:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'radius_km' y 'k' requieren el parámetro 'near=lat,lon'."
+        )
+    lat, lon = _parse_coordinates(near, 2, "near")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="'near' fuera de rango: latitud en [-90, 90] y longitud en [-180, 180]."
+        )
+    if radius_km is None and k is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'near' requiere 'radius_km', 'k' o ambos."
+        )
+    if k is not None:
+        matches = unit_spatial_index.query_nearest(lat, lon, k, max_radius_km=radius_km)
+    else:
+        matches = unit_spatial_index.query_radius(lat, lon, radius_km)[:settings.GEO_QUERY_MAX_RESULTS]
+    return [unit_id for unit_id, _ in matches]
+
+async def _cached_unit(unit_id: str) -> Tuple[Optional[int], Optional[UnitData]]:
+    """(versión, datos) de la unidad en el caché; en un fallo se consulta la BD (y se rellena el caché)."""
+    version = unit_data_cache.lookup_version(unit_id)
+    if version is None and await unit_store.get_unit_data(unit_id=unit_id) is not None:
+        version = unit_data_cache.lookup_version(unit_id)
+    return version, unit_data_cache.peek(unit_id) if version is not None else None
+
+def _older_than(unit: Optional[UnitData], max_age: float) -> bool:
+    if unit is None:
+        return True
+    timestamp = unit.timestamp if unit.timestamp.tzinfo else unit.timestamp.replace(tzinfo=datetime.timezone.utc)
+    return (datetime.datetime.now(datetime.timezone.utc) - timestamp).total_seconds() > max_age
+
 @router.get(
     "/units/data",
     response_model=UnitDataPublic,
     summary="Obtiene los últimos datos públicos de la unidad ISS",
-    description="Devuelve la información más reciente de telemetría de la Estación Espacial Internacional (ISS) almacenada en el sistema. Este endpoint es de acceso público."
+    description="Devuelve la información más reciente de telemetría de la Estación Espacial Internacional (ISS) almacenada en el sistema. Este endpoint es de acceso público. "
+                "Admite If-None-Match: si los datos no cambiaron desde el ETag indicado responde 304. "
+                "Con max_age, los datos más antiguos que ese valor se refrescan antes de responder."
 )
-async def get_public_iss_unit_data(): # Eliminamos current_client y Depends
+async def get_public_iss_unit_data(
+    request: Request,
+    max_age: Optional[float] = Query(
+        None, gt=0,
+        description="Antigüedad máxima aceptable (segundos) del timestamp de los datos. Si los guardados son más "
+                    "antiguos se consulta la fuente una vez (las peticiones simultáneas comparten esa consulta) "
+                    "antes de responder; si no es posible, se devuelven los datos disponibles."
+    ),
+): # Eliminamos current_client y Depends
     """
     Endpoint público para obtener los datos más recientes de la ISS.
+    El cuerpo se serializa una vez por versión de los datos y se reutiliza.
     """
-    iss_data_from_db = db_session.get_iss_data_by_id(unit_id=ISS_UNIT_ID)
+    version, iss_data = await _cached_unit(ISS_UNIT_ID)
+    if max_age is not None and settings.REFRESH_ENABLED and _older_than(iss_data, max_age):
+        await on_demand_refresher.refresh(ISS_UNIT_ID)
+        version, iss_data = await _cached_unit(ISS_UNIT_ID)
 
-    if not iss_data_from_db:
+    if not iss_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Datos para la unidad '{ISS_UNIT_ID}' no encontrados. El poller podría no haber corrido aún o no hay datos."
         )
 
     try:
-        response_data = UnitDataPublic(
-            unit_id=iss_data_from_db["unit_id"],
-            latitude=iss_data_from_db["latitude"],
-            longitude=iss_data_from_db["longitude"],
-            timestamp_iso=iss_data_from_db["timestamp"],
-            sensors=iss_data_from_db["sensors"]
-        )
-        return response_data
+        rendered = rendered_response_cache.get_or_render(
+            f"unit:{ISS_UNIT_ID}", version, lambda: _render_unit(iss_data)
+        )
     except Exception as e:
-        print(f"Error al convertir datos de la BD a UnitDataPublic: {e}")
+        logger.exception("Error al convertir datos de la unidad a UnitDataPublic: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al procesar los datos de la unidad."
         )
+    return await cached_json_response(request, rendered)
 
 @router.get(
     "/units",
     response_model=List[UnitDataPublic],
     summary="Obtiene datos públicos de todas las unidades disponibles",
-    description="Devuelve una lista con la información de telemetría más reciente de todas las unidades monitoreadas almacenadas en el sistema. Este endpoint es de acceso público."
+    description="Devuelve una lista con la información de telemetría más reciente de todas las unidades monitoreadas almacenadas en el sistema. Este endpoint es de acceso público. "
+                "Admite If-None-Match: si los datos no cambiaron desde el ETag indicado responde 304. "
+                "Filtros espaciales opcionales: `bbox=min_lon,min_lat,max_lon,max_lat` (si min_lon > max_lon cruza el antimeridiano), "
+                "o `near=lat,lon` con `radius_km` (distancia de círculo máximo) y/o `k` (k más cercanas, ordenadas por distancia). "
+                f"Paginación por cursor: `limit` (máx. {settings.UNITS_PAGE_MAX_LIMIT}) y `after`; las unidades se ordenan por unit_id "
+                f"y el cursor de la página siguiente llega en la cabecera {NEXT_CURSOR_HEADER} (ausente en la última página). "
+                f"Con `format=ndjson` (o `Accept: {NDJSON_MEDIA_TYPE}`) se transmite una unidad por línea a medida que se lee de la BD. "
+                "Las respuestas JSON se comprimen según Accept-Encoding (gzip; br y zstd si el servidor los tiene instalados)."
 )
-async def get_public_all_units_data(): # Eliminamos current_client y Depends
+async def get_public_all_units_data(
+    request: Request,
+    bbox: Optional[str] = Query(default=None, description="min_lon,min_lat,max_lon,max_lat"),
+    near: Optional[str] = Query(default=None, description="lat,lon"),
+    radius_km: Optional[float] = Query(default=None, gt=0),
+    k: Optional[int] = Query(default=None, ge=1, le=settings.GEO_QUERY_MAX_RESULTS),
+    limit: Optional[int] = Query(default=None, ge=1, le=settings.UNITS_PAGE_MAX_LIMIT, description="Unidades por página"),
+    after: Optional[str] = Query(default=None, description=f"Cursor devuelto en {NEXT_CURSOR_HEADER}"),
+    format: Optional[Literal["json", "ndjson"]] = Query(default=None),
+): # Eliminamos current_client y Depends
     """
     Endpoint público para obtener los datos más recientes de todas las unidades.
+    El cuerpo se serializa una vez por versión de los datos y se reutiliza.
+    Con filtros espaciales, la consulta se resuelve con el índice espacial en memoria.
+    Con paginación o NDJSON se lee la BD por clave, sin materializar la flota completa.
     """
-    all_data_from_db = db_session.get_all_iss_data_from_db()
+    is_geo_query = bbox is not None or near is not None or radius_km is not None or k is not None
+    ndjson = _wants_ndjson(request, format)
+    if limit is not None or after is not None or ndjson:
+        if is_geo_query:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Los filtros espaciales no admiten paginación ni NDJSON."
+            )
+        after_unit_id = decode_cursor(after) if after is not None else None
+        if ndjson:
+            return StreamingResponse(_iter_units_ndjson(after_unit_id, limit), media_type=NDJSON_MEDIA_TYPE)
+        return await _units_page_response(request, after_unit_id, limit or settings.UNITS_PAGE_MAX_LIMIT)
+
+    version = unit_data_cache.lookup_all_version()
+    if version is None:
+        # Caché aún no completo: carga desde la BD
+        await unit_store.get_all_unit_data()
+        version = unit_data_cache.version
+
+    if is_geo_query:
+        unit_ids = _geo_query(bbox, near, radius_km, k)
+        units = [unit for unit in (unit_data_cache.peek(unit_id) for unit_id in unit_ids) if unit is not None]
+        return await negotiated_response(request, _render_units(units)[0])
 
-    if not all_data_from_db:
+    if unit_data_cache.is_empty():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No se encontraron datos de unidades. El poller podría no haber corrido aún o no hay datos."
         )
-    
-    response_list = []
+
     try:
-        for data_item in all_data_from_db:
-            response_list.append(UnitDataPublic(
-                unit_id=data_item["unit_id"],
-                latitude=data_item["latitude"],
-                longitude=data_item["longitude"],
-                timestamp_iso=data_item["timestamp"],
-                sensors=data_item["sensors"]
-            ))
-        return response_list
+        rendered = rendered_response_cache.get_or_render(
+            "units:all", version, lambda: _render_units(unit_data_cache.peek_all())
+        )
     except Exception as e:
-        print(f"Error al convertir lista de datos de la BD a List[UnitDataPublic]: {e}")
+        logger.exception("Error al convertir lista de datos de unidades a List[UnitDataPublic]: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error al procesar la lista de datos de unidades."
         )
+    return await cached_json_response(request, rendered)
+
+@router.get(
+    "/units/changes",
+    response_model=UnitChanges,
+    summary="Obtiene solo las unidades que cambiaron desde una secuencia",
+    description="Sincronización incremental del listado: cada escritura de una unidad recibe un número de secuencia "
+                "creciente. Devuelve las unidades escritas después de `since`, `high_water` (el valor de `since` para "
+                "la siguiente consulta) y `epoch`, la identidad de la base de datos, que el cliente devuelve en la "
+                "siguiente consulta. Si `resync_required` es true (la secuencia no pertenece a esta base de datos: "
+                "`epoch` distinto o `since` mayor que la marca actual, o hay más de "
+                f"{settings.UNITS_CHANGES_MAX_UNITS} cambios pendientes) `units` va vacío: el cliente debe "
+                "recargar el listado completo (/units) y continuar desde el `high_water` y el `epoch` de esta respuesta. "
+                "Un cliente nuevo empieza con `since=0` y sin `epoch`. Este endpoint es de acceso público."
+)
+async def get_units_changes(request: Request, since: int = Query(..., ge=0), epoch: Optional[str] = Query(default=None)):
+    limit = settings.UNITS_CHANGES_MAX_UNITS
+    db_epoch = await async_session.get_db_epoch()
+    rows, high_water = await async_session.get_iss_data_changes(since=since, limit=limit + 1)
+    # Con otra época, `since` numera escrituras de otra base (recreada o restaurada): no es comparable
+    resync_required = (epoch is not None and epoch != db_epoch) or since > high_water or len(rows) > limit
+    if resync_required:
+        units = []
+    else:
+        # La marca sale de las filas devueltas, que pueden incluir escrituras posteriores a la lectura de MAX
+        high_water = rows[-1]["change_seq"] if rows else since
+        units = []
+        for row in rows:
+            row.pop("change_seq")
+            units.append(public_unit_dict(UnitData(**row)))
+    content = {"since": since, "epoch": db_epoch, "high_water": high_water, "resync_required": resync_required,
+               "units": units}
+    return await negotiated_response(request, dumps(content))
+
+async def _units_batch_response(request: Request, unit_ids: List[str]) -> Response:
+    """Resultado de /units/batch: una entrada por id pedido, en orden, con los que no existen marcados."""
+    found = await unit_store.get_units_data(list(dict.fromkeys(unit_ids)))
+    results = []
+    missing = {}
+    for unit_id in unit_ids:
+        unit = found.get(unit_id)
+        if unit is None:
+            missing[unit_id] = None
+        results.append({"unit_id": unit_id, "found": unit is not None,
+                        "data": public_unit_dict(unit) if unit is not None else None})
+    return await negotiated_response(request, dumps({"results": results, "missing": list(missing)}))
+
+_BATCH_DESCRIPTION = (
+    "Devuelve, en el orden pedido, una entrada por unit_id con `found` y los datos más recientes "
+    "(`data` es null si la unidad no existe); `missing` lista los que no existen. Se resuelven desde el "
+    "caché y, si faltan, con consultas por clave a la BD en bloques de "
+    f"{settings.UNITS_BATCH_CHUNK_SIZE}. Máximo {settings.UNITS_BATCH_MAX_IDS} unit_id por petición. "
+    "Este endpoint es de acceso público."
+)
+
+@router.get(
+    "/units/batch",
+    response_model=UnitBatchResult,
+    summary="Obtiene los datos de varias unidades en una sola petición",
+    description=_BATCH_DESCRIPTION
+)
+async def get_units_batch(
+    request: Request,
+    ids: str = Query(..., description="unit_id separados por comas"),
+):
+    unit_ids = [unit_id for unit_id in ids.split(",") if unit_id]
+    if not unit_ids or len(unit_ids) > settings.UNITS_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El parámetro 'ids' debe contener entre 1 y {settings.UNITS_BATCH_MAX_IDS} unit_id separados por comas."
+        )
+    return await _units_batch_response(request, unit_ids)
+
+@router.post(
+    "/units/batch",
+    response_model=UnitBatchResult,
+    summary="Obtiene los datos de varias unidades en una sola petición (lista en el cuerpo)",
+    description="Como GET /units/batch, con los unit_id en el cuerpo (`{\"unit_ids\": [...]}`) para listas largas. "
+                + _BATCH_DESCRIPTION
+)
+async def post_units_batch(request: Request, payload: UnitBatchInput):
+    return await _units_batch_response(request, payload.unit_ids)
+
+@router.get(
+    "/units/{unit_id}/history",
+    response_model=List[UnitDataPublic],
+    summary="Obtiene el histórico de posiciones de una unidad",
+    description="Devuelve los puntos almacenados de la unidad en el rango [from, to) ordenados por tiempo. "
+                "Con `step` (segundos) se devuelve un punto por intervalo. Por defecto, la última hora. "
+                f"Máximo {settings.HISTORY_MAX_POINTS} puntos por respuesta. Los datos antiguos están compactados "
+                f"a un punto cada {settings.HISTORY_COMPACT_BUCKET_SECONDS} s. Este endpoint es de acceso público."
+)
+async def get_unit_history(
+    request: Request,
+    unit_id: str,
+    from_: Optional[datetime.datetime] = Query(default=None, alias="from"),
+    to: Optional[datetime.datetime] = Query(default=None),
+    step: Optional[int] = Query(default=None, ge=1, description="Tamaño del intervalo de reducción en segundos"),
+):
+    to_dt = to or datetime.datetime.now(datetime.timezone.utc)
+    from_dt = from_ or (to_dt - datetime.timedelta(hours=1))
+    if from_dt.tzinfo is None:
+        from_dt = from_dt.replace(tzinfo=datetime.timezone.utc)
+    if to_dt.tzinfo is None:
+        to_dt = to_dt.replace(tzinfo=datetime.timezone.utc)
+    if from_dt >= to_dt:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El parámetro 'from' debe ser anterior a 'to'."
+        )
+
+    points = await async_session.get_history(
+        unit_id=unit_id,
+        from_ts=from_dt.timestamp(),
+        to_ts=to_dt.timestamp(),
+        step_seconds=step,
+        limit=settings.HISTORY_MAX_POINTS,
+    )
+    # Las filas ya tienen el formato de UnitDataPublic: se serializan directamente
+    return await negotiated_response(request, dumps(points))
+
+@router.get(
+    "/units/{unit_id}/export",
+    summary="Exporta el histórico completo de una unidad en formato columnar binario (requiere token)",
+    description="Devuelve los puntos de la unidad en [from, to) (por defecto, todo el histórico) como una secuencia "
+                f"de frames columnares (`{SEGMENT_MEDIA_TYPE}`): columnas float64 little-endian de ts, latitude, "
+                "longitude y cada sensor numérico (NaN donde falta). Se leen sin análisis con app.db.segments "
+                "(iter_segments / Segment.to_dict, con NumPy si está instalado). Los intervalos ya sellados se "
+                "envían directamente desde los segmentos mapeados en memoria, sin copias; no se aplica compactación."
+)
+async def export_unit_history(
+    unit_id: str,
+    from_: Optional[datetime.datetime] = Query(default=None, alias="from"),
+    to: Optional[datetime.datetime] = Query(default=None),
+    current_client: TokenPayload = Depends(get_rate_limited_client),
+):
+    from_ts, to_ts = (
+        (value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)).timestamp() if value else None
+        for value in (from_, to)
+    )
+    if from_ts is not None and to_ts is not None and from_ts >= to_ts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El parámetro 'from' debe ser anterior a 'to'."
+        )
+    # memoryview de bytes: las columnas de los segmentos son rebanadas del mmap y no se copian
+    parts = [memoryview(part).cast("B") for part in await export_unit_parts(unit_id, from_ts, to_ts)]
+    if not parts:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay histórico para la unidad '{unit_id}' en el rango pedido."
+        )
+
+    async def body() -> AsyncIterator[memoryview]:
+        for part in parts:
+            yield part
+
+    return StreamingResponse(body(), media_type=SEGMENT_MEDIA_TYPE, headers={
+        "Content-Length": str(sum(part.nbytes for part in parts)),
+        "Content-Disposition": f'attachment; filename="{re.sub(r"[^A-Za-z0-9._-]", "_", unit_id)}.seg"',
+    })
+
+
+def _get_track(unit_id: str) -> UnitTrack:
+    track = unit_tracks.get(unit_id) if settings.TRACK_ENABLED else None
+    if track is None or not len(track):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay trayectoria reciente para la unidad '{unit_id}'."
+        )
+    return track
+
+def _track_since(minutes: float) -> float:
+    return datetime.datetime.now(datetime.timezone.utc).timestamp() - minutes * 60
+
+@router.get(
+    "/units/{unit_id}/track",
+    summary="Obtiene la trayectoria reciente de una unidad (en memoria)",
+    description="Devuelve los puntos de los últimos `minutes` minutos en formato de columnas: `timestamps` "
+                "(epoch en segundos), `latitude`, `longitude` y `sensors` (una lista por sensor numérico, null "
+                f"donde la muestra no lo trae). Se sirve desde memoria; como máximo {settings.TRACK_WINDOW_POINTS} "
+                "puntos por unidad (para rangos mayores, usar /history). Este endpoint es de acceso público."
+)
+async def get_unit_track(request: Request, unit_id: str, minutes: float = Query(default=10, gt=0, le=24 * 60)):
+    window = _get_track(unit_id).window(_track_since(minutes))
+    content = {
+        "unit_id": unit_id,
+        "points": len(window["ts"]),
+        "timestamps": window["ts"].tolist(),
+        "latitude": window["lat"].tolist(),
+        "longitude": window["lon"].tolist(),
+        "sensors": {name: column_to_json(column) for name, column in window["sensors"].items()},
+    }
+    return await negotiated_response(request, dumps(content))
+
+@router.get(
+    "/units/{unit_id}/track/stats",
+    summary="Estadísticas de movimiento recientes de una unidad",
+    description="Distancia recorrida (km), velocidad media, máxima y del último tramo (km/h) y rumbo actual "
+                "(grados desde el norte) calculados sobre la trayectoria en memoria de los últimos `minutes` "
+                "minutos. Este endpoint es de acceso público."
+)
+async def get_unit_track_stats(unit_id: str, minutes: float = Query(default=10, gt=0, le=24 * 60)):
+    stats = track_stats(_get_track(unit_id).window(_track_since(minutes)))
+    return {"unit_id": unit_id, **stats}
+
+
+def _utc(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)
+
+@router.get(
+    "/units/{unit_id}/position",
+    response_model=PositionEstimate,
+    summary="Estima la posición de una unidad en un instante",
+    description="Interpola por el círculo máximo entre las muestras que rodean `at` (por defecto, ahora). "
+                f"Después de la última muestra extrapola hasta {settings.POSITION_EXTRAPOLATION_MAX_SECONDS:g} s "
+                f"(hasta {settings.ISS_EXTRAPOLATION_MAX_SECONDS:g} s para la ISS, con un modelo orbital). "
+                "`method` indica si el valor es una muestra, una interpolación o una extrapolación. "
+                "Este endpoint es de acceso público."
+)
+async def get_unit_position(request: Request, unit_id: str, at: Optional[datetime.datetime] = Query(default=None)):
+    at_dt = _utc(at) if at is not None else datetime.datetime.now(datetime.timezone.utc)
+    estimates = await estimate_unit_positions(unit_id, [at_dt.timestamp()])
+    if estimates is None or estimates[0]["method"] == "unavailable":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay muestras de la unidad '{unit_id}' suficientemente cerca de {at_dt.isoformat()}."
+        )
+    content = {"unit_id": unit_id, "timestamp": at_dt.isoformat(), **estimates[0]}
+    return await negotiated_response(request, dumps(content))
+
+@router.post(
+    "/units/{unit_id}/positions",
+    response_model=List[PositionEstimate],
+    summary="Estima la posición de una unidad en varios instantes",
+    description="Como /position, para una lista de instantes (máximo "
+                f"{settings.POSITION_BATCH_MAX_TIMESTAMPS}), calculados en una sola pasada. Se devuelve una "
+                "estimación por instante, en el mismo orden; las que no se pueden calcular tienen "
+                "`method` = `unavailable` y coordenadas nulas. Este endpoint es de acceso público."
+)
+async def get_unit_positions(request: Request, unit_id: str, payload: PositionBatchInput):
+    timestamps = [_utc(value) for value in payload.timestamps]
+    estimates = await estimate_unit_positions(unit_id, [value.timestamp() for value in timestamps])
+    if estimates is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay muestras de la unidad '{unit_id}' en el rango pedido."
+        )
+    content = [
+        {"unit_id": unit_id, "timestamp": value.isoformat(), **estimate}
+        for value, estimate in zip(timestamps, estimates)
+    ]
+    return await negotiated_response(request, dumps(content))
@@ -0,0 +1,58 @@
+# ws_espacial/app/api/v1/endpoints/client_geofences.py
+import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.endpoints.client_stream import sse_subscription_response
+from app.api.v1.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.config import settings
+from app.db import async_session
+from app.models.geofence import GeofenceEvent
+from app.services.geofence import geofence_broadcaster
+
+router = APIRouter()
+
+@router.get(
+    "/geofences/events",
+    response_model=List[GeofenceEvent],
+    summary="Eventos de entrada/salida de las unidades en las geocercas",
+    description="Eventos en orden de registro, filtrables por `fence_id`, `unit_id` y `since` (timestamp de la muestra). "
+                f"Paginación por cursor: `limit` (máx. {settings.GEOFENCE_PAGE_MAX_LIMIT}) y `after`; el cursor de la "
+                f"página siguiente llega en la cabecera {NEXT_CURSOR_HEADER}. Este endpoint es de acceso público.",
+)
+async def list_geofence_events(
+    response: Response,
+    fence_id: Optional[int] = Query(default=None),
+    unit_id: Optional[str] = Query(default=None),
+    since: Optional[datetime.datetime] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=settings.GEOFENCE_PAGE_MAX_LIMIT),
+    after: Optional[str] = Query(default=None, description=f"Cursor devuelto en {NEXT_CURSOR_HEADER}"),
+):
+    after_id = 0
+    if after is not None:
+        value = decode_cursor(after)
+        if not value.isdigit():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor 'after' inválido.")
+        after_id = int(value)
+    since_ts = None
+    if since is not None:
+        since_ts = (since if since.tzinfo else since.replace(tzinfo=datetime.timezone.utc)).timestamp()
+    rows = await async_session.get_geofence_events(
+        after_id=after_id, limit=limit + 1, fence_id=fence_id, unit_id=unit_id, since_ts=since_ts
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(str(rows[-1]["id"]))
+    return rows
+
+@router.get(
+    "/geofences/events/stream",
+    summary="Flujo Server-Sent Events de eventos de geocercas",
+    description="Cada evento `geofence` contiene un evento de entrada/salida con el formato de /geofences/events. "
+                "Admite `?fence_id=` para filtrar por una sola geocerca. Este endpoint es de acceso público.",
+    response_class=StreamingResponse,
+)
+async def stream_geofence_events(request: Request, fence_id: Optional[int] = Query(default=None)):
+    return sse_subscription_response(geofence_broadcaster, request, str(fence_id) if fence_id is not None else None)
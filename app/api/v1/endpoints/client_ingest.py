@@ -0,0 +1,140 @@
+# ws_espacial/app/api/v1/endpoints/client_ingest.py
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.api.v1.deps import get_rate_limited_client
+from app.core.config import settings
+from app.models.token import TokenPayload
+from app.models.unit import UnitData, UnitDataInput
+from app.services.ingest_buffer import IngestBatchTooLarge, IngestBufferFull, ingest_buffer
+
+router = APIRouter()
+
+# Validación en bloque: pydantic-core parsea y valida el JSON completo sin pasar por dicts intermedios
+_units_adapter = TypeAdapter(List[UnitDataInput])
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class IngestResult(BaseModel):
+    accepted: int
+
+
+def _validation_error(e: ValidationError, offset: int) -> HTTPException:
+    errors = e.errors(include_url=False, include_context=False)
+    for error in errors:
+        # Ajustamos el índice del elemento al número de línea/posición global en la petición
+        if error["loc"] and isinstance(error["loc"][0], int):
+            error["loc"] = (error["loc"][0] + offset,) + tuple(error["loc"][1:])
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail={"accepted": offset, "errors": errors[:20]})
+
+
+def _backpressure_error(accepted: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"message": "Búfer de ingesta lleno; reintente más tarde.", "accepted": accepted},
+        headers={"Retry-After": str(max(1, int(settings.INGEST_FLUSH_INTERVAL_SECONDS * 4)))},
+    )
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+async def _submit(units: List[UnitData], accepted: int) -> None:
+    try:
+        await ingest_buffer.submit(units, timeout=settings.INGEST_ENQUEUE_TIMEOUT_SECONDS)
+    except IngestBufferFull:
+        raise _backpressure_error(accepted)
+    except IngestBatchTooLarge:
+        # INGEST_MAX_BATCH / INGEST_NDJSON_CHUNK_LINES mayores que INGEST_BUFFER_CAPACITY
+        raise _too_large(f"El lote ({len(units)} puntos) supera la capacidad del búfer de ingesta "
+                         f"({settings.INGEST_BUFFER_CAPACITY}); aceptados: {accepted}.")
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Lee el cuerpo con un tope de tamaño: se rechaza por Content-Length antes de leer nada y,
+    si la cabecera falta o miente (chunked), en cuanto lo recibido supera el tope.
+    """
+    detail = f"El cuerpo supera {max_bytes} bytes; use NDJSON para flujos mayores."
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise _too_large(detail)
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise _too_large(detail)
+    return bytes(body)
+
+
+async def _ingest_json_array(request: Request) -> int:
+    body = await _read_body(request, settings.INGEST_MAX_BODY_BYTES)
+    try:
+        units = _units_adapter.validate_json(body)
+    except ValidationError as e:
+        raise _validation_error(e, 0)
+    if len(units) > settings.INGEST_MAX_BATCH:
+        raise _too_large(f"Máximo {settings.INGEST_MAX_BATCH} puntos por petición; use NDJSON para flujos mayores.")
+    await _submit(units, 0)
+    return len(units)
+
+
+async def _ingest_ndjson(request: Request) -> int:
+    """Procesa el flujo NDJSON por bloques de líneas, sin cargar la petición completa en memoria."""
+    accepted = 0
+    lines: List[bytes] = []
+    remainder = b""
+
+    async def submit_lines() -> None:
+        nonlocal accepted, lines
+        if not lines:
+            return
+        try:
+            units = _units_adapter.validate_json(b"[" + b",".join(lines) + b"]")
+        except ValidationError as e:
+            raise _validation_error(e, accepted)
+        await _submit(units, accepted)
+        accepted += len(units)
+        lines = []
+
+    async for chunk in request.stream():
+        parts = (remainder + chunk).split(b"\n")
+        remainder = parts.pop()
+        if len(remainder) > settings.INGEST_MAX_LINE_BYTES: # Una línea sin fin no se acumula en memoria
+            raise _too_large(f"Línea NDJSON de más de {settings.INGEST_MAX_LINE_BYTES} bytes (aceptados: {accepted}).")
+        for line in parts:
+            line = line.strip()
+            if line:
+                lines.append(line)
+        if len(lines) >= settings.INGEST_NDJSON_CHUNK_LINES:
+            await submit_lines()
+    if remainder.strip():
+        lines.append(remainder.strip())
+    await submit_lines()
+    return accepted
+
+
+@router.post(
+    "/units/ingest",
+    response_model=IngestResult,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Ingesta masiva de telemetría de unidades (requiere token)",
+    description="Acepta un array JSON de UnitData (`application/json`) o un flujo NDJSON "
+                "(`application/x-ndjson`, un UnitData por línea). Los puntos se validan en bloque, "
+                "se acumulan en un búfer y se escriben por lotes. Responde 202 con el número de puntos aceptados; "
+                "si el búfer está lleno responde 503 con Retry-After. En NDJSON, ante un error de validación "
+                "se informa cuántos puntos se aceptaron antes de la línea errónea. "
+                f"Límites: {settings.INGEST_MAX_BODY_BYTES} bytes por array JSON y {settings.INGEST_MAX_LINE_BYTES} "
+                "bytes por línea NDJSON (413 al superarlos)."
+)
+async def ingest_units(request: Request, current_client: TokenPayload = Depends(get_rate_limited_client)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_MEDIA_TYPES:
+        accepted = await _ingest_ndjson(request)
+    else:
+        accepted = await _ingest_json_array(request)
+    return IngestResult(accepted=accepted)
@@ -0,0 +1,127 @@
+# ws_espacial/app/api/v1/endpoints/client_stream.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.api.v1.deps import client_ip, ip_rate_limit_retry_after, limit_public_by_ip
+from app.core.config import settings
+from app.core.metrics import REQUESTS_REJECTED
+from app.services.admission import admission_controller
+from app.services.broadcaster import (
+    HEARTBEAT, STREAM_LIMIT_CLIENT, Broadcaster, Subscription, SubscriptionLimitError, unit_broadcaster
+)
+
+router = APIRouter()
+
+# Mensaje de latido para WebSocket (en SSE se usa un comentario, que el navegador ignora)
+WS_HEARTBEAT = '{"event":"heartbeat"}'
+SSE_HEARTBEAT = ": heartbeat\n\n"
+
+# Códigos de cierre de WebSocket: 1008 = política (límite de tasa), 1013 = reintentar más tarde
+WS_POLICY_VIOLATION = 1008
+WS_TRY_AGAIN_LATER = 1013
+
+def _subscription_limit_exception(reason: str) -> HTTPException:
+    if reason == STREAM_LIMIT_CLIENT:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas suscripciones abiertas desde este cliente.",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Límite de suscripciones del servidor alcanzado. Reintente más tarde.",
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+class _SubscriptionStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que libera la suscripción al terminar, aunque el generador no llegue a
+    arrancar (cliente desconectado antes del primer evento).
+    """
+    def __init__(self, subscription: Subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._subscription = subscription
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._subscription.close()
+
+def sse_subscription_response(broadcaster: Broadcaster, request: Request, unit_id: Optional[str]) -> StreamingResponse:
+    """
+    Respuesta SSE sobre una suscripción a `broadcaster`. El hueco se reserva antes de responder,
+    así que superar los límites da 429 (por cliente) o 503 (en total) y nunca un 200 vacío;
+    la suscripción se libera en el finally del generador (y, si no llega a arrancar, al acabar la respuesta).
+    """
+    try:
+        subscription = broadcaster.subscribe(unit_id=unit_id, client_key=client_ip(request))
+    except SubscriptionLimitError as e:
+        REQUESTS_REJECTED.labels(e.reason).inc()
+        raise _subscription_limit_exception(e.reason)
+
+    async def event_source():
+        try:
+            async for message in subscription.messages():
+                yield SSE_HEARTBEAT if message is HEARTBEAT else message.sse
+        finally:
+            subscription.close()
+
+    return _SubscriptionStreamingResponse(
+        subscription,
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/units/stream")
+async def stream_units_websocket(websocket: WebSocket, unit_id: Optional[str] = None):
+    """
+    WebSocket público: envía cada nueva lectura de unidad (JSON con el formato de UnitDataPublic)
+    en cuanto el poller la almacena. Con `?unit_id=` se filtra por una sola unidad.
+    La conexión pasa por el límite de tasa por IP, el control de admisión y los límites de
+    suscripciones; si se rechaza, se cierra antes de aceptarla.
+    """
+    if ip_rate_limit_retry_after(websocket):
+        await websocket.close(code=WS_POLICY_VIOLATION, reason="Demasiadas peticiones. Reintente más tarde.")
+        return
+    overload = admission_controller.overload_reason() if settings.ADMISSION_ENABLED else None
+    if overload is not None:
+        REQUESTS_REJECTED.labels(overload).inc()
+        await websocket.close(code=WS_TRY_AGAIN_LATER, reason="Servicio sobrecargado. Reintente más tarde.")
+        return
+    try:
+        subscription = unit_broadcaster.subscribe(unit_id=unit_id, client_key=client_ip(websocket))
+    except SubscriptionLimitError as e:
+        REQUESTS_REJECTED.labels(e.reason).inc()
+        await websocket.close(code=WS_TRY_AGAIN_LATER, reason="Límite de suscripciones alcanzado.")
+        return
+
+    try:
+        await websocket.accept()
+        async for message in subscription.messages():
+            if message is HEARTBEAT:
+                await websocket.send_text(WS_HEARTBEAT)
+            else:
+                await websocket.send_text(message.json)
+        # Si salimos del bucle es porque el cliente fue descartado por lento
+        await websocket.close(code=WS_TRY_AGAIN_LATER, reason="Cliente demasiado lento; reconecte.")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+
+@router.get(
+    "/units/stream/sse",
+    summary="Flujo Server-Sent Events de actualizaciones de unidades",
+    description="Equivalente SSE de /units/stream. Cada evento `unit` contiene los datos públicos de la unidad actualizada. "
+                "Admite `?unit_id=` para filtrar por una sola unidad. Este endpoint es de acceso público. "
+                f"Como máximo {settings.STREAM_MAX_SUBSCRIBERS_PER_CLIENT} flujos abiertos por cliente (429 al superarlo).",
+    response_class=StreamingResponse,
+    dependencies=[Depends(limit_public_by_ip)],
+)
+async def stream_units_sse(request: Request, unit_id: Optional[str] = Query(default=None)):
+    return sse_subscription_response(unit_broadcaster, request, unit_id)
@@ -0,0 +1,88 @@
+# ws_espacial/app/api/v1/http_cache.py
+import datetime
+import email.utils
+from typing import Dict, Optional
+
+import asyncio
+from fastapi import Request, Response, status
+
+from app.cache.rendered_cache import RenderedBody, rendered_response_cache
+from app.core.compression import compress, negotiate
+from app.core.config import settings
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/ y admite '*' y listas."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag or _strip_encoding(candidate) == etag:
+            return True
+    return False
+
+def _strip_encoding(etag: str) -> str:
+    # '"<hash>-gzip"' -> '"<hash>"' (el hash es hexadecimal y no contiene '-')
+    dash = etag.rfind("-")
+    return etag[:dash] + '"' if dash != -1 and etag.endswith('"') else etag
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    # Cada codificación es una representación distinta: su propio ETag (RFC 9110, 8.8.3)
+    return f'{etag[:-1]}-{encoding}"'
+
+def _negotiate(request: Request, size: int) -> Optional[str]:
+    if size < settings.COMPRESSION_MIN_BYTES:
+        return None
+    return negotiate(request.headers.get("accept-encoding"))
+
+def _cache_headers(rendered: RenderedBody) -> Dict[str, str]:
+    headers = {"ETag": rendered.etag}
+    max_age = 0
+    if rendered.last_modified is not None:
+        last_modified = rendered.last_modified
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+        headers["Last-Modified"] = email.utils.format_datetime(
+            last_modified.astimezone(datetime.timezone.utc), usegmt=True
+        )
+        # Los datos no cambian hasta el siguiente ciclo del poller
+        age = (datetime.datetime.now(datetime.timezone.utc) - last_modified).total_seconds()
+        max_age = int(min(settings.POLLING_INTERVAL_SECONDS, max(0.0, settings.POLLING_INTERVAL_SECONDS - age)))
+    headers["Cache-Control"] = f"public, max-age={max_age}"
+    return headers
+
+async def cached_json_response(request: Request, rendered: RenderedBody) -> Response:
+    """
+    Respuesta con los bytes pre-serializados, o 304 si el cliente ya tiene esa versión.
+    Si el cliente acepta compresión se sirve la variante comprimida de esa versión (cacheada).
+    """
+    headers = _cache_headers(rendered)
+    headers["Vary"] = "Accept-Encoding"
+    encoding = _negotiate(request, len(rendered.body))
+    if encoding is not None:
+        headers["ETag"] = _encoded_etag(rendered.etag, encoding)
+    if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is None:
+        return Response(content=rendered.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    body = await rendered_response_cache.encoded_body(rendered, encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def negotiated_response(
+    request: Request, body: bytes, media_type: str = "application/json", headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Respuesta para un cuerpo generado en esta petición, comprimida con el nivel rápido si procede."""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = _negotiate(request, len(body))
+    if encoding is not None:
+        if len(body) >= settings.COMPRESSION_OFFLOAD_BYTES:
+            body = await asyncio.get_running_loop().run_in_executor(None, compress, body, encoding, False)
+        else:
+            body = compress(body, encoding, False)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
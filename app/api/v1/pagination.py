@@ -0,0 +1,40 @@
+# ws_espacial/app/api/v1/pagination.py
+"""
+Cursores opacos para la paginación por clave (keyset) de los listados.
+El cursor de la página siguiente viaja en la cabecera X-Next-Cursor, de modo que el cuerpo
+de la respuesta sigue siendo el mismo array JSON.
+"""
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any) -> str:
+    """Serializa la clave de la última fila devuelta (str o valor JSON) en base64 url-safe sin relleno."""
+    raw = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor 'after' inválido."
+        )
+
+
+def decode_json_cursor(cursor: str) -> Any:
+    try:
+        return json.loads(decode_cursor(cursor))
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor 'after' inválido."
+        )
@@ -1,9 +1,15 @@
 # ws_prueba/app/api/v1/router.py
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.api.v1.deps import limit_public_by_ip
 # Importamos los módulos que contienen nuestros routers específicos
 from app.api.v1.endpoints import admin_tokens
 from app.api.v1.endpoints import client_data
+from app.api.v1.endpoints import admin_cache
+from app.api.v1.endpoints import client_stream
+from app.api.v1.endpoints import client_ingest
+from app.api.v1.endpoints import admin_geofences
+from app.api.v1.endpoints import client_geofences
 
 # Creamos la instancia principal del router para la API v1
 api_router_v1 = APIRouter()
@@ -19,5 +25,40 @@ api_router_v1.include_router(
 api_router_v1.include_router(
     client_data.router,  # El objeto 'router' definido en client_data.py
     prefix="/client",    # Todas las rutas en client_data.router comenzarán con /client
-    tags=["Client Data"] # Etiqueta para la documentación de Swagger UI
+    tags=["Client Data"], # Etiqueta para la documentación de Swagger UI
+    dependencies=[Depends(limit_public_by_ip)] # Rutas públicas: límite de tasa por IP
+)
+
+# Streaming de actualizaciones (WebSocket y SSE) bajo el mismo prefijo /client
+api_router_v1.include_router(
+    client_stream.router,
+    prefix="/client",
+    tags=["Client Streaming"]
+)
+
+# Ingesta masiva de telemetría (autenticada)
+api_router_v1.include_router(
+    client_ingest.router,
+    prefix="/client",
+    tags=["Client Ingest"]
+)
+
+# Estadísticas del caché en memoria (capa de lectura caliente)
+api_router_v1.include_router(
+    admin_cache.router,
+    prefix="/admin",
+    tags=["Admin Cache"]
+)
+
+# Geocercas: alta/baja (admin) y eventos de entrada/salida (públicos)
+api_router_v1.include_router(
+    admin_geofences.router,
+    prefix="/admin",
+    tags=["Admin Geofences"]
+)
+api_router_v1.include_router(
+    client_geofences.router,
+    prefix="/client",
+    tags=["Client Geofences"],
+    dependencies=[Depends(limit_public_by_ip)]
 )
\ No newline at end of file
@@ -1,29 +1,143 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Iterable, Any
 from app.models.unit import UnitData # Nuestro modelo Pydantic para los datos de unidad
+from app.core.config import settings
+import datetime
 import threading # Para un bloqueo simple si se accede concurrentemente (buena práctica)
+import time
 
 class InMemoryCache:
+    """
+    Caché versionado de los últimos datos de cada unidad (capa de lectura caliente delante de SQLite).
+    Cada escritura incrementa `version`, lo que permite a los lectores detectar cambios sin consultar la BD.
+    """
     def __init__(self):
         self._cache: Dict[str, UnitData] = {}
+        self._unit_versions: Dict[str, int] = {}
+        self._version = 0
+        self._loaded = False # True cuando el caché contiene todas las unidades de la BD (carga inicial)
+        self._last_write_monotonic: Optional[float] = None
+        self._hits = 0
+        self._misses = 0
         self._lock = threading.Lock() # Para la seguridad en hilos (aunque FastAPI con asyncio es de un solo hilo por worker)
 
     def get(self, unit_id: str) -> Optional[UnitData]:
         with self._lock:
-            return self._cache.get(unit_id)
+            data = self._cache.get(unit_id)
+            if data is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return data
+
+    def get_many(self, unit_ids: Iterable[str]) -> Dict[str, UnitData]:
+        """Las unidades de la lista que están en caché (cada id cuenta como acierto o fallo), bajo un solo bloqueo."""
+        found: Dict[str, UnitData] = {}
+        with self._lock:
+            for unit_id in unit_ids:
+                data = self._cache.get(unit_id)
+                if data is None:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+                    found[unit_id] = data
+        return found
 
     def set(self, unit_id: str, data: UnitData):
         with self._lock:
+            self._version += 1
             self._cache[unit_id] = data
+            self._unit_versions[unit_id] = self._version
+            self._last_write_monotonic = time.monotonic()
             # print(f"Cache updated for {unit_id}: {data.latitude}, {data.longitude}") # Para depuración
 
-    def get_all(self) -> List[UnitData]:
+    def load(self, items: Iterable[UnitData]):
+        """Carga masiva (warm load desde la BD). Marca el caché como completo."""
+        with self._lock:
+            self._version += 1
+            for data in items:
+                current = self._cache.get(data.unit_id)
+                if current is not None and current.timestamp > data.timestamp:
+                    continue # El poller escribió un dato más reciente mientras se leía la BD
+                self._cache[data.unit_id] = data
+                self._unit_versions[data.unit_id] = self._version
+            self._loaded = True
+            self._last_write_monotonic = time.monotonic()
+
+    def get_all(self) -> Optional[List[UnitData]]:
+        """Devuelve todas las unidades, o None si el caché aún no está completo (hay que ir a la BD)."""
         with self._lock:
+            if not self._loaded:
+                self._misses += 1
+                return None
+            self._hits += 1
             return list(self._cache.values())
 
     def is_empty(self) -> bool:
         with self._lock:
             return not bool(self._cache)
 
+    def is_loaded(self) -> bool:
+        with self._lock:
+            return self._loaded
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def lookup_version(self, unit_id: str) -> Optional[int]:
+        """Versión actual de una unidad (cuenta como lectura: acierto o fallo). None si no está en caché."""
+        with self._lock:
+            version = self._unit_versions.get(unit_id)
+            if version is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return version
+
+    def lookup_all_version(self) -> Optional[int]:
+        """Versión global si el caché está completo (cuenta como lectura). None si hay que ir a la BD."""
+        with self._lock:
+            if not self._loaded:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return self._version
+
+    def peek(self, unit_id: str) -> Optional[UnitData]:
+        """Como get(), pero sin afectar a los contadores (uso interno al renderizar)."""
+        with self._lock:
+            return self._cache.get(unit_id)
+
+    def peek_all(self) -> List[UnitData]:
+        with self._lock:
+            return list(self._cache.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos y antigüedad de los datos, para verificar que la BD no está en la ruta de lectura."""
+        with self._lock:
+            total = self._hits + self._misses
+            seconds_since_write = (
+                time.monotonic() - self._last_write_monotonic if self._last_write_monotonic is not None else None
+            )
+            newest = max((d.timestamp for d in self._cache.values()), default=None)
+            data_age = None
+            if newest is not None:
+                if newest.tzinfo is None:
+                    newest = newest.replace(tzinfo=datetime.timezone.utc)
+                data_age = (datetime.datetime.now(datetime.timezone.utc) - newest).total_seconds()
+            return {
+                "version": self._version,
+                "units": len(self._cache),
+                "loaded": self._loaded,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 4) if total else None,
+                "seconds_since_last_write": round(seconds_since_write, 3) if seconds_since_write is not None else None,
+                "newest_data_age_seconds": round(data_age, 3) if data_age is not None else None,
+                # Se considera obsoleto si no hubo escrituras en dos intervalos de sondeo
+                "stale": seconds_since_write is None or seconds_since_write > 2 * settings.POLLING_INTERVAL_SECONDS,
+            }
+
 # Instancia global del caché (Singleton simple para este demo)
 # En una aplicación más grande, esto podría gestionarse con inyección de dependencias.
-unit_data_cache = InMemoryCache()
\ No newline at end of file
+unit_data_cache = InMemoryCache()
@@ -0,0 +1,79 @@
+import asyncio
+import datetime
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.compression import compress
+from app.core.config import settings
+
+@dataclass(frozen=True)
+class RenderedBody:
+    """Cuerpo JSON ya serializado para una versión concreta de los datos."""
+    version: int
+    body: bytes
+    etag: str # ETag fuerte, derivado del contenido (estable entre workers)
+    last_modified: Optional[datetime.datetime]
+    # Variantes comprimidas de este mismo cuerpo, por Content-Encoding (se crean al pedirlas)
+    encoded: Dict[str, "asyncio.Task[bytes]"] = field(default_factory=dict, compare=False, repr=False)
+
+class RenderedResponseCache:
+    """
+    Guarda, por clave de recurso, los bytes de la última versión renderizada.
+    Mientras la versión del caché de unidades no cambie, las peticiones reutilizan
+    los mismos bytes y el mismo ETag sin volver a validar ni serializar.
+    """
+    def __init__(self):
+        self._entries: Dict[str, RenderedBody] = {}
+        self._renders = 0
+        self._reuses = 0
+        self._compressions = 0
+        self._lock = threading.Lock()
+
+    def get_or_render(
+        self,
+        key: str,
+        version: int,
+        render: Callable[[], Tuple[bytes, Optional[datetime.datetime]]],
+    ) -> RenderedBody:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._reuses += 1
+                return entry
+        # Se renderiza fuera del lock; si dos peticiones coinciden, ambas producen los mismos bytes
+        body, last_modified = render()
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = RenderedBody(version=version, body=body, etag=etag, last_modified=last_modified)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current.version <= version:
+                self._entries[key] = entry
+            self._renders += 1
+        return entry
+
+    async def _compress(self, body: bytes, encoding: str) -> bytes:
+        if len(body) >= settings.COMPRESSION_OFFLOAD_BYTES:
+            encoded = await asyncio.get_running_loop().run_in_executor(None, compress, body, encoding, True)
+        else:
+            encoded = compress(body, encoding, True)
+        self._compressions += 1
+        return encoded
+
+    async def encoded_body(self, rendered: RenderedBody, encoding: str) -> bytes:
+        """
+        Cuerpo comprimido con `encoding`, calculado una vez por versión. Las peticiones que llegan
+        mientras se comprime esperan a la misma tarea (que sigue aunque su cliente se desconecte).
+        """
+        task = rendered.encoded.get(encoding)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = rendered.encoded[encoding] = asyncio.ensure_future(self._compress(rendered.body, encoding))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "renders": self._renders, "reuses": self._reuses,
+                    "compressions": self._compressions}
+
+rendered_response_cache = RenderedResponseCache()
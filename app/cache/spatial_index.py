@@ -0,0 +1,184 @@
+# ws_espacial/app/cache/spatial_index.py
+"""
+Índice espacial en memoria (rejilla de celdas lat/lon) sobre la última posición de cada unidad.
+Se actualiza de forma incremental en cada escritura y permite consultas por
+rectángulo (bbox), radio (distancia de círculo máximo) y k vecinos más cercanos
+sin recorrer todas las unidades.
+"""
+import heapq
+import math
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM # Media circunferencia: cualquier punto está más cerca
+
+Cell = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def normalize_lon(lon: float) -> float:
+    """Longitud en [-180, 180]; 180 se conserva para no convertir el borde este en el oeste."""
+    if -180.0 <= lon <= 180.0:
+        return lon
+    return ((lon + 180.0) % 360.0) - 180.0
+
+
+class SpatialGridIndex:
+    def __init__(self, cell_degrees: float = 1.0):
+        self._cell_degrees = cell_degrees
+        self._lon_cells = int(math.ceil(360 / cell_degrees))
+        self._lat_cells = int(math.ceil(180 / cell_degrees))
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._positions: Dict[str, Tuple[float, float, Cell]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _cell_x(self, lon: float) -> int:
+        return min(self._lon_cells - 1, int((lon + 180.0) // self._cell_degrees)) % self._lon_cells
+
+    def _cell_y(self, lat: float) -> int:
+        return max(0, min(self._lat_cells - 1, int((lat + 90.0) // self._cell_degrees)))
+
+    def _cell_of(self, lat: float, lon: float) -> Cell:
+        return self._cell_x(lon), self._cell_y(lat)
+
+    # --- Mantenimiento incremental ---
+
+    def _upsert_locked(self, unit_id: str, lat: float, lon: float) -> None:
+        cell = self._cell_of(lat, lon)
+        previous = self._positions.get(unit_id)
+        if previous is not None and previous[2] != cell:
+            old_cell = self._cells.get(previous[2])
+            if old_cell is not None:
+                old_cell.discard(unit_id)
+                if not old_cell:
+                    del self._cells[previous[2]]
+        self._positions[unit_id] = (lat, lon, cell)
+        self._cells.setdefault(cell, set()).add(unit_id)
+
+    def upsert(self, unit_id: str, lat: float, lon: float) -> None:
+        with self._lock:
+            self._upsert_locked(unit_id, lat, lon)
+
+    def upsert_many(self, items: Iterable[Tuple[str, float, float]]) -> None:
+        with self._lock:
+            for unit_id, lat, lon in items:
+                self._upsert_locked(unit_id, lat, lon)
+
+    def remove(self, unit_id: str) -> None:
+        with self._lock:
+            previous = self._positions.pop(unit_id, None)
+            if previous is not None:
+                cell = self._cells.get(previous[2])
+                if cell is not None:
+                    cell.discard(unit_id)
+                    if not cell:
+                        del self._cells[previous[2]]
+
+    # --- Consultas ---
+
+    def _x_ranges(self, min_lon: float, max_lon: float) -> List[Tuple[int, int]]:
+        """Rangos de columnas para un intervalo de longitudes (partido si cruza el antimeridiano)."""
+        if max_lon - min_lon >= 360:
+            return [(0, self._lon_cells - 1)]
+        min_lon, max_lon = normalize_lon(min_lon), normalize_lon(max_lon)
+        if min_lon <= max_lon:
+            return [(self._cell_x(min_lon), self._cell_x(max_lon))]
+        return [(self._cell_x(min_lon), self._lon_cells - 1), (0, self._cell_x(max_lon))]
+
+    def _units_in_cells(self, min_lat: float, max_lat: float, x_ranges: List[Tuple[int, int]]) -> Iterator[Tuple[str, float, float]]:
+        y_min, y_max = self._cell_y(min_lat), self._cell_y(max_lat)
+        n_cells = sum(x1 - x0 + 1 for x0, x1 in x_ranges) * (y_max - y_min + 1)
+        if n_cells > len(self._cells):
+            # Área grande: es más barato recorrer solo las celdas ocupadas
+            for (cx, cy), unit_ids in self._cells.items():
+                if y_min <= cy <= y_max and any(x0 <= cx <= x1 for x0, x1 in x_ranges):
+                    for unit_id in unit_ids:
+                        lat, lon, _ = self._positions[unit_id]
+                        yield unit_id, lat, lon
+            return
+        for x0, x1 in x_ranges:
+            for cx in range(x0, x1 + 1):
+                for cy in range(y_min, y_max + 1):
+                    unit_ids = self._cells.get((cx, cy))
+                    if unit_ids:
+                        for unit_id in unit_ids:
+                            lat, lon, _ = self._positions[unit_id]
+                            yield unit_id, lat, lon
+
+    def query_bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> List[str]:
+        """
+        Unidades dentro del rectángulo. Si min_lon > max_lon, el rectángulo cruza el antimeridiano.
+        Las longitudes se normalizan igual para elegir las celdas y para comprobar la pertenencia.
+        """
+        all_lons = max_lon - min_lon >= 360
+        min_lon, max_lon = normalize_lon(min_lon), normalize_lon(max_lon)
+        crosses = min_lon > max_lon
+        x_ranges = [(0, self._lon_cells - 1)] if all_lons else self._x_ranges(min_lon, max_lon)
+        with self._lock:
+            result = []
+            for unit_id, lat, lon in self._units_in_cells(min_lat, max_lat, x_ranges):
+                if not (min_lat <= lat <= max_lat):
+                    continue
+                in_lon = all_lons or ((lon >= min_lon or lon <= max_lon) if crosses else (min_lon <= lon <= max_lon))
+                if in_lon:
+                    result.append(unit_id)
+            return result
+
+    def _candidates_within(self, lat: float, lon: float, radius_km: float) -> Iterator[Tuple[str, float, float]]:
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        min_lat, max_lat = lat - dlat, lat + dlat
+        if min_lat <= -90 or max_lat >= 90:
+            # El círculo contiene un polo: todas las longitudes
+            x_ranges = [(0, self._lon_cells - 1)]
+        else:
+            max_abs_lat = max(abs(min_lat), abs(max_lat))
+            dlon = dlat / max(math.cos(math.radians(max_abs_lat)), 1e-12)
+            x_ranges = [(0, self._lon_cells - 1)] if dlon >= 180 else self._x_ranges(lon - dlon, lon + dlon)
+        return self._units_in_cells(max(-90.0, min_lat), min(90.0, max_lat), x_ranges)
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """(unit_id, distancia_km) de las unidades a menos de radius_km, ordenadas por distancia."""
+        with self._lock:
+            result = []
+            for unit_id, ulat, ulon in self._candidates_within(lat, lon, radius_km):
+                distance = haversine_km(lat, lon, ulat, ulon)
+                if distance <= radius_km:
+                    result.append((unit_id, distance))
+        result.sort(key=lambda item: item[1])
+        return result
+
+    def query_nearest(self, lat: float, lon: float, k: int, max_radius_km: Optional[float] = None) -> List[Tuple[str, float]]:
+        """k unidades más cercanas (opcionalmente limitadas a max_radius_km), por expansión del radio de búsqueda."""
+        limit = min(max_radius_km or MAX_DISTANCE_KM, MAX_DISTANCE_KM)
+        radius = min(limit, self._cell_degrees * KM_PER_DEGREE_LAT)
+        with self._lock:
+            if k <= 0 or not self._positions:
+                return []
+            while True:
+                candidates = [
+                    (haversine_km(lat, lon, ulat, ulon), unit_id)
+                    for unit_id, ulat, ulon in self._candidates_within(lat, lon, radius)
+                ]
+                nearest = heapq.nsmallest(k, (c for c in candidates if c[0] <= radius))
+                # Dentro del radio explorado el resultado es exacto; si faltan, ampliamos
+                if len(nearest) >= k or radius >= limit:
+                    return [(unit_id, distance) for distance, unit_id in nearest]
+                radius = min(limit, radius * 2)
+
+
+unit_spatial_index = SpatialGridIndex(cell_degrees=settings.SPATIAL_INDEX_CELL_DEGREES)
@@ -0,0 +1,206 @@
+# ws_espacial/app/cache/track_buffer.py
+"""
+Trayectoria reciente de cada unidad en memoria, en columnas compactas (array('d')).
+
+Cada unidad guarda sus últimos TRACK_WINDOW_POINTS puntos como columnas de float64: timestamp
+(epoch en segundos), latitud, longitud y una columna por sensor numérico (NaN donde la muestra no
+trae ese sensor). Las columnas crecen con cada muestra hasta la ventana y a partir de ahí funcionan
+como un buffer circular (se sobrescribe la más antigua), sin crear objetos por punto.
+
+Memoria por unidad con la ventana llena: (3 + S) * 8 * N bytes de datos, con S sensores numéricos
+y N puntos, más ~80 bytes por columna y ~400 bytes de estructura. Con N = 720 y 2 sensores: ~29 KB,
+frente a ~1 KB por punto (~0.7 MB) si cada muestra se guardara como UnitData.
+
+Las lecturas (últimos N minutos) son cortes de las columnas; las estadísticas de velocidad y rumbo
+se calculan vectorizadas con NumPy si está instalado (vistas sin copia sobre los arrays) y con un
+bucle en Python si no. Solo se accede desde el event loop, por eso no hay lock.
+"""
+import bisect
+import math
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.cache.spatial_index import EARTH_RADIUS_KM, haversine_km
+from app.core.config import settings
+from app.models.unit import UnitData
+
+try:
+    import numpy as np
+except ImportError: # NumPy es opcional: sin él las estadísticas usan el bucle en Python
+    np = None
+
+NAN = float("nan")
+
+
+def _numeric_sensors(sensors: Dict[str, Any]) -> Dict[str, float]:
+    return {
+        name: float(value) for name, value in sensors.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+class UnitTrack:
+    __slots__ = ("capacity", "ts", "lat", "lon", "sensors", "_start")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = array("d")
+        self.lat = array("d")
+        self.lon = array("d")
+        self.sensors: Dict[str, array] = {}
+        self._start = 0 # Posición física del punto más antiguo cuando la ventana está llena
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def last_ts(self) -> Optional[float]:
+        if not self.ts:
+            return None
+        return self.ts[self._start - 1] # Con _start = 0 es el último elemento
+
+    def append(self, ts: float, lat: float, lon: float, sensors: Dict[str, Any]) -> bool:
+        """
+        Añade un punto. Las muestras que no son posteriores a la última se descartan: las antiguas
+        están en el histórico y las repetidas llegan al releer cambios (snapshot, otros workers).
+        """
+        last_ts = self.last_ts
+        if last_ts is not None and ts <= last_ts:
+            return False
+        values = _numeric_sensors(sensors)
+        size = len(self.ts)
+        if size < self.capacity:
+            self.ts.append(ts)
+            self.lat.append(lat)
+            self.lon.append(lon)
+            for name, column in self.sensors.items():
+                column.append(values.pop(name, NAN))
+            for name, value in values.items(): # Sensor nuevo: NaN en los puntos anteriores
+                column = array("d", [NAN]) * size
+                column.append(value)
+                self.sensors[name] = column
+            return True
+        i = self._start
+        self.ts[i] = ts
+        self.lat[i] = lat
+        self.lon[i] = lon
+        for name, column in self.sensors.items():
+            column[i] = values.pop(name, NAN)
+        for name, value in values.items():
+            column = array("d", [NAN]) * self.capacity
+            column[i] = value
+            self.sensors[name] = column
+        self._start = (i + 1) % self.capacity
+        return True
+
+    def _ordered(self, column: array) -> array:
+        if self._start == 0:
+            return column
+        return column[self._start:] + column[:self._start]
+
+    def window(self, since_ts: Optional[float] = None) -> Dict[str, Any]:
+        """Columnas en orden cronológico de los puntos con timestamp >= since_ts."""
+        ts = self._ordered(self.ts)
+        first = bisect.bisect_left(ts, since_ts) if since_ts is not None else 0
+        return {
+            "ts": ts[first:],
+            "lat": self._ordered(self.lat)[first:],
+            "lon": self._ordered(self.lon)[first:],
+            "sensors": {name: self._ordered(column)[first:] for name, column in self.sensors.items()},
+        }
+
+    def memory_bytes(self) -> int:
+        columns = [self.ts, self.lat, self.lon, *self.sensors.values()]
+        return sys.getsizeof(self) + sys.getsizeof(self.sensors) + sum(sys.getsizeof(c) for c in columns)
+
+
+def _bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    y = math.sin(dlambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+
+def _segment_stats_numpy(ts: array, lat: array, lon: array) -> Tuple[float, float, float]:
+    """(distancia total km, velocidad máxima km/h, velocidad del último tramo km/h), vectorizado."""
+    t = np.frombuffer(ts, dtype=np.float64)
+    phi = np.radians(np.frombuffer(lat, dtype=np.float64))
+    lam = np.radians(np.frombuffer(lon, dtype=np.float64))
+    a = np.sin(np.diff(phi) / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    dt = np.diff(t)
+    moving = dt > 0
+    speeds = distances[moving] / dt[moving] * 3600
+    return float(distances.sum()), float(speeds.max()) if speeds.size else 0.0, float(speeds[-1]) if speeds.size else 0.0
+
+
+def _segment_stats_python(ts: array, lat: array, lon: array) -> Tuple[float, float, float]:
+    total = max_speed = last_speed = 0.0
+    for i in range(1, len(ts)):
+        distance = haversine_km(lat[i - 1], lon[i - 1], lat[i], lon[i])
+        total += distance
+        dt = ts[i] - ts[i - 1]
+        if dt > 0:
+            last_speed = distance / dt * 3600
+            max_speed = max(max_speed, last_speed)
+    return total, max_speed, last_speed
+
+
+def track_stats(window: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Distancia, velocidades y rumbo de una ventana devuelta por UnitTrack.window()."""
+    ts, lat, lon = window["ts"], window["lat"], window["lon"]
+    points = len(ts)
+    if points < 2:
+        return {"points": points, "duration_seconds": 0.0, "distance_km": 0.0, "avg_speed_kmh": None,
+                "max_speed_kmh": None, "last_speed_kmh": None, "heading_deg": None}
+    segment_stats = _segment_stats_numpy if np is not None else _segment_stats_python
+    distance, max_speed, last_speed = segment_stats(ts, lat, lon)
+    duration = ts[-1] - ts[0]
+    return {
+        "points": points,
+        "duration_seconds": duration,
+        "distance_km": distance,
+        "avg_speed_kmh": distance / duration * 3600 if duration > 0 else None,
+        "max_speed_kmh": max_speed,
+        "last_speed_kmh": last_speed,
+        "heading_deg": _bearing_deg(lat[-2], lon[-2], lat[-1], lon[-1]),
+    }
+
+
+class TrackStore:
+    def __init__(self, window_points: int):
+        self._window_points = window_points
+        self._tracks: Dict[str, UnitTrack] = {}
+
+    def append(self, unit: UnitData) -> bool:
+        track = self._tracks.get(unit.unit_id)
+        if track is None:
+            track = self._tracks[unit.unit_id] = UnitTrack(self._window_points)
+        return track.append(unit.timestamp.timestamp(), unit.latitude, unit.longitude, unit.sensors)
+
+    def append_many(self, units: Iterable[UnitData]) -> None:
+        for unit in units:
+            self.append(unit)
+
+    def get(self, unit_id: str) -> Optional[UnitTrack]:
+        return self._tracks.get(unit_id)
+
+    def stats(self) -> Dict[str, Any]:
+        tracks = list(self._tracks.values())
+        return {
+            "units": len(tracks),
+            "points": sum(len(track) for track in tracks),
+            "window_points": self._window_points,
+            "memory_bytes": sum(track.memory_bytes() for track in tracks),
+            "vectorized": np is not None,
+        }
+
+
+unit_tracks = TrackStore(window_points=settings.TRACK_WINDOW_POINTS)
+
+
+def column_to_json(column: Iterable[float]) -> List[Optional[float]]:
+    """Lista JSON de una columna: NaN (sensor ausente) se convierte en null."""
+    return [None if value != value else value for value in column]
@@ -0,0 +1,82 @@
+# ws_espacial/app/core/compression.py
+"""
+Negociación de Content-Encoding (Accept-Encoding) y compresión de cuerpos de respuesta.
+
+gzip está siempre disponible; brotli ("br") y zstd se ofrecen solo si están instalados los
+paquetes `brotli` y `zstandard`. Se usan dos juegos de niveles: uno alto para las variantes que se
+cachean por versión de los datos (se comprimen una vez por ciclo del poller) y uno rápido para los
+cuerpos que se generan en cada petición (histórico, páginas, trayectorias).
+"""
+import gzip
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError: # brotli es opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError: # zstandard es opcional
+    zstandard = None
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # mtime=0: misma salida para los mismos bytes (estable entre workers)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+def _zstd(body: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+CODECS: Dict[str, Callable[[bytes, int], bytes]] = {"gzip": _gzip}
+if brotli is not None:
+    CODECS["br"] = _brotli
+if zstandard is not None:
+    CODECS["zstd"] = _zstd
+
+
+def available_encodings() -> List[str]:
+    """Codificaciones habilitadas e instaladas, en orden de preferencia del servidor."""
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding in CODECS]
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Codificación a usar según Accept-Encoding (RFC 9110): la de mayor q entre las disponibles;
+    a igual q, la preferida por el servidor. None = sin comprimir.
+    """
+    if not settings.COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    wildcard = weights.get("*")
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, cached: bool) -> bytes:
+    levels = settings.COMPRESSION_LEVELS if cached else settings.COMPRESSION_DYNAMIC_LEVELS
+    return CODECS[encoding](body, levels[encoding])
@@ -1,6 +1,7 @@
 # app/core/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     APP_TITLE: str = "Empresa 1 API Service"
@@ -11,13 +12,139 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
 
+    # Caché de autenticación
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_REVOCATION_CHECK_SECONDS: float = 1.0 # Cada cuánto se relee la época de revocación compartida
+
+    # Límite de tasa por cliente (token bucket, por worker)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CLIENT_PER_SECOND: float = 20.0 # Rutas autenticadas, por client_id (0 = sin límite)
+    RATE_LIMIT_CLIENT_BURST: float = 40.0
+    RATE_LIMIT_CLIENT_OVERRIDES: Dict[str, float] = {} # client_id -> peticiones por segundo (JSON en el entorno)
+    RATE_LIMIT_IP_PER_SECOND: float = 50.0 # Rutas públicas, por IP (0 = sin límite)
+    RATE_LIMIT_IP_BURST: float = 100.0
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False # Usar X-Forwarded-For (solo detrás de un proxy de confianza)
+    RATE_LIMIT_MAX_KEYS: int = 100000 # Cubos en memoria como máximo (LRU)
+
+    # Control de admisión: rechaza con 503 cuando el proceso está sobrecargado
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 512 # Peticiones HTTP en curso
+    ADMISSION_MAX_DB_QUEUE: int = 256 # Operaciones pendientes en el executor de BD
+    ADMISSION_MAX_LOOP_LAG_SECONDS: float = 0.5 # Retraso del event loop
+    ADMISSION_LAG_SAMPLE_SECONDS: float = 0.1 # Cadencia de medición del retraso
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
     # API Externa
     ISS_API_URL: str = "http://api.open-notify.org/iss-now.json"
     POLLING_INTERVAL_SECONDS: int = 20 # IMPORTANTE: Debe ser int y un valor por defecto
+    POLL_ISS_ENABLED: bool = True # Fuente por defecto (ISS_API_URL)
+    POLL_SOURCES_FILE: Optional[str] = None # JSON con fuentes adicionales (ver app/services/sources.py)
+    POLL_MAX_CONCURRENCY: int = 32 # Consultas simultáneas como máximo
+    POLL_MAX_CONNECTIONS: int = 64 # Tamaño del pool del cliente HTTP compartido
+    POLL_DEFAULT_TIMEOUT_SECONDS: float = 10.0
+    POLL_BACKOFF_MAX_SECONDS: float = 300.0
+    REFRESH_ENABLED: bool = True # max_age en /client/units/data puede forzar una consulta a la fuente
+    REFRESH_MIN_INTERVAL_SECONDS: float = 2.0 # Separación mínima entre consultas a una misma fuente
+
+    # Observabilidad
+    LOG_LEVEL: str = "INFO" # DEBUG muestra cada consulta a las fuentes
+    LOG_FORMAT: str = "text" # "text" o "json" (una línea JSON por registro)
+    METRICS_ENABLED: bool = True # Expone /metrics en formato de texto de Prometheus
+
+    # Arranque y apagado
+    READY_INITIAL_DATA_TIMEOUT_SECONDS: float = 30.0 # /readyz no espera más a los datos iniciales
+    SHUTDOWN_TASK_TIMEOUT_SECONDS: float = 10.0 # Espera máxima a que terminen las tareas de fondo canceladas
+
+    # Varios workers: un único líder (poller, compactación) y un snapshot compartido para los demás
+    WORKER_COORDINATION_ENABLED: bool = True # False = cada proceso sondea por su cuenta (comportamiento anterior)
+    LEADER_LEASE_SECONDS: float = 10.0 # Sin renovación, otro worker toma el relevo tras este tiempo
+    SNAPSHOT_INTERVAL_SECONDS: float = 0.5 # Cadencia de publicación (líder) y de lectura (seguidores)
+    SNAPSHOT_FILE: Optional[str] = None # Por defecto, <SQLITE_INSTANCE_DIR>/units_snapshot.bin
+
+    # Streaming (WebSocket / SSE)
+    STREAM_QUEUE_SIZE: int = 32 # Mensajes pendientes por cliente antes de desconectarlo por lento
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_MAX_SUBSCRIBERS: int = 10000 # Suscripciones simultáneas por worker y flujo (0 = sin límite)
+    STREAM_MAX_SUBSCRIBERS_PER_CLIENT: int = 20 # Por IP de origen (0 = sin límite)
+
+    # Ingesta masiva de telemetría
+    INGEST_BUFFER_CAPACITY: int = 200000 # Puntos pendientes como máximo (backpressure al superarlo)
+    INGEST_FLUSH_BATCH_SIZE: int = 5000 # Puntos por transacción
+    INGEST_FLUSH_INTERVAL_SECONDS: float = 0.25
+    INGEST_FLUSH_MAX_RETRIES: int = 5 # Reintentos de un lote ante errores transitorios antes de descartarlo
+    INGEST_ENQUEUE_TIMEOUT_SECONDS: float = 2.0 # Espera máxima por espacio en el búfer antes de responder 503
+    INGEST_MAX_BATCH: int = 50000 # Puntos por petición JSON
+    INGEST_MAX_BODY_BYTES: int = 32 * 1024 * 1024 # Tamaño máximo de una petición JSON (array)
+    INGEST_MAX_LINE_BYTES: int = 64 * 1024 # Tamaño máximo de una línea NDJSON
+    INGEST_NDJSON_CHUNK_LINES: int = 5000 # Líneas NDJSON validadas por bloque
+
+    # Listado paginado / en streaming de unidades
+    UNITS_PAGE_MAX_LIMIT: int = 1000 # Máximo de unidades por página
+    UNITS_STREAM_CHUNK_ROWS: int = 500 # Filas leídas de la BD por bloque en modo NDJSON
+    UNITS_BATCH_MAX_IDS: int = 1000 # unit_id por petición en /units/batch
+    UNITS_BATCH_CHUNK_SIZE: int = 500 # unit_id por consulta IN (...) a la BD (límite de parámetros de SQLite)
+    UNITS_CHANGES_MAX_UNITS: int = 5000 # Con más cambios, /units/changes pide una resincronización completa
+
+    # Compresión de respuestas (gzip siempre; br y zstd si están instalados brotli / zstandard)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: List[str] = ["br", "zstd", "gzip"] # Orden de preferencia del servidor
+    COMPRESSION_MIN_BYTES: int = 1024 # Los cuerpos más pequeños se envían sin comprimir
+    COMPRESSION_LEVELS: Dict[str, int] = {"gzip": 6, "br": 7, "zstd": 10} # Variantes cacheadas por versión
+    COMPRESSION_DYNAMIC_LEVELS: Dict[str, int] = {"gzip": 1, "br": 2, "zstd": 3} # Cuerpos generados por petición
+    COMPRESSION_OFFLOAD_BYTES: int = 65536 # Desde este tamaño se comprime fuera del event loop
+
+    # Índice espacial de posiciones actuales
+    SPATIAL_INDEX_CELL_DEGREES: float = 1.0 # Tamaño de celda de la rejilla
+    GEO_QUERY_MAX_RESULTS: int = 10000
+
+    # Geocercas: eventos de entrada/salida evaluados en cada escritura (en el worker líder)
+    GEOFENCE_ENABLED: bool = True
+    GEOFENCE_CELL_DEGREES: float = 1.0 # Celda de la rejilla de prefiltrado por bbox
+    GEOFENCE_MAX_VERTICES: int = 1000 # Vértices por polígono
+    GEOFENCE_BULK_MAX_ITEMS: int = 10000 # Geocercas por petición de alta masiva
+    GEOFENCE_FLUSH_SECONDS: float = 0.5 # Volcado de los eventos pendientes a la BD
+    GEOFENCE_RELOAD_SECONDS: float = 2.0 # Cada cuánto se comprueba si cambiaron las geocercas en la BD
+    GEOFENCE_STREAM_POLL_SECONDS: float = 0.5 # Lectura de eventos nuevos para el stream de cada worker
+    GEOFENCE_PAGE_MAX_LIMIT: int = 1000 # Geocercas / eventos por página
+
+    # Trayectoria reciente en memoria (columnas por unidad)
+    TRACK_ENABLED: bool = True
+    TRACK_WINDOW_POINTS: int = 720 # Puntos por unidad (p. ej. 1 h a una muestra cada 5 s)
+
+    # Estimación de posición en un instante (interpolación / extrapolación)
+    POSITION_MAX_GAP_SECONDS: float = 600.0 # No se interpola entre muestras más separadas
+    POSITION_EXTRAPOLATION_MAX_SECONDS: float = 30.0 # Más allá de la última muestra (unidades terrestres)
+    ISS_EXTRAPOLATION_MAX_SECONDS: float = 300.0 # Ídem para la ISS (modelo orbital)
+    POSITION_BATCH_MAX_TIMESTAMPS: int = 10000
+
+    # Histórico de posiciones
+    HISTORY_BATCH_SIZE: int = 500 # Puntos acumulados antes de volcar el lote a la BD
+    HISTORY_FLUSH_SECONDS: float = 2.0 # Volcado periódico aunque el lote no esté lleno
+    HISTORY_MAX_POINTS: int = 10000 # Máximo de puntos por respuesta de /history
+    HISTORY_RAW_RETENTION_HOURS: int = 24 # Los puntos más antiguos se compactan
+    HISTORY_COMPACT_BUCKET_SECONDS: int = 300 # Un punto por intervalo tras compactar
+    HISTORY_MAX_AGE_DAYS: int = 365 # 0 = conservar para siempre
+    HISTORY_COMPACTION_INTERVAL_SECONDS: int = 3600
+
+    # Segmentos columnares del histórico (exportación y análisis). Un intervalo se sella cuando
+    # termina + SEAL_DELAY, antes de que la compactación (HISTORY_RAW_RETENTION_HOURS) lo reduzca
+    HISTORY_SEGMENTS_ENABLED: bool = True
+    HISTORY_SEGMENTS_DIR: Optional[str] = None # Por defecto, <SQLITE_INSTANCE_DIR>/segments
+    HISTORY_SEGMENT_SECONDS: int = 3600 # Intervalo cubierto por cada archivo
+    HISTORY_SEGMENT_SEAL_DELAY_SECONDS: int = 600 # Margen para los puntos que llegan tarde
+    HISTORY_SEGMENT_ROLL_INTERVAL_SECONDS: float = 60.0
+    HISTORY_SEGMENT_OPEN_FILES: int = 64 # Segmentos mapeados en memoria a la vez (LRU)
+
+    # Administración de tokens
+    TOKENS_BULK_MAX_ITEMS: int = 10000 # Tokens por petición de generación/revocación masiva
+    TOKENS_PAGE_MAX_LIMIT: int = 1000 # Tokens por página del listado
 
     # Base de datos de Tokens
     SQLITE_DATABASE_URL: str = "instance/tokens.db"
     SQLITE_INSTANCE_DIR: str = "instance"
+    DB_POOL_SIZE: int = 8 # Conexiones de larga vida (y hilos del executor de BD)
+    DB_BUSY_TIMEOUT_MS: int = 5000 # Espera máxima ante un bloqueo de escritura
 
     # Carga la configuración desde un archivo .env
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
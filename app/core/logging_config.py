@@ -0,0 +1,47 @@
+# ws_espacial/app/core/logging_config.py
+"""
+Configuración del logging de la aplicación: nivel (LOG_LEVEL) y formato (LOG_FORMAT).
+Con LOG_FORMAT=json cada registro es una línea JSON con la marca de tiempo, el nivel, el logger,
+el mensaje y los campos pasados en `extra` (p. ej. source, outcome).
+"""
+import datetime
+import json
+import logging
+import sys
+
+from app.core.config import settings
+
+# Atributos propios de LogRecord: todo lo demás llegó por `extra` y se incluye en el JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging() -> None:
+    """Instala un único handler en el logger 'app' (idempotente)."""
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    if any(getattr(handler, "_app_handler", False) for handler in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler._app_handler = True
+    if settings.LOG_FORMAT.lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
@@ -0,0 +1,240 @@
+# ws_espacial/app/core/metrics.py
+"""
+Métricas en formato de texto de Prometheus, sin dependencias externas.
+
+Contadores e histogramas con etiquetas, pensados para la ruta caliente: observar un valor es una
+búsqueda binaria en los límites de los buckets y un incremento bajo un lock por métrica (se observan
+también desde los hilos del executor de BD). Los valores que ya mantienen otros componentes
+(cachés, búferes) se exponen con CallbackGauge, que los lee solo en el momento del scrape.
+"""
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets por defecto (segundos), de 0.5 ms a 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["MetricsRegistry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _check_labels(self, values: Sequence[str]) -> LabelValues:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: se esperaban las etiquetas {self.labelnames}")
+        return tuple(str(value) for value in values)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Incrementa un contador sin etiquetas; con etiquetas, use labels(...).inc()."""
+        self.labels().inc(amount)
+
+    def labels(self, *labelvalues: str) -> "_BoundCounter":
+        return _BoundCounter(self, self._check_labels(labelvalues))
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(tuple(labelvalues), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}_total{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class _BoundCounter:
+    __slots__ = ("_counter", "_key")
+
+    def __init__(self, counter: Counter, key: LabelValues):
+        self._counter = counter
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._counter._lock:
+            self._counter._values[self._key] = self._counter._values.get(self._key, 0.0) + amount
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "total", "count")
+
+    def __init__(self, size: int):
+        self.bucket_counts = [0] * size # No acumulados: se acumulan al exportar
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["MetricsRegistry"] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        key = labelvalues if len(labelvalues) == len(self.labelnames) else self._check_labels(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                key = self._check_labels(key)
+                series = self._series.get(key) or self._series.setdefault(key, _HistogramSeries(len(self.buckets)))
+            series.bucket_counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(tuple(labelvalues))
+        return series.count if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = [
+                (labelvalues, list(series.bucket_counts), series.total, series.count)
+                for labelvalues, series in self._series.items()
+            ]
+        bucket_labelnames = self.labelnames + ("le",)
+        for labelvalues, bucket_counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_labelnames, labelvalues + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class CallbackGauge(_Metric):
+    """Gauge cuyo valor se calcula al exportar: `callback` devuelve {valores de etiquetas: valor}."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[LabelValues, Optional[float]]],
+                 labelnames: Sequence[str] = (), registry: Optional["MetricsRegistry"] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self._callback = callback
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in self._callback().items():
+            if value is None:
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(float(value))}"
+
+
+class CallbackCounter(CallbackGauge):
+    """Contador que ya mantiene otro componente (p. ej. aciertos de un caché), leído al exportar."""
+    type_name = "counter"
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in self._callback().items():
+            if value is None:
+                continue
+            yield f"{self.name}_total{_format_labels(self.labelnames, labelvalues)} {_format_value(float(value))}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # Un callback que falla no debe romper el scrape completo
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# --- Métricas de la aplicación ---
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP hasta el inicio de la respuesta, por ruta.",
+    ("method", "route", "status"),
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Tiempo de ejecución de cada función de app.db.session en el executor de BD.",
+    ("function",),
+)
+DB_EXECUTOR_WAIT = Histogram(
+    "db_executor_wait_seconds",
+    "Espera en la cola del executor de BD antes de ejecutar la consulta.",
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors",
+    "Funciones de app.db.session que terminaron con excepción.",
+    ("function",),
+)
+UPSTREAM_FETCH_DURATION = Histogram(
+    "upstream_fetch_duration_seconds",
+    "Duración de cada consulta a una fuente externa, por resultado.",
+    ("source", "outcome"),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+ONDEMAND_REFRESH_REQUESTS = Counter(
+    "ondemand_refresh_requests",
+    "Peticiones con max_age que pidieron refrescar datos antiguos, por resultado (coalesced = esperó una consulta ya en curso).",
+    ("outcome",),
+)
+REQUESTS_REJECTED = Counter(
+    "requests_rejected",
+    "Peticiones rechazadas por límite de tasa (429) o por sobrecarga (503), por motivo.",
+    ("reason",),
+)
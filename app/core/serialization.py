@@ -0,0 +1,70 @@
+# ws_espacial/app/core/serialization.py
+"""
+Serialización JSON de las respuestas de lectura, sin pasar por modelos Pydantic.
+
+Las unidades se convierten directamente a diccionarios con el formato de UnitDataPublic y se
+codifican a bytes de una vez. Si orjson está instalado se usa (misma salida compacta en UTF-8);
+si no, un JSONEncoder de la biblioteca estándar configurado como JSONResponse de Starlette y
+creado una sola vez (json.dumps con argumentos construye un codificador nuevo en cada llamada).
+En ambos casos NaN e infinito se codifican como null, igual que hace orjson.
+"""
+import json
+import math
+from typing import Any, Dict, Iterable
+
+from app.models.unit import UnitData
+
+try:
+    import orjson
+except ImportError: # orjson es opcional
+    orjson = None
+
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def _finite(value: Any) -> Any:
+    """Copia de `value` con los float no finitos (NaN, ±inf) sustituidos por None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps(content: Any) -> bytes:
+    """JSON compacto en UTF-8, con el mismo contenido que JSONResponse."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            pass # p. ej. enteros de más de 64 bits: los admite la biblioteca estándar
+    try:
+        return _encoder.encode(content).encode("utf-8")
+    except ValueError: # Algún float no finito: se copia solo en este caso, poco habitual
+        return _encoder.encode(_finite(content)).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def public_unit_dict(unit: UnitData) -> Dict[str, Any]:
+    """Formato de UnitDataPublic (con el alias 'timestamp') sin construir el modelo."""
+    return {
+        "unit_id": unit.unit_id,
+        "latitude": unit.latitude,
+        "longitude": unit.longitude,
+        "timestamp": unit.timestamp.isoformat(),
+        "sensors": unit.sensors,
+    }
+
+
+def encode_units(units: Iterable[UnitData]) -> bytes:
+    return dumps([public_unit_dict(unit) for unit in units])
+
+
+def encode_ndjson(rows: Iterable[Any]) -> bytes:
+    """Una línea JSON por fila."""
+    return b"".join(dumps(row) + b"\n" for row in rows)
@@ -0,0 +1,158 @@
+# ws_espacial/app/db/async_session.py
+"""
+Versión awaitable de app.db.session.
+Cada función ejecuta su contraparte síncrona en el executor dedicado de BD,
+de modo que una consulta lenta o un bloqueo de escritura no detiene el event loop.
+"""
+import datetime
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+from app.db import session
+from app.db.pool import run_in_db_executor
+from app.db.segments import ColumnBuilder
+
+
+async def init_db() -> None:
+    await run_in_db_executor(session.init_db)
+
+async def store_token(client_id: str, token_hash: bytes) -> bool:
+    return await run_in_db_executor(session.store_token, client_id=client_id, token_hash=token_hash)
+
+async def store_tokens_many(rows: List[Tuple[str, bytes]]) -> List[str]:
+    return await run_in_db_executor(session.store_tokens_many, rows)
+
+async def revoke_token(token_hash: bytes) -> int:
+    return await run_in_db_executor(session.revoke_token, token_hash=token_hash)
+
+async def revoke_tokens_many(token_hashes: List[bytes]) -> int:
+    return await run_in_db_executor(session.revoke_tokens_many, token_hashes)
+
+async def get_revocation_epoch() -> int:
+    return await run_in_db_executor(session.get_revocation_epoch)
+
+async def is_token_active(token_hash: bytes) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(session.is_token_active, token_hash=token_hash)
+
+async def get_active_tokens_for_admin(
+    limit: int,
+    client_id: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    after: Optional[Tuple[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(
+        session.get_active_tokens_for_admin,
+        limit=limit,
+        client_id=client_id,
+        created_from=created_from,
+        created_to=created_to,
+        after=after,
+    )
+
+async def upsert_iss_data(unit_id: str, latitude: float, longitude: float, api_timestamp: datetime.datetime, sensors: Dict[str, Any]) -> None:
+    await run_in_db_executor(
+        session.upsert_iss_data,
+        unit_id=unit_id,
+        latitude=latitude,
+        longitude=longitude,
+        api_timestamp=api_timestamp,
+        sensors=sensors,
+    )
+
+async def upsert_iss_data_many(rows: List[Tuple[str, float, float, str, str]]) -> int:
+    return await run_in_db_executor(session.upsert_iss_data_many, rows)
+
+async def get_iss_data_by_id(unit_id: str) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_iss_data_by_id, unit_id=unit_id)
+
+async def get_iss_data_by_ids(unit_ids: Sequence[str], chunk_size: int = 500) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_iss_data_by_ids, unit_ids=unit_ids, chunk_size=chunk_size)
+
+async def get_all_iss_data_from_db() -> List[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_all_iss_data_from_db)
+
+async def get_iss_data_page(after: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_iss_data_page, after=after, limit=limit)
+
+async def get_iss_data_changes(since: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    return await run_in_db_executor(session.get_iss_data_changes, since=since, limit=limit)
+
+async def get_db_epoch() -> str:
+    return await run_in_db_executor(session.get_db_epoch)
+
+async def get_change_seq_before(updated_since: str) -> int:
+    return await run_in_db_executor(session.get_change_seq_before, updated_since)
+
+async def try_acquire_lease(name: str, holder: str, now: float, expires_at: float) -> bool:
+    return await run_in_db_executor(session.try_acquire_lease, name=name, holder=holder, now=now, expires_at=expires_at)
+
+async def set_lease(name: str, holder: str, expires_at: float) -> None:
+    await run_in_db_executor(session.set_lease, name=name, holder=holder, expires_at=expires_at)
+
+async def release_lease(name: str, holder: str) -> bool:
+    return await run_in_db_executor(session.release_lease, name=name, holder=holder)
+
+async def get_lease(name: str) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_lease, name=name)
+
+async def insert_history_batch(rows: List[Tuple[str, float, float, float, str]]) -> int:
+    return await run_in_db_executor(session.insert_history_batch, rows)
+
+async def get_history(unit_id: str, from_ts: float, to_ts: float, step_seconds: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(
+        session.get_history,
+        unit_id=unit_id, from_ts=from_ts, to_ts=to_ts, step_seconds=step_seconds, limit=limit,
+    )
+
+async def compact_history(cutoff_ts: float, bucket_seconds: int, delete_before_ts: Optional[float]) -> Dict[str, int]:
+    return await run_in_db_executor(
+        session.compact_history,
+        cutoff_ts=cutoff_ts, bucket_seconds=bucket_seconds, delete_before_ts=delete_before_ts,
+    )
+
+async def get_next_history_ts(after_ts: Optional[float]) -> Optional[float]:
+    return await run_in_db_executor(session.get_next_history_ts, after_ts)
+
+async def get_history_columns(start_ts: float, end_ts: float, unit_ids: Optional[List[str]] = None) -> ColumnBuilder:
+    return await run_in_db_executor(session.get_history_columns, start_ts, end_ts, unit_ids)
+
+async def insert_history_segment(start_ts: float, end_ts: float, file_name: str, units: int, row_count: int, size_bytes: int) -> None:
+    await run_in_db_executor(session.insert_history_segment, start_ts, end_ts, file_name, units, row_count, size_bytes)
+
+async def get_history_segments(from_ts: Optional[float] = None, to_ts: Optional[float] = None) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_history_segments, from_ts, to_ts)
+
+async def get_last_history_segment_end() -> Optional[float]:
+    return await run_in_db_executor(session.get_last_history_segment_end)
+
+async def delete_history_segments_before(before_ts: float) -> List[str]:
+    return await run_in_db_executor(session.delete_history_segments_before, before_ts)
+
+async def create_geofences(fences: List[Tuple[str, str, str]]) -> List[int]:
+    return await run_in_db_executor(session.create_geofences, fences)
+
+async def delete_geofence(fence_id: int) -> bool:
+    return await run_in_db_executor(session.delete_geofence, fence_id)
+
+async def get_geofences(after_id: Optional[int] = None, limit: int = -1) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(session.get_geofences, after_id=after_id, limit=limit)
+
+async def get_geofences_revision() -> Tuple[int, int]:
+    return await run_in_db_executor(session.get_geofences_revision)
+
+async def insert_geofence_events(rows: List[Tuple[int, str, str, float, float, float]]) -> None:
+    await run_in_db_executor(session.insert_geofence_events, rows)
+
+async def get_geofence_events(
+    after_id: int,
+    limit: int,
+    fence_id: Optional[int] = None,
+    unit_id: Optional[str] = None,
+    since_ts: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    return await run_in_db_executor(
+        session.get_geofence_events, after_id=after_id, limit=limit, fence_id=fence_id, unit_id=unit_id, since_ts=since_ts
+    )
+
+async def get_last_geofence_event_id() -> int:
+    return await run_in_db_executor(session.get_last_geofence_event_id)
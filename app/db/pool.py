@@ -0,0 +1,189 @@
+# ws_espacial/app/db/pool.py
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import DB_EXECUTOR_WAIT, DB_QUERY_DURATION, DB_QUERY_ERRORS
+
+T = TypeVar("T")
+
+# sqlite3 guarda en caché por conexión las sentencias ya compiladas (prepared statements).
+# Como las conexiones del pool son de larga vida, cada SQL se compila una sola vez por conexión.
+STATEMENT_CACHE_SIZE = 256
+
+
+class SQLiteConnectionPool:
+    """
+    Pool acotado de conexiones SQLite de larga vida.
+    Las conexiones se crean bajo demanda hasta `size` y se reutilizan; cada una se abre
+    en modo WAL para que los lectores no se bloqueen mientras el poller escribe.
+    """
+
+    def __init__(self, database: str, size: int, busy_timeout_ms: int):
+        self._database = database
+        self._size = size
+        self._busy_timeout_ms = busy_timeout_ms
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._database,
+            timeout=self._busy_timeout_ms / 1000,
+            check_same_thread=False,  # La conexión pasa de un hilo del executor a otro
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self._busy_timeout_ms)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("El pool de conexiones ya fue cerrado.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # Pool lleno: esperamos a que otra operación devuelva su conexión
+        try:
+            return self._idle.get(timeout=self._busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Tiempo de espera agotado al obtener una conexión del pool.")
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+
+_pool: Optional[SQLiteConnectionPool] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_init_lock = threading.Lock()
+
+
+def get_pool() -> SQLiteConnectionPool:
+    """Devuelve el pool global, creándolo en el primer uso."""
+    global _pool
+    if _pool is None:
+        with _init_lock:
+            if _pool is None:
+                # El directorio se crea aquí (primer uso) y no al importar el módulo
+                os.makedirs(settings.SQLITE_INSTANCE_DIR, exist_ok=True)
+                _pool = SQLiteConnectionPool(
+                    database=settings.SQLITE_DATABASE_URL,
+                    size=settings.DB_POOL_SIZE,
+                    busy_timeout_ms=settings.DB_BUSY_TIMEOUT_MS,
+                )
+    return _pool
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Executor dedicado a la base de datos. Tiene tantos hilos como conexiones el pool,
+    así ninguna tarea del executor se queda esperando una conexión libre.
+    """
+    global _executor
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DB_POOL_SIZE,
+                    thread_name_prefix="db",
+                )
+    return _executor
+
+
+def _timed_call(func: Callable[..., T], submitted_at: float, args: Any, kwargs: Any) -> T:
+    """Ejecuta `func` en el hilo del executor registrando la espera en cola y la duración."""
+    started_at = time.perf_counter()
+    DB_EXECUTOR_WAIT.observe(started_at - submitted_at)
+    name = func.__name__
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        DB_QUERY_ERRORS.labels(name).inc()
+        raise
+    finally:
+        DB_QUERY_DURATION.observe(time.perf_counter() - started_at, name)
+
+
+_pending = 0 # Operaciones enviadas al executor y aún sin terminar (solo se modifica desde el event loop)
+
+
+def db_pending() -> int:
+    return _pending
+
+
+async def run_in_db_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta una función síncrona de acceso a datos fuera del event loop."""
+    global _pending
+    loop = asyncio.get_running_loop()
+    _pending += 1
+    try:
+        return await loop.run_in_executor(get_executor(), _timed_call, func, time.perf_counter(), args, kwargs)
+    finally:
+        _pending -= 1
+
+
+def close_pool() -> None:
+    """Cierra el executor y todas las conexiones del pool (usado al apagar la aplicación)."""
+    global _pool, _executor
+    with _init_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,245 @@
+# ws_espacial/app/db/segments.py
+"""
+Formato de los segmentos columnares del histórico (archivos .seg y cuerpo de /export).
+
+Un segmento cubre un intervalo de tiempo [start_ts, end_ts) y guarda sus puntos por columnas de
+float64 little-endian, de modo que se pueden mapear en memoria y leer sin análisis alguno
+(numpy.frombuffer o memoryview.cast("d")). Las filas están ordenadas por (unit_id, ts): los
+puntos de cada unidad son un tramo contiguo de cada columna.
+
+Disposición de un frame (un archivo .seg es un frame; una exportación es una secuencia de frames):
+
+    offset 0   cabecera "<8sIIQ": MAGIC, longitud de los metadatos, 0, longitud total del frame
+    offset 24  metadatos JSON en UTF-8, rellenados con espacios hasta múltiplo de 8:
+               {"start_ts", "end_ts", "rows", "data_offset",
+                "units": [[unit_id, primera_fila, filas], ...],
+                "columns": ["ts", "latitude", "longitude"], "sensors": [nombre, ...]}
+    data_offset  una columna tras otra, cada una de `rows` float64: ts, latitude, longitude y los
+               sensores numéricos en el orden de "sensors" (NaN donde la muestra no lo tenía)
+
+Este módulo no depende del resto de la aplicación: sirve también como utilidad de lectura,
+p. ej. `python -m app.db.segments instance/segments/*.seg` o sobre un archivo exportado.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError: # numpy es opcional: sin él las columnas son memoryview de float64
+    np = None
+
+MAGIC = b"WSSEG\x00\x00\x01"
+HEADER = struct.Struct("<8sIIQ")
+BASE_COLUMNS = ("ts", "latitude", "longitude")
+ITEM_SIZE = 8
+NAN = float("nan")
+MEDIA_TYPE = "application/vnd.ws-espacial.segment"
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def _pad8(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _little_endian(column: array) -> Union[array, memoryview]:
+    if sys.byteorder == "little":
+        return column
+    swapped = array("d", column)
+    swapped.byteswap()
+    return swapped
+
+
+def frame_parts(
+    start_ts: float,
+    end_ts: float,
+    units: Sequence[Tuple[str, int, int]],
+    columns: Sequence[Buffer],
+    sensors: Sequence[str],
+) -> List[Buffer]:
+    """
+    Piezas de un frame, en orden: cabecera + metadatos y después cada columna tal cual (sin copiarla).
+    `columns` son las tres columnas base y las de `sensors`, todas con el mismo número de filas.
+    """
+    rows = sum(count for _, _, count in units)
+    meta_probe = {"start_ts": start_ts, "end_ts": end_ts, "rows": rows, "data_offset": 0,
+                  "units": [list(unit) for unit in units], "columns": list(BASE_COLUMNS), "sensors": list(sensors)}
+    # data_offset depende de la longitud de los metadatos: se calcula con un valor de sobra
+    probe = json.dumps({**meta_probe, "data_offset": 10 ** 15}, separators=(",", ":")).encode("utf-8")
+    data_offset = HEADER.size + _pad8(len(probe))
+    meta = json.dumps({**meta_probe, "data_offset": data_offset}, separators=(",", ":")).encode("utf-8")
+    meta = meta.ljust(data_offset - HEADER.size, b" ")
+    frame_len = data_offset + rows * ITEM_SIZE * len(columns)
+    return [HEADER.pack(MAGIC, len(meta), 0, frame_len) + meta, *columns]
+
+
+class ColumnBuilder:
+    """Acumula los puntos de un intervalo, unidad a unidad, directamente en columnas float64."""
+
+    def __init__(self):
+        self.units: List[Tuple[str, int, int]] = []
+        self.ts = array("d")
+        self.latitude = array("d")
+        self.longitude = array("d")
+        self.sensors: Dict[str, array] = {}
+
+    @property
+    def rows(self) -> int:
+        return len(self.ts)
+
+    def add_unit(self, unit_id: str, rows: Iterable[Tuple[float, float, float, Optional[str]]]) -> int:
+        """Añade los puntos (ts, latitude, longitude, sensors_json) de una unidad, en orden de ts."""
+        first = len(self.ts)
+        for ts, latitude, longitude, sensors_json in rows:
+            row = len(self.ts)
+            self.ts.append(ts)
+            self.latitude.append(latitude)
+            self.longitude.append(longitude)
+            if sensors_json:
+                for name, value in json.loads(sensors_json).items():
+                    if not _numeric(value):
+                        continue
+                    column = self.sensors.get(name)
+                    if column is None:
+                        column = self.sensors[name] = array("d", [NAN]) * row
+                    elif len(column) < row:
+                        column.extend([NAN] * (row - len(column)))
+                    column.append(float(value))
+        count = len(self.ts) - first
+        if count:
+            self.units.append((unit_id, first, count))
+        return count
+
+    def frame_parts(self, start_ts: float, end_ts: float) -> List[Buffer]:
+        rows = len(self.ts)
+        for column in self.sensors.values():
+            if len(column) < rows:
+                column.extend([NAN] * (rows - len(column)))
+        names = sorted(self.sensors)
+        columns = [self.ts, self.latitude, self.longitude] + [self.sensors[name] for name in names]
+        return frame_parts(start_ts, end_ts, self.units, [_little_endian(column) for column in columns], names)
+
+
+def write_segment_file(path: str, parts: Sequence[Buffer]) -> int:
+    """Escribe el frame en un archivo temporal y lo renombra: el segmento aparece completo o no aparece."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for part in parts:
+            f.write(part)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+class Segment:
+    """Vista de un frame sobre un buffer (p. ej. un mmap): las columnas no se copian."""
+
+    def __init__(self, buffer: Buffer, offset: int = 0):
+        magic, meta_len, _, frame_len = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC:
+            raise ValueError(f"No es un segmento (offset {offset}).")
+        self._buffer = buffer
+        self.offset = offset
+        self.frame_len = frame_len
+        meta = json.loads(bytes(memoryview(buffer)[offset + HEADER.size:offset + HEADER.size + meta_len]))
+        self.start_ts: float = meta["start_ts"]
+        self.end_ts: float = meta["end_ts"]
+        self.rows: int = meta["rows"]
+        self.data_offset: int = meta["data_offset"]
+        self.sensor_names: List[str] = meta["sensors"]
+        self.column_names: List[str] = meta["columns"] + self.sensor_names
+        self.units: Dict[str, Tuple[int, int]] = {unit_id: (first, count) for unit_id, first, count in meta["units"]}
+
+    def column_bytes(self, index: int, first: int = 0, count: Optional[int] = None) -> memoryview:
+        count = self.rows - first if count is None else count
+        start = self.offset + self.data_offset + (index * self.rows + first) * ITEM_SIZE
+        return memoryview(self._buffer)[start:start + count * ITEM_SIZE]
+
+    def column(self, name: str, first: int = 0, count: Optional[int] = None):
+        """Columna como numpy.ndarray (si está instalado) o memoryview de float64, sin copiar."""
+        view = self.column_bytes(self.column_names.index(name), first, count)
+        if np is not None:
+            return np.frombuffer(view, dtype="<f8")
+        return view.cast("d") if sys.byteorder == "little" else array("d", view.tobytes())
+
+    def unit_rows(self, unit_id: str, from_ts: Optional[float] = None, to_ts: Optional[float] = None) -> Tuple[int, int]:
+        """(primera fila, filas) de la unidad con ts en [from_ts, to_ts)."""
+        first, count = self.units.get(unit_id, (0, 0))
+        if not count:
+            return first, 0
+        ts = self.column_bytes(0, first, count).cast("d") if sys.byteorder == "little" else self.column("ts", first, count)
+        lo = _bisect_left(ts, from_ts, 0, count) if from_ts is not None else 0
+        hi = _bisect_left(ts, to_ts, lo, count) if to_ts is not None else count
+        return first + lo, hi - lo
+
+    def unit_frame_parts(self, unit_id: str, from_ts: Optional[float] = None, to_ts: Optional[float] = None) -> List[Buffer]:
+        """Frame con solo esa unidad y rango: cabecera nueva + rebanadas del buffer (sin copiar las columnas)."""
+        first, count = self.unit_rows(unit_id, from_ts, to_ts)
+        if not count:
+            return []
+        columns = [self.column_bytes(index, first, count) for index in range(len(self.column_names))]
+        start_ts = max(self.start_ts, from_ts) if from_ts is not None else self.start_ts
+        end_ts = min(self.end_ts, to_ts) if to_ts is not None else self.end_ts
+        return frame_parts(start_ts, end_ts, [(unit_id, 0, count)], columns, self.sensor_names)
+
+    def to_dict(self, unit_id: Optional[str] = None) -> Dict[str, Any]:
+        """Columnas de todo el frame (o de una unidad): {"ts", "latitude", "longitude", "sensors": {...}}."""
+        first, count = self.units.get(unit_id, (0, 0)) if unit_id is not None else (0, self.rows)
+        result: Dict[str, Any] = {name: self.column(name, first, count) for name in BASE_COLUMNS}
+        result["sensors"] = {name: self.column(name, first, count) for name in self.sensor_names}
+        return result
+
+
+def _bisect_left(values, x: float, lo: int, hi: int) -> int:
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def iter_segments(buffer: Buffer) -> Iterator[Segment]:
+    """Recorre los frames consecutivos de un buffer (un archivo .seg o una exportación)."""
+    offset, size = 0, len(buffer)
+    while offset < size:
+        segment = Segment(buffer, offset)
+        yield segment
+        offset += segment.frame_len
+
+
+def open_segments(path: str) -> List[Segment]:
+    """Mapea el archivo en memoria (solo lectura) y devuelve sus frames."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return list(iter_segments(buffer))
+
+
+def _summary(path: str) -> Dict[str, Any]:
+    segments = open_segments(path)
+    return {
+        "path": path,
+        "frames": [
+            {"start_ts": s.start_ts, "end_ts": s.end_ts, "rows": s.rows, "units": len(s.units), "sensors": s.sensor_names}
+            for s in segments
+        ],
+    }
+
+
+if __name__ == "__main__":
+    json.dump([_summary(path) for path in sys.argv[1:]], sys.stdout, indent=2)
+    print()
@@ -1,137 +1,689 @@
 import sqlite3
-import os
+import logging
 import json # Para convertir el diccionario de sensores a string y viceversa
 import datetime # Para manejar timestamps
-from typing import Optional, List, Dict, Any
+import secrets
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 
 from app.core.config import settings
+from app.db.pool import get_pool
+from app.db.segments import ColumnBuilder
+from app.security.jwt_manager import hash_token
 
-os.makedirs(settings.SQLITE_INSTANCE_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
 
 # LA LÍNEA "router = APIRouter()" NO DEBE ESTAR AQUÍ
 
+# Todas las funciones de este módulo son síncronas y usan una conexión prestada por el pool.
+# Desde código async (endpoints, poller) deben llamarse a través de app.db.async_session.
+
 def get_db_connection():
-    conn = sqlite3.connect(settings.SQLITE_DATABASE_URL)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Context manager que presta una conexión del pool y la devuelve al salir."""
+    return get_pool().connection()
 
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Tabla de Tokens (existente)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS active_tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id TEXT NOT NULL,
-            token TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    # Nueva tabla para los datos de la ISS
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS iss_data (
-            unit_id TEXT PRIMARY KEY,
-            latitude REAL NOT NULL,
-            longitude REAL NOT NULL,
-            api_timestamp TEXT NOT NULL, 
-            sensors_json TEXT,         
-            last_updated_at_service TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
-    print(f"Base de datos inicializada/actualizada en {settings.SQLITE_DATABASE_URL}")
-
-def store_token(client_id: str, token: str) -> bool:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "INSERT INTO active_tokens (client_id, token) VALUES (?, ?)",
-            (client_id, token)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # Tabla de Tokens: se guarda la huella SHA-256 (32 bytes) del JWT, no el token completo,
+        # para que el índice único sea pequeño y de tamaño fijo.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS client_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                client_id TEXT NOT NULL,
+                token_hash BLOB UNIQUE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Índices para el listado paginado (más recientes primero), con o sin filtro por cliente
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_client_tokens_created ON client_tokens (created_at, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_client_tokens_client ON client_tokens (client_id, created_at, id)")
+        _migrate_active_tokens(cursor)
+        # Época de revocación: se incrementa con cada revocación para invalidar los cachés de autenticación
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS auth_revocation_epoch (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                epoch INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO auth_revocation_epoch (id, epoch) VALUES (1, 0)")
+        # Identidad de esta base de datos: aleatoria al crearla, distingue sus change_seq de los de
+        # otra base (recreada o restaurada) en la sincronización incremental de /units/changes
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS db_identity (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                epoch TEXT NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO db_identity (id, epoch) VALUES (1, ?)", (secrets.token_hex(8),))
+        # Nueva tabla para los datos de la ISS
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS iss_data (
+                unit_id TEXT PRIMARY KEY,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                api_timestamp TEXT NOT NULL,
+                sensors_json TEXT,
+                last_updated_at_service TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                change_seq INTEGER
+            )
+        """)
+        # Para situar la marca de agua del líder al asumir el liderazgo (escrituras recientes)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_iss_data_updated ON iss_data (last_updated_at_service)")
+        # Secuencia de cambios para la sincronización incremental (/units/changes)
+        _migrate_change_seq(cursor)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_iss_data_change_seq ON iss_data (change_seq)")
+        # Concesiones (leases) con caducidad para la elección de líder entre workers
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS worker_leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        # Histórico de posiciones (solo inserción), agrupado físicamente por (unit_id, ts)
+        # para que las consultas por rango sean un recorrido del índice primario.
+        # resolution_seconds = 0 para muestras originales; > 0 para muestras compactadas.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS iss_data_history (
+                unit_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                sensors_json TEXT,
+                resolution_seconds INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (unit_id, ts)
+            ) WITHOUT ROWID
+        """)
+        # Marca de agua de la compactación: todo lo anterior a compacted_until ya está compactado
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS history_compaction (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                compacted_until REAL NOT NULL
+            )
+        """)
+        # Segmentos columnares del histórico ya sellados (archivos inmutables en HISTORY_SEGMENTS_DIR)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS history_segments (
+                start_ts REAL PRIMARY KEY,
+                end_ts REAL NOT NULL,
+                file_name TEXT NOT NULL,
+                units INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Geocercas (polígonos o círculos) y eventos de entrada/salida de las unidades
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS geofences (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                geometry_json TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS geofence_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fence_id INTEGER NOT NULL,
+                unit_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                ts REAL NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_geofence_events_fence ON geofence_events (fence_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_geofence_events_unit ON geofence_events (unit_id, id)")
+        conn.commit()
+    logger.info("Base de datos inicializada/actualizada en %s", settings.SQLITE_DATABASE_URL)
+
+def _migrate_active_tokens(cursor: sqlite3.Cursor) -> None:
+    """Migra la tabla antigua active_tokens (JWT en claro) a client_tokens (huella) y la elimina."""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'active_tokens'"
+    ).fetchone()
+    if not exists:
+        return
+    rows = cursor.execute("SELECT client_id, token, created_at FROM active_tokens ORDER BY created_at, id").fetchall()
+    cursor.executemany(
+        "INSERT OR IGNORE INTO client_tokens (client_id, token_hash, created_at) VALUES (?, ?, ?)",
+        [(row["client_id"], hash_token(row["token"]), row["created_at"]) for row in rows]
+    )
+    cursor.execute("DROP TABLE active_tokens")
+    logger.info("Migrados %d token(s) de active_tokens a client_tokens.", len(rows))
+
+def _migrate_change_seq(cursor: sqlite3.Cursor) -> None:
+    """Añade change_seq a una tabla iss_data anterior y numera sus filas por orden de escritura."""
+    columns = {row["name"] for row in cursor.execute("PRAGMA table_info(iss_data)")}
+    if "change_seq" in columns:
+        return
+    cursor.execute("ALTER TABLE iss_data ADD COLUMN change_seq INTEGER")
+    unit_ids = [row[0] for row in cursor.execute("SELECT unit_id FROM iss_data ORDER BY last_updated_at_service, unit_id")]
+    cursor.executemany(
+        "UPDATE iss_data SET change_seq = ? WHERE unit_id = ?",
+        [(seq, unit_id) for seq, unit_id in enumerate(unit_ids, start=1)]
+    )
+    logger.info("Añadida la secuencia de cambios a %d unidad(es) de iss_data.", len(unit_ids))
+
+def store_token(client_id: str, token_hash: bytes) -> bool:
+    with get_db_connection() as conn:
+        try:
+            conn.execute(
+                "INSERT INTO client_tokens (client_id, token_hash) VALUES (?, ?)",
+                (client_id, token_hash)
+            )
+            conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            logger.warning("El token para el cliente %s podría ya existir.", client_id)
+            conn.rollback()
+            return False
+
+def store_tokens_many(rows: List[Tuple[str, bytes]]) -> List[str]:
+    """
+    Inserta un lote de tokens (client_id, token_hash) en una única transacción.
+    Devuelve los client_id cuyo token se insertó; los que ya existían se omiten.
+    """
+    stored = []
+    with get_db_connection() as conn:
+        for client_id, token_hash in rows:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO client_tokens (client_id, token_hash) VALUES (?, ?)",
+                (client_id, token_hash)
+            )
+            if cursor.rowcount:
+                stored.append(client_id)
+        conn.commit()
+    return stored
+
+def revoke_tokens_many(token_hashes: List[bytes]) -> int:
+    """Revoca un lote de tokens por huella en una única transacción. Devuelve cuántos se eliminaron."""
+    if not token_hashes:
+        return 0
+    with get_db_connection() as conn:
+        cursor = conn.executemany(
+            "DELETE FROM client_tokens WHERE token_hash = ?", [(token_hash,) for token_hash in token_hashes]
         )
+        rows_deleted = cursor.rowcount
+        if rows_deleted:
+            # En la misma transacción, para que ningún worker vea el token borrado sin la nueva época
+            conn.execute("UPDATE auth_revocation_epoch SET epoch = epoch + 1 WHERE id = 1")
         conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        print(f"Error: El token para el cliente {client_id} podría ya existir.")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-
-def revoke_token(token: str) -> int:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM active_tokens WHERE token = ?", (token,))
-    conn.commit()
-    rows_deleted = cursor.rowcount
-    conn.close()
-    return rows_deleted
-
-def is_token_active(token: str) -> Optional[Dict[str, Any]]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT client_id, created_at FROM active_tokens WHERE token = ?", (token,))
-    token_data = cursor.fetchone()
-    conn.close()
+        return rows_deleted
+
+def revoke_token(token_hash: bytes) -> int:
+    return revoke_tokens_many([token_hash])
+
+def get_revocation_epoch() -> int:
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT epoch FROM auth_revocation_epoch WHERE id = 1").fetchone()
+    return row["epoch"] if row else 0
+
+def is_token_active(token_hash: bytes) -> Optional[Dict[str, Any]]:
+    with get_db_connection() as conn:
+        token_data = conn.execute(
+            "SELECT client_id, created_at FROM client_tokens WHERE token_hash = ?", (token_hash,)
+        ).fetchone()
     if token_data:
         return {"client_id": token_data["client_id"], "created_at": token_data["created_at"]}
     return None
 
-def get_active_tokens_for_admin() -> List[Dict[str, Any]]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT client_id, token, created_at FROM active_tokens ORDER BY created_at DESC")
-    tokens_raw = cursor.fetchall()
-    conn.close()
+def get_active_tokens_for_admin(
+    limit: int,
+    client_id: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    after: Optional[Tuple[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Página de tokens activos, de más reciente a más antiguo (created_at DESC, id DESC).
+    `after` es la clave (created_at, id) de la última fila de la página anterior.
+    Los límites de creación son texto 'YYYY-MM-DD HH:MM:SS' en UTC, como CURRENT_TIMESTAMP: [from, to).
+    """
+    conditions = []
+    params: List[Any] = []
+    if client_id is not None:
+        conditions.append("client_id = ?")
+        params.append(client_id)
+    if created_from is not None:
+        conditions.append("created_at >= ?")
+        params.append(created_from)
+    if created_to is not None:
+        conditions.append("created_at < ?")
+        params.append(created_to)
+    if after is not None:
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend(after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_db_connection() as conn:
+        tokens_raw = conn.execute(
+            f"SELECT id, client_id, token_hash, created_at FROM client_tokens {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit)
+        ).fetchall()
     return [
-        {"client_id": row["client_id"], "token": row["token"], "created_at": row["created_at"]}
+        {"id": row["id"], "client_id": row["client_id"], "token_hash": row["token_hash"].hex(), "created_at": row["created_at"]}
         for row in tokens_raw
     ]
 
 def upsert_iss_data(unit_id: str, latitude: float, longitude: float, api_timestamp: datetime.datetime, sensors: Dict[str, Any]):
-    conn = get_db_connection()
-    cursor = conn.cursor()
     api_timestamp_str = api_timestamp.isoformat()
     sensors_str = json.dumps(sensors)
-    cursor.execute("""
-        INSERT OR REPLACE INTO iss_data (unit_id, latitude, longitude, api_timestamp, sensors_json, last_updated_at_service)
-        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-    """, (unit_id, latitude, longitude, api_timestamp_str, sensors_str))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO iss_data (unit_id, latitude, longitude, api_timestamp, sensors_json, last_updated_at_service, change_seq)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM iss_data))
+        """, (unit_id, latitude, longitude, api_timestamp_str, sensors_str))
+        conn.commit()
+
+def upsert_iss_data_many(rows: List[Tuple[str, float, float, str, str]]) -> int:
+    """
+    Inserta/actualiza un lote de unidades (unit_id, latitude, longitude, api_timestamp_iso, sensors_json)
+    con executemany en una única transacción. Una fila existente solo se reemplaza si el nuevo
+    api_timestamp no es anterior (los timestamps ISO en UTC se ordenan como texto).
+    Devuelve las filas realmente escritas (sin las descartadas por esa condición).
+
+    Cada fila escrita recibe el siguiente change_seq (MAX + 1 por el índice). Las escrituras en
+    SQLite son serializadas, así que la secuencia es creciente y un lector nunca ve un cambio sin
+    ver también todos los anteriores.
+    """
+    if not rows:
+        return 0
+    with get_db_connection() as conn:
+        cursor = conn.executemany("""
+            INSERT INTO iss_data (unit_id, latitude, longitude, api_timestamp, sensors_json, last_updated_at_service, change_seq)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM iss_data))
+            ON CONFLICT(unit_id) DO UPDATE SET
+                latitude = excluded.latitude,
+                longitude = excluded.longitude,
+                api_timestamp = excluded.api_timestamp,
+                sensors_json = excluded.sensors_json,
+                last_updated_at_service = excluded.last_updated_at_service,
+                change_seq = excluded.change_seq
+            WHERE excluded.api_timestamp >= iss_data.api_timestamp
+        """, rows)
+        conn.commit()
+    return cursor.rowcount # Con executemany, la suma de las filas modificadas por cada sentencia
+
+def _row_to_unit_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    sensors = json.loads(row["sensors_json"]) if row["sensors_json"] else {}
+    return {
+        "unit_id": row["unit_id"],
+        "latitude": row["latitude"],
+        "longitude": row["longitude"],
+        "timestamp": row["api_timestamp"],
+        "sensors": sensors,
+    }
 
 def get_iss_data_by_id(unit_id: str) -> Optional[Dict[str, Any]]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data WHERE unit_id = ?", (unit_id,)) # Quité last_updated_at_service para simplificar
-    data_row = cursor.fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        data_row = conn.execute(
+            "SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data WHERE unit_id = ?",
+            (unit_id,)
+        ).fetchone() # Quité last_updated_at_service para simplificar
     if data_row:
-        sensors = json.loads(data_row["sensors_json"]) if data_row["sensors_json"] else {}
-        return {
-            "unit_id": data_row["unit_id"],
-            "latitude": data_row["latitude"],
-            "longitude": data_row["longitude"],
-            "timestamp": data_row["api_timestamp"],
-            "sensors": sensors,
-        }
+        return _row_to_unit_dict(data_row)
     return None
 
+def get_iss_data_by_ids(unit_ids: Sequence[str], chunk_size: int = 500) -> List[Dict[str, Any]]:
+    """
+    Unidades con esos unit_id (las que no existen no aparecen), sin orden definido. Una consulta
+    IN (...) sobre la clave primaria por cada bloque de chunk_size ids, todas en la misma conexión.
+    """
+    rows: List[Dict[str, Any]] = []
+    with get_db_connection() as conn:
+        for start in range(0, len(unit_ids), chunk_size):
+            chunk = unit_ids[start:start + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(_row_to_unit_dict(row) for row in conn.execute(
+                f"SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data WHERE unit_id IN ({placeholders})",
+                chunk,
+            ))
+    return rows
+
 def get_all_iss_data_from_db() -> List[Dict[str, Any]]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data")
-    data_rows = cursor.fetchall()
-    conn.close()
-    results = []
-    for row in data_rows:
-        sensors = json.loads(row["sensors_json"]) if row["sensors_json"] else {}
-        results.append({
+    with get_db_connection() as conn:
+        # Se recorre el cursor directamente, sin la lista intermedia de fetchall()
+        return [
+            _row_to_unit_dict(row) for row in conn.execute(
+                "SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data"
+            )
+        ]
+
+def get_iss_data_page(after: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """
+    Página de unidades ordenadas por unit_id, empezando después de `after` (paginación por clave:
+    cada página es un recorrido acotado de la clave primaria, sin OFFSET).
+    """
+    with get_db_connection() as conn:
+        if after is None:
+            cursor = conn.execute(
+                "SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data ORDER BY unit_id LIMIT ?",
+                (limit,)
+            )
+        else:
+            cursor = conn.execute(
+                "SELECT unit_id, latitude, longitude, api_timestamp, sensors_json FROM iss_data WHERE unit_id > ? ORDER BY unit_id LIMIT ?",
+                (after, limit)
+            )
+        return [_row_to_unit_dict(row) for row in cursor]
+
+
+def get_iss_data_changes(since: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Unidades con change_seq > since en orden de change_seq (como máximo `limit`, con su change_seq)
+    y el change_seq más alto de la tabla en ese momento (0 si está vacía). Ambas consultas usan
+    el índice de change_seq.
+    """
+    with get_db_connection() as conn:
+        high_water = conn.execute("SELECT COALESCE(MAX(change_seq), 0) FROM iss_data").fetchone()[0]
+        rows = conn.execute(
+            "SELECT unit_id, latitude, longitude, api_timestamp, sensors_json, change_seq "
+            "FROM iss_data WHERE change_seq > ? ORDER BY change_seq LIMIT ?",
+            (since, limit)
+        ).fetchall()
+    return [{**_row_to_unit_dict(row), "change_seq": row["change_seq"]} for row in rows], high_water
+
+def get_db_epoch() -> str:
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT epoch FROM db_identity WHERE id = 1").fetchone()
+    return row["epoch"] if row else ""
+
+def get_change_seq_before(updated_since: str) -> int:
+    """
+    change_seq anterior a la primera fila escrita en o después de `updated_since` ('YYYY-MM-DD HH:MM:SS'
+    en UTC, como CURRENT_TIMESTAMP); si no hay ninguna, el change_seq más alto. Leer los cambios
+    posteriores a este valor devuelve todo lo escrito desde ese instante.
+    """
+    with get_db_connection() as conn:
+        first = conn.execute(
+            "SELECT MIN(change_seq) FROM iss_data WHERE last_updated_at_service >= ?", (updated_since,)
+        ).fetchone()[0]
+        if first is not None:
+            return first - 1
+        return conn.execute("SELECT COALESCE(MAX(change_seq), 0) FROM iss_data").fetchone()[0]
+
+def try_acquire_lease(name: str, holder: str, now: float, expires_at: float) -> bool:
+    """
+    Adquiere o renueva la concesión `name` para `holder` si está libre, caducada o ya es suya.
+    Es una única sentencia, así que dos procesos no pueden obtenerla a la vez.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            INSERT INTO worker_leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE worker_leases.holder = excluded.holder OR worker_leases.expires_at < ?
+        """, (name, holder, expires_at, now))
+        conn.commit()
+        return cursor.rowcount > 0
+
+def set_lease(name: str, holder: str, expires_at: float) -> None:
+    """Asigna la concesión `name` a `holder` sin condiciones (para anunciar algo que ya ocurrió)."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO worker_leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+        """, (name, holder, expires_at))
+        conn.commit()
+
+def release_lease(name: str, holder: str) -> bool:
+    with get_db_connection() as conn:
+        cursor = conn.execute("DELETE FROM worker_leases WHERE name = ? AND holder = ?", (name, holder))
+        conn.commit()
+        return cursor.rowcount > 0
+
+def get_lease(name: str) -> Optional[Dict[str, Any]]:
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT holder, expires_at FROM worker_leases WHERE name = ?", (name,)).fetchone()
+    return {"holder": row["holder"], "expires_at": row["expires_at"]} if row else None
+
+
+def insert_history_batch(rows: List[Tuple[str, float, float, float, str]]) -> int:
+    """
+    Inserta un lote de puntos históricos (unit_id, ts, latitude, longitude, sensors_json)
+    con executemany en una única transacción. Los duplicados (misma unidad y ts) se ignoran.
+    """
+    if not rows:
+        return 0
+    with get_db_connection() as conn:
+        cursor = conn.executemany(
+            "INSERT OR IGNORE INTO iss_data_history (unit_id, ts, latitude, longitude, sensors_json) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.commit()
+        return cursor.rowcount
+
+def get_history(unit_id: str, from_ts: float, to_ts: float, step_seconds: Optional[int], limit: int) -> List[Dict[str, Any]]:
+    """
+    Puntos históricos de una unidad en [from_ts, to_ts). Con step_seconds se reduce en el servidor
+    a un punto por intervalo (el primero de cada intervalo).
+    """
+    with get_db_connection() as conn:
+        if step_seconds:
+            # SQLite devuelve las columnas sin agregar de la fila que contiene el MIN(ts)
+            data_rows = conn.execute("""
+                SELECT unit_id, MIN(ts) AS ts, latitude, longitude, sensors_json
+                FROM iss_data_history
+                WHERE unit_id = ? AND ts >= ? AND ts < ?
+                GROUP BY CAST(ts / ? AS INTEGER)
+                ORDER BY ts
+                LIMIT ?
+            """, (unit_id, from_ts, to_ts, step_seconds, limit)).fetchall()
+        else:
+            data_rows = conn.execute("""
+                SELECT unit_id, ts, latitude, longitude, sensors_json
+                FROM iss_data_history
+                WHERE unit_id = ? AND ts >= ? AND ts < ?
+                ORDER BY ts
+                LIMIT ?
+            """, (unit_id, from_ts, to_ts, limit)).fetchall()
+    return [
+        {
             "unit_id": row["unit_id"],
             "latitude": row["latitude"],
             "longitude": row["longitude"],
-            "timestamp": row["api_timestamp"],
-            "sensors": sensors
-        })
-    return results
\ No newline at end of file
+            "timestamp": datetime.datetime.fromtimestamp(row["ts"], tz=datetime.timezone.utc).isoformat(),
+            "sensors": json.loads(row["sensors_json"]) if row["sensors_json"] else {},
+        }
+        for row in data_rows
+    ]
+
+def get_compacted_until() -> Optional[float]:
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT compacted_until FROM history_compaction WHERE id = 1").fetchone()
+    return row["compacted_until"] if row else None
+
+def compact_history(cutoff_ts: float, bucket_seconds: int, delete_before_ts: Optional[float]) -> Dict[str, int]:
+    """
+    Compacta el histórico anterior a cutoff_ts conservando un punto por intervalo de bucket_seconds
+    y borra todo lo anterior a delete_before_ts (si se indica). Cada unidad se procesa en su propia
+    transacción para no bloquear al escritor durante mucho tiempo.
+    Solo se recorre [compacted_until, cutoff_ts): la marca de agua se guarda al terminar, así que
+    cada pasada trabaja sobre lo nuevo y no sobre todo el histórico. Los puntos que lleguen con un
+    ts anterior a la marca (rellenos tardíos) se quedan con resolución original hasta que expiren.
+    """
+    # Alineamos el corte al intervalo para no partir un intervalo entre compactado y sin compactar
+    cutoff_ts = (int(cutoff_ts) // bucket_seconds) * bucket_seconds
+    start_ts = get_compacted_until()
+    if start_ts is None:
+        start_ts = float("-inf") # Primera pasada: todo lo anterior al corte
+    compacted = 0
+    expired = 0
+    with get_db_connection() as conn:
+        unit_ids = [row["unit_id"] for row in conn.execute("SELECT DISTINCT unit_id FROM iss_data_history")]
+        for unit_id in unit_ids:
+            if delete_before_ts is not None:
+                expired += conn.execute(
+                    "DELETE FROM iss_data_history WHERE unit_id = ? AND ts < ?", (unit_id, delete_before_ts)
+                ).rowcount
+            if start_ts < cutoff_ts:
+                compacted += conn.execute("""
+                    DELETE FROM iss_data_history
+                    WHERE unit_id = ? AND ts >= ? AND ts < ? AND resolution_seconds < ?
+                      AND ts NOT IN (
+                          SELECT MIN(ts) FROM iss_data_history
+                          WHERE unit_id = ? AND ts >= ? AND ts < ?
+                          GROUP BY CAST(ts / ? AS INTEGER)
+                      )
+                """, (unit_id, start_ts, cutoff_ts, bucket_seconds, unit_id, start_ts, cutoff_ts, bucket_seconds)).rowcount
+                conn.execute(
+                    "UPDATE iss_data_history SET resolution_seconds = ? "
+                    "WHERE unit_id = ? AND ts >= ? AND ts < ? AND resolution_seconds < ?",
+                    (bucket_seconds, unit_id, start_ts, cutoff_ts, bucket_seconds)
+                )
+            conn.commit()
+        if start_ts < cutoff_ts:
+            # Se avanza al final: si la pasada se interrumpe, la siguiente repite el tramo (es idempotente)
+            conn.execute(
+                "INSERT INTO history_compaction (id, compacted_until) VALUES (1, ?) "
+                "ON CONFLICT(id) DO UPDATE SET compacted_until = excluded.compacted_until",
+                (cutoff_ts,)
+            )
+            conn.commit()
+    return {"compacted": compacted, "expired": expired}
+
+def get_next_history_ts(after_ts: Optional[float]) -> Optional[float]:
+    """Primer ts del histórico >= after_ts, buscado unidad a unidad sobre el índice primario."""
+    with get_db_connection() as conn:
+        row = conn.execute("""
+            SELECT MIN((SELECT MIN(h.ts) FROM iss_data_history h WHERE h.unit_id = u.unit_id AND h.ts >= ?))
+            FROM iss_data u
+        """, (after_ts if after_ts is not None else float("-inf"),)).fetchone()
+    return row[0]
+
+def get_history_columns(start_ts: float, end_ts: float, unit_ids: Optional[List[str]] = None) -> ColumnBuilder:
+    """Puntos en [start_ts, end_ts) de las unidades indicadas (o de todas), en columnas ordenadas por (unit_id, ts)."""
+    builder = ColumnBuilder()
+    with get_db_connection() as conn:
+        if unit_ids is None:
+            unit_ids = [row[0] for row in conn.execute("SELECT unit_id FROM iss_data ORDER BY unit_id")]
+        for unit_id in sorted(unit_ids):
+            builder.add_unit(unit_id, conn.execute(
+                "SELECT ts, latitude, longitude, sensors_json FROM iss_data_history "
+                "WHERE unit_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (unit_id, start_ts, end_ts)
+            ))
+    return builder
+
+def insert_history_segment(start_ts: float, end_ts: float, file_name: str, units: int, row_count: int, size_bytes: int) -> None:
+    with get_db_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO history_segments (start_ts, end_ts, file_name, units, row_count, size_bytes) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (start_ts, end_ts, file_name, units, row_count, size_bytes)
+        )
+        conn.commit()
+
+def get_history_segments(from_ts: Optional[float] = None, to_ts: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Segmentos que se solapan con [from_ts, to_ts), por orden de tiempo."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT start_ts, end_ts, file_name, units, row_count, size_bytes FROM history_segments "
+            "WHERE end_ts > ? AND start_ts < ? ORDER BY start_ts",
+            (from_ts if from_ts is not None else float("-inf"), to_ts if to_ts is not None else float("inf"))
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def get_last_history_segment_end() -> Optional[float]:
+    with get_db_connection() as conn:
+        return conn.execute("SELECT MAX(end_ts) FROM history_segments").fetchone()[0]
+
+def delete_history_segments_before(before_ts: float) -> List[str]:
+    """Borra del catálogo los segmentos que terminan antes de before_ts y devuelve sus archivos."""
+    with get_db_connection() as conn:
+        file_names = [row[0] for row in conn.execute(
+            "SELECT file_name FROM history_segments WHERE end_ts <= ?", (before_ts,)
+        )]
+        conn.execute("DELETE FROM history_segments WHERE end_ts <= ?", (before_ts,))
+        conn.commit()
+    return file_names
+
+def create_geofences(fences: List[Tuple[str, str, str]]) -> List[int]:
+    """Inserta geocercas (name, kind, geometry_json) en una transacción y devuelve sus id en orden."""
+    with get_db_connection() as conn:
+        ids = [
+            conn.execute(
+                "INSERT INTO geofences (name, kind, geometry_json) VALUES (?, ?, ?)", fence
+            ).lastrowid
+            for fence in fences
+        ]
+        conn.commit()
+    return ids
+
+def delete_geofence(fence_id: int) -> bool:
+    with get_db_connection() as conn:
+        deleted = conn.execute("DELETE FROM geofences WHERE id = ?", (fence_id,)).rowcount
+        conn.commit()
+    return deleted > 0
+
+def get_geofences(after_id: Optional[int] = None, limit: int = -1) -> List[Dict[str, Any]]:
+    """Geocercas ordenadas por id, empezando después de `after_id` (limit = -1: todas)."""
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, name, kind, geometry_json, created_at FROM geofences WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id or 0, limit)
+        ).fetchall()
+    return [
+        {"id": row["id"], "name": row["name"], "kind": row["kind"],
+         "geometry": json.loads(row["geometry_json"]), "created_at": row["created_at"]}
+        for row in rows
+    ]
+
+def get_geofences_revision() -> Tuple[int, int]:
+    """(número de geocercas, id máximo): cambia con cada alta o baja (los id no se reutilizan)."""
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM geofences").fetchone()
+    return row[0], row[1]
+
+def insert_geofence_events(rows: List[Tuple[int, str, str, float, float, float]]) -> None:
+    """Inserta eventos (fence_id, unit_id, event, ts, latitude, longitude) en una transacción."""
+    with get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO geofence_events (fence_id, unit_id, event, ts, latitude, longitude) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.commit()
+
+def get_geofence_events(
+    after_id: int,
+    limit: int,
+    fence_id: Optional[int] = None,
+    unit_id: Optional[str] = None,
+    since_ts: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Eventos con id > after_id en orden de id (paginación por clave), con filtros opcionales."""
+    conditions = ["id > ?"]
+    params: List[Any] = [after_id]
+    if fence_id is not None:
+        conditions.append("fence_id = ?")
+        params.append(fence_id)
+    if unit_id is not None:
+        conditions.append("unit_id = ?")
+        params.append(unit_id)
+    if since_ts is not None:
+        conditions.append("ts >= ?")
+        params.append(since_ts)
+    with get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, fence_id, unit_id, event, ts, latitude, longitude FROM geofence_events "
+            f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+    return [
+        {
+            "id": row["id"],
+            "fence_id": row["fence_id"],
+            "unit_id": row["unit_id"],
+            "event": row["event"],
+            "timestamp": datetime.datetime.fromtimestamp(row["ts"], tz=datetime.timezone.utc).isoformat(),
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+        }
+        for row in rows
+    ]
+
+def get_last_geofence_event_id() -> int:
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM geofence_events").fetchone()[0]
@@ -1,18 +1,118 @@
 # ws_prueba/app/main.py
 from fastapi import FastAPI, Request # Request en mayúscula aquí
+from contextlib import asynccontextmanager
 import asyncio
 import datetime # Para el año en el footer
+import functools
+import logging
+import os
 
 from app.core.config import settings
+from app.core.logging_config import configure_logging
+from app.api.admission import AdmissionControlMiddleware
+from app.api.health import router as health_router
 from app.api.v1.router import api_router_v1
-from app.db.session import init_db
+from app.db.async_session import init_db
+from app.db.pool import close_pool
 from app.services.data_poller import continuous_data_poller
+from app.services.unit_store import warm_cache_from_db
+from app.services.history import history_writer, history_flush_loop, history_compaction_loop
+from app.services.ingest_buffer import ingest_buffer
+from app.services.admission import admission_controller
+from app.services.coordination import build_worker_coordinator
+from app.services.geofence import GeofenceEventTail, geofence_broadcaster, geofence_engine
+from app.services.segment_store import segment_roll_loop
+from app.services.readiness import DATABASE, INITIAL_DATA, readiness
+from app.services.snapshot import SnapshotFollower, SnapshotPublisher, snapshot_path
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 
-# ÚNICA Y CORRECTA INICIALIZACIÓN DE TEMPLATES
-# Debe estar antes de la definición de 'app = FastAPI(...)'
-templates = Jinja2Templates(directory="app/templates")
+configure_logging()
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+@functools.lru_cache(maxsize=None)
+def get_templates():
+    """Las plantillas (y Jinja2) se cargan con la primera petición a la página de inicio, no al importar."""
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory=TEMPLATES_DIR)
+
+def _background_jobs() -> list:
+    # Tareas de cada worker: sus propios búferes de escritura
+    background_jobs = [history_flush_loop, ingest_buffer.run]
+    # Tareas con efectos externos: solo en el worker líder (o en cada proceso, sin coordinación)
+    leader_jobs = [continuous_data_poller, history_compaction_loop]
+    if settings.HISTORY_SEGMENTS_ENABLED:
+        leader_jobs.append(segment_roll_loop)
+    if settings.GEOFENCE_ENABLED:
+        # El motor evalúa las posiciones que pasan por el líder; cada worker difunde los eventos
+        leader_jobs.append(geofence_engine.run)
+        background_jobs.append(GeofenceEventTail(geofence_broadcaster).run)
+    if settings.WORKER_COORDINATION_ENABLED:
+        path = snapshot_path()
+
+        async def snapshot_publisher() -> None:
+            # Un publicador nuevo en cada elección, con su marca de agua desde ese momento
+            await SnapshotPublisher(path).run()
+
+        coordinator = build_worker_coordinator(
+            leader_jobs=leader_jobs + [snapshot_publisher],
+            follower_jobs=[SnapshotFollower(path).run],
+        )
+        background_jobs.append(coordinator.run)
+    else:
+        background_jobs.extend(leader_jobs)
+    if settings.ADMISSION_ENABLED:
+        background_jobs.append(admission_controller.monitor_loop_lag)
+    return background_jobs
+
+async def _startup(app: FastAPI) -> None:
+    logger.info("Iniciando aplicación...")
+    readiness.start()
+    await init_db()
+    readiness.mark(DATABASE)
+    loaded_units = await warm_cache_from_db()
+    logger.info("Caché de unidades precargado con %d unidades desde la BD.", loaded_units)
+    if loaded_units:
+        readiness.mark(INITIAL_DATA)
+    logger.info("Programando las tareas en segundo plano (sondeo de datos, búferes)...")
+    # Guardamos las referencias para poder cancelarlas al apagar
+    app.state.background_tasks = [
+        asyncio.create_task(job(), name=getattr(job, "__qualname__", repr(job))) for job in _background_jobs()
+    ]
+    logger.info("Aplicación iniciada; /readyz indicará cuándo hay datos iniciales.")
+
+async def _shutdown(app: FastAPI) -> None:
+    # Deja de anunciarse como listo antes de parar nada
+    readiness.shutting_down = True
+    tasks = getattr(app.state, "background_tasks", [])
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=settings.SHUTDOWN_TASK_TIMEOUT_SECONDS)
+        for task in pending:
+            logger.warning("La tarea '%s' no terminó tras cancelarla.", task.get_name())
+    app.state.background_tasks = []
+    logger.info("Volcando la ingesta y el histórico pendientes...")
+    try:
+        # Cada volcado por separado: el fallo de uno no impide los siguientes ni cerrar el pool
+        for name, flush in (("ingesta", ingest_buffer.drain), ("histórico", history_writer.flush),
+                            ("eventos de geocercas", geofence_engine.flush)):
+            try:
+                await flush()
+            except Exception:
+                logger.exception("Error al volcar %s durante el apagado.", name)
+    finally:
+        logger.info("Cerrando conexiones de la base de datos...")
+        close_pool()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await _startup(app)
+    try:
+        yield
+    finally:
+        await _shutdown(app)
 
 app = FastAPI(
     title=settings.APP_TITLE,
@@ -20,27 +120,28 @@ app = FastAPI(
     version="0.1.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
-    redoc_url=f"{settings.API_V1_STR}/redoc"
+    redoc_url=f"{settings.API_V1_STR}/redoc",
+    lifespan=lifespan,
 )
 
-@app.on_event("startup")
-async def startup_event():
-    print("Iniciando aplicación...")
-    init_db()
-    print("Programando la tarea de sondeo de datos en segundo plano...")
-    asyncio.create_task(continuous_data_poller())
-    print("Aplicación iniciada y lista.")
-
+app.include_router(health_router, tags=["Health"])
 app.include_router(api_router_v1, prefix=settings.API_V1_STR)
 
-# ELIMINA CUALQUIER OTRA LÍNEA 'templates = Jinja2Templates(...)' QUE PUDIERA ESTAR AQUÍ ABAJO
+if settings.ADMISSION_ENABLED:
+    # Se añade antes que el de métricas para que este lo envuelva y mida también los 503
+    app.add_middleware(AdmissionControlMiddleware)
+
+if settings.METRICS_ENABLED:
+    from app.api.metrics import PrometheusMiddleware, router as metrics_router
+    app.add_middleware(PrometheusMiddleware)
+    app.include_router(metrics_router, tags=["Metrics"])
 
 @app.get("/", response_class=HTMLResponse, summary="Página de Inicio", tags=["Root"])
 async def root(request: Request): # 'request' como nombre del parámetro
     """
     Muestra la página de inicio HTML con información sobre la API.
     """
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         "index.html",
         {
             "request": request, # Pasa el objeto request
@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional, Tuple
+import datetime
+
+from app.core.config import settings
+
+# Vértice [longitud, latitud], en el orden de GeoJSON
+Vertex = Tuple[float, float]
+
+class GeofenceCircle(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    radius_km: float = Field(..., gt=0, le=20000)
+
+class GeofenceCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200, example="Zona de aterrizaje")
+    # Anillo exterior [[lon, lat], ...]; no hace falta repetir el primer vértice al final
+    polygon: Optional[List[Vertex]] = Field(default=None, min_length=3, max_length=settings.GEOFENCE_MAX_VERTICES + 1)
+    circle: Optional[GeofenceCircle] = None
+
+    @model_validator(mode="after")
+    def _check_geometry(self):
+        if (self.polygon is None) == (self.circle is None):
+            raise ValueError("Indique exactamente una geometría: 'polygon' o 'circle'.")
+        if self.polygon is not None:
+            if self.polygon[0] == self.polygon[-1]:
+                self.polygon = self.polygon[:-1]
+            if len(self.polygon) < 3:
+                raise ValueError("El polígono necesita al menos 3 vértices distintos.")
+            for lon, lat in self.polygon:
+                if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+                    raise ValueError("Vértice fuera de rango: se espera [longitud, latitud].")
+            # Las aristas siguen el camino más corto en longitud (pueden cruzar el antimeridiano)
+            lon = self.polygon[0][0]
+            unwrapped = [lon]
+            for next_lon, _ in self.polygon[1:]:
+                lon += (next_lon - lon + 180) % 360 - 180
+                unwrapped.append(lon)
+            if max(unwrapped) - min(unwrapped) >= 180:
+                raise ValueError("El polígono no puede abarcar 180° de longitud o más (use varios polígonos).")
+        return self
+
+class Geofence(BaseModel):
+    id: int
+    name: str
+    kind: Literal["polygon", "circle"]
+    geometry: dict # {"coordinates": [[lon, lat], ...]} o {"latitude", "longitude", "radius_km"}
+    created_at: datetime.datetime
+
+class BulkGeofenceCreateInput(BaseModel):
+    geofences: List[GeofenceCreate] = Field(..., min_length=1, max_length=settings.GEOFENCE_BULK_MAX_ITEMS)
+
+class BulkGeofenceCreateResult(BaseModel):
+    ids: List[int]
+
+class GeofenceEvent(BaseModel):
+    id: int
+    fence_id: int
+    unit_id: str
+    event: Literal["enter", "exit"]
+    timestamp: datetime.datetime # Timestamp de la muestra que produjo el cambio
+    latitude: float
+    longitude: float
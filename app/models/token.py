@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, List, Optional
 import datetime
 
+from app.core.config import settings
+
+TokenHashHex = Annotated[str, Field(pattern=r"^[0-9a-f]{64}$")] # Huella SHA-256 en hexadecimal
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -19,5 +23,21 @@ class TokenRevokeInput(BaseModel):
 
 class ActiveTokenAdminView(BaseModel):
     client_id: str
-    token: str
-    created_at: datetime.datetime
\ No newline at end of file
+    # Solo se almacena la huella del token; el JWT completo se entrega únicamente al generarlo
+    token_hash: str
+    created_at: datetime.datetime
+
+class BulkTokenGenerateInput(BaseModel):
+    client_ids: List[str] = Field(..., min_length=1, max_length=settings.TOKENS_BULK_MAX_ITEMS)
+
+class BulkTokenGenerateResult(BaseModel):
+    tokens: List[Token]
+    existing: List[str] = Field(default_factory=list, description="client_id que ya tenían un token activo")
+
+class BulkTokenRevokeInput(BaseModel):
+    tokens: List[str] = Field(default_factory=list, max_length=settings.TOKENS_BULK_MAX_ITEMS)
+    token_hashes: List[TokenHashHex] = Field(default_factory=list, max_length=settings.TOKENS_BULK_MAX_ITEMS)
+
+class BulkTokenRevokeResult(BaseModel):
+    revoked: int
+    not_found: int
@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Any
+from typing import Dict, Any, List, Literal, Optional
 import datetime
 
+from app.core.config import settings
+
 class UnitData(BaseModel):
     unit_id: str = Field(..., example="ISS-001")
     latitude: float
@@ -9,6 +11,12 @@ class UnitData(BaseModel):
     timestamp: datetime.datetime # Almacenaremos como objeto datetime
     sensors: Dict[str, Any] = Field(default_factory=dict)
 
+class UnitDataInput(UnitData): # Lo que se acepta al ingerir (API y fuentes externas)
+    # Rangos geográficos válidos; NaN/inf se rechazan (romperían el índice espacial y el JSON).
+    # Solo en la entrada: las filas ya guardadas fuera de rango deben poder seguir leyéndose.
+    latitude: float = Field(..., ge=-90, le=90, allow_inf_nan=False)
+    longitude: float = Field(..., ge=-180, le=180, allow_inf_nan=False)
+
 class UnitDataPublic(BaseModel): # Lo que expondremos en la API
     unit_id: str
     latitude: float
@@ -20,4 +28,34 @@ class UnitDataPublic(BaseModel): # Lo que expondremos en la API
     # Configuración para permitir alias en la serialización
     model_config = {
         "populate_by_name": True # Permite usar 'timestamp' para el campo 'timestamp_iso' durante la creación del modelo
-    }
\ No newline at end of file
+    }
+
+class UnitBatchInput(BaseModel):
+    unit_ids: List[str] = Field(..., min_length=1, max_length=settings.UNITS_BATCH_MAX_IDS)
+
+class UnitBatchItem(BaseModel):
+    unit_id: str
+    found: bool
+    data: Optional[UnitDataPublic] = None # None si la unidad no existe
+
+class UnitBatchResult(BaseModel):
+    results: List[UnitBatchItem] # Una entrada por unit_id pedido, en el mismo orden
+    missing: List[str] # unit_id pedidos que no existen (sin repetidos)
+
+class UnitChanges(BaseModel):
+    since: int
+    epoch: str # Identidad de la base de datos; se devuelve en la siguiente consulta junto con high_water
+    high_water: int # Valor de `since` para la siguiente consulta
+    resync_required: bool # True: recargar el listado completo y seguir desde high_water
+    units: List[UnitDataPublic] # Unidades cambiadas después de `since`, de la más antigua a la más reciente
+
+class PositionEstimate(BaseModel):
+    unit_id: str
+    timestamp: datetime.datetime # Instante pedido
+    latitude: Optional[float] # None si no se puede estimar (sin muestras cercanas)
+    longitude: Optional[float]
+    method: Literal["sample", "interpolated", "extrapolated", "unavailable"]
+    nearest_sample_seconds: Optional[float] = None
+
+class PositionBatchInput(BaseModel):
+    timestamps: List[datetime.datetime] = Field(..., min_length=1, max_length=settings.POSITION_BATCH_MAX_TIMESTAMPS)
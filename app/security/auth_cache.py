@@ -0,0 +1,107 @@
+# ws_espacial/app/security/auth_cache.py
+"""
+Caché en proceso de decisiones de autenticación.
+Un token ya validado (firma JWT + presencia en client_tokens) se recuerda durante un TTL,
+indexado por su hash, con expulsión LRU acotada. Las revocaciones se propagan:
+  - en este worker, invalidando la entrada en el momento de la revocación;
+  - entre workers, mediante la "época de revocación" guardada en la BD, que se consulta
+    como máximo una vez cada AUTH_REVOCATION_CHECK_SECONDS y vacía el caché si cambió.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.db import async_session
+from app.models.token import TokenPayload
+
+
+class AuthCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, tuple[TokenPayload, float]]" = OrderedDict()
+        self._epoch: Optional[int] = None # Última época de revocación observada en la BD
+        self._generation = 0 # Cambia con cada invalidación; evita guardar validaciones en curso obsoletas
+        self._next_epoch_check = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, token_key: bytes) -> Optional[TokenPayload]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token_key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[token_key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(token_key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, token_key: bytes, payload: TokenPayload, generation: int) -> None:
+        """Guarda una validación correcta, salvo que hubo una invalidación mientras se validaba."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[token_key] = (payload, time.monotonic() + self._ttl_seconds)
+            self._entries.move_to_end(token_key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token_key: bytes) -> None:
+        with self._lock:
+            self._entries.pop(token_key, None)
+            self._generation += 1
+            # Forzamos a releer la época: el resto de workers se enterará por la misma vía
+            self._next_epoch_check = 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def epoch_check_due(self) -> bool:
+        """True (y reserva la comprobación) si toca consultar la época de revocación en la BD."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_epoch_check:
+                return False
+            self._next_epoch_check = now + settings.AUTH_REVOCATION_CHECK_SECONDS
+            return True
+
+    def observe_epoch(self, epoch: int) -> None:
+        """Si la época cambió (revocación en cualquier worker), se descarta todo el caché."""
+        with self._lock:
+            if self._epoch is not None and epoch != self._epoch:
+                self._entries.clear()
+                self._generation += 1
+            self._epoch = epoch
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "revocation_epoch": self._epoch,
+            }
+
+
+auth_cache = AuthCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+
+async def sync_revocation_epoch() -> None:
+    """Consulta la época de revocación si corresponde (barato: una fila, como máximo una vez por intervalo)."""
+    if auth_cache.epoch_check_due():
+        auth_cache.observe_epoch(await async_session.get_revocation_epoch())
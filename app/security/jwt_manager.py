@@ -1,10 +1,14 @@
 import datetime
+import hashlib
+import logging
 from typing import Optional
 
 from jose import JWTError, jwt
 from app.core.config import settings # Importamos nuestra configuración (SECRET_KEY, ALGORITHM)
 from app.models.token import TokenPayload # Modelo para el payload del token
 
+logger = logging.getLogger(__name__)
+
 def create_access_token(client_id: str) -> str:
     """
     Genera un nuevo JWT para un client_id específico.
@@ -36,5 +40,11 @@ def verify_token_payload(token: str) -> Optional[TokenPayload]:
         # Lo pasamos a TokenPayload para validación de la estructura esperada (ej. 'sub' existe).
         return TokenPayload(**payload)
     except JWTError as e:
-        print(f"Error de JWT al decodificar: {e}") # Loguear el error puede ser útil
-        return None
\ No newline at end of file
+        logger.info("Error de JWT al decodificar: %s", e)
+        return None
+
+def hash_token(token: str) -> bytes:
+    """
+    Huella de tamaño fijo (SHA-256) de un token, para indexarlo sin guardar el JWT completo.
+    """
+    return hashlib.sha256(token.encode("utf-8")).digest()
\ No newline at end of file
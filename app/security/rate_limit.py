@@ -0,0 +1,74 @@
+# ws_espacial/app/security/rate_limit.py
+"""
+Limitación de tasa en proceso con cubos de fichas (token bucket), uno por cliente.
+
+Cada clave (client_id del token, o IP en las rutas públicas) tiene un cubo de `burst` fichas que
+se rellena a `rate` fichas por segundo; cada petición consume una. Si no quedan fichas se responde
+429 con Retry-After igual al tiempo que falta para la siguiente ficha. Los cubos sin uso reciente
+se descartan por LRU al superar max_keys (un cubo descartado vuelve lleno, lo que es inocuo).
+Los límites son por worker: con N workers, el límite efectivo de un cliente es hasta N veces mayor.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int, overrides: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._max_keys = max_keys
+        self._overrides = overrides or {}
+        self._buckets: "OrderedDict[str, list[float]]" = OrderedDict() # clave -> [fichas, último relleno]
+        self.rejected = 0
+
+    def _limits(self, key: str) -> Tuple[float, float]:
+        rate = self._overrides.get(key)
+        if rate is None:
+            return self.rate, self.burst
+        # La ráfaga de un cliente con límite propio mantiene la proporción de la ráfaga por defecto
+        return rate, max(1.0, rate * self.burst / self.rate if self.rate > 0 else rate)
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Consume una ficha. Devuelve 0 si la petición se admite o los segundos hasta poder reintentar."""
+        rate, burst = self._limits(key)
+        if rate <= 0:
+            return 0.0 # Sin límite
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            if len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        self.rejected += 1
+        return (1.0 - bucket[0]) / rate
+
+    def stats(self) -> Dict[str, float]:
+        return {"keys": len(self._buckets), "rate": self.rate, "burst": self.burst, "rejected": self.rejected}
+
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+client_rate_limiter = TokenBucketLimiter(
+    rate=settings.RATE_LIMIT_CLIENT_PER_SECOND,
+    burst=settings.RATE_LIMIT_CLIENT_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    overrides=settings.RATE_LIMIT_CLIENT_OVERRIDES,
+)
+ip_rate_limiter = TokenBucketLimiter(
+    rate=settings.RATE_LIMIT_IP_PER_SECOND,
+    burst=settings.RATE_LIMIT_IP_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+)
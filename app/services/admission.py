@@ -0,0 +1,49 @@
+# ws_espacial/app/services/admission.py
+"""
+Control de admisión: detecta la sobrecarga del proceso para rechazar peticiones nuevas con 503
+(y Retry-After) en lugar de encolarlas y degradar la latencia de todas.
+
+Señales:
+  - peticiones HTTP en curso (hasta que empiezan a responder: los streams largos no cuentan);
+  - operaciones pendientes en el executor de BD;
+  - retraso del event loop, medido por una tarea que duerme ADMISSION_LAG_SAMPLE_SECONDS y
+    compara con el tiempo realmente transcurrido.
+"""
+import asyncio
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.db.pool import db_pending
+
+
+class AdmissionController:
+    def __init__(self):
+        self.in_flight = 0
+        self.loop_lag_seconds = 0.0
+
+    def overload_reason(self) -> Optional[str]:
+        """Motivo de rechazo, o None si se puede admitir la petición."""
+        if self.in_flight >= settings.ADMISSION_MAX_IN_FLIGHT:
+            return "in_flight"
+        if db_pending() >= settings.ADMISSION_MAX_DB_QUEUE:
+            return "db_queue"
+        if self.loop_lag_seconds >= settings.ADMISSION_MAX_LOOP_LAG_SECONDS:
+            return "loop_lag"
+        return None
+
+    async def monitor_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = settings.ADMISSION_LAG_SAMPLE_SECONDS
+        try:
+            while True:
+                start = loop.time()
+                await asyncio.sleep(interval)
+                self.loop_lag_seconds = max(0.0, loop.time() - start - interval)
+        finally:
+            self.loop_lag_seconds = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"in_flight": self.in_flight, "db_pending": db_pending(), "loop_lag_seconds": self.loop_lag_seconds}
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,165 @@
+# ws_espacial/app/services/broadcaster.py
+"""
+Difusión (fan-out) de actualizaciones de unidades a clientes WebSocket / SSE.
+Cada actualización se serializa una sola vez y se encola en la cola acotada de cada suscriptor;
+si un cliente no consume a tiempo y su cola se llena, se le desconecta (slow consumer).
+El número de suscripciones está acotado en total y por cliente (IP de origen).
+"""
+import asyncio
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.serialization import dumps, public_unit_dict
+from app.models.unit import UnitData
+
+HEARTBEAT = object() # Marcador que devuelve Subscription.messages() cuando no hubo datos en el intervalo
+
+# Motivos de rechazo de una suscripción (también son la etiqueta "reason" de requests_rejected)
+STREAM_LIMIT = "stream_limit"
+STREAM_LIMIT_CLIENT = "stream_limit_client"
+
+
+class SubscriptionLimitError(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class StreamMessage:
+    """Actualización ya serializada, compartida por todos los suscriptores."""
+    __slots__ = ("unit_id", "json", "sse")
+
+    def __init__(self, unit_id: str, payload: str, event: str = "unit"):
+        self.unit_id = unit_id
+        self.json = payload
+        self.sse = f"event: {event}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    def __init__(self, broadcaster: "Broadcaster", unit_id: Optional[str], queue_size: int,
+                 client_key: Optional[str] = None):
+        self._broadcaster = broadcaster
+        self.unit_id = unit_id
+        self.client_key = client_key
+        self.queue: "asyncio.Queue[Optional[StreamMessage]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False # True si se desconectó por no consumir a tiempo
+
+    async def messages(self, heartbeat_seconds: Optional[float] = None) -> AsyncIterator[object]:
+        """Itera mensajes; emite HEARTBEAT si pasan `heartbeat_seconds` sin datos. Termina si se descarta."""
+        timeout = heartbeat_seconds if heartbeat_seconds is not None else settings.STREAM_HEARTBEAT_SECONDS
+        while True:
+            try:
+                message = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if message is None:
+                return
+            yield message
+
+    def close(self) -> None:
+        self._broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    def __init__(self, queue_size: int, event: str = "unit", max_subscribers: int = 0, max_per_client: int = 0):
+        self._queue_size = queue_size
+        self._event = event
+        self.max_subscribers = max_subscribers # 0 = sin límite
+        self.max_per_client = max_per_client
+        # Suscriptores indexados por filtro de unit_id (None = todas las unidades)
+        self._subscribers: Dict[Optional[str], Set[Subscription]] = {}
+        self._count = 0
+        self._per_client: Dict[str, int] = {}
+        self._rejected = 0
+        self._published = 0
+        self._delivered = 0
+        self._dropped_consumers = 0
+
+    def limit_reason(self, client_key: Optional[str] = None) -> Optional[str]:
+        """Motivo por el que se rechazaría una suscripción nueva de ese cliente, o None si cabe."""
+        if self.max_subscribers and self._count >= self.max_subscribers:
+            return STREAM_LIMIT
+        if client_key is not None and self.max_per_client and self._per_client.get(client_key, 0) >= self.max_per_client:
+            return STREAM_LIMIT_CLIENT
+        return None
+
+    def subscribe(self, unit_id: Optional[str] = None, client_key: Optional[str] = None) -> Subscription:
+        """Nueva suscripción; lanza SubscriptionLimitError si se supera el límite total o el del cliente."""
+        reason = self.limit_reason(client_key)
+        if reason is not None:
+            self._rejected += 1
+            raise SubscriptionLimitError(reason)
+        subscription = Subscription(self, unit_id, self._queue_size, client_key)
+        self._subscribers.setdefault(unit_id, set()).add(subscription)
+        self._count += 1
+        if client_key is not None:
+            self._per_client[client_key] = self._per_client.get(client_key, 0) + 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Idempotente: un consumidor descartado por lento también llama a close() al terminar."""
+        subscribers = self._subscribers.get(subscription.unit_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.unit_id]
+        self._count -= 1
+        if subscription.client_key is not None:
+            remaining = self._per_client[subscription.client_key] - 1
+            if remaining:
+                self._per_client[subscription.client_key] = remaining
+            else:
+                del self._per_client[subscription.client_key]
+
+    def _drop(self, subscription: Subscription) -> None:
+        """Desconecta a un consumidor lento: vacía su cola y le deja el marcador de cierre."""
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        self._dropped_consumers += 1
+
+    def publish_payload(self, unit_id: str, payload: str) -> int:
+        """Encola un mensaje ya serializado. Devuelve a cuántos suscriptores se entregó."""
+        message = StreamMessage(unit_id, payload, self._event)
+        targets = list(self._subscribers.get(None, ())) + list(self._subscribers.get(unit_id, ()))
+        delivered = 0
+        for subscription in targets:
+            try:
+                subscription.queue.put_nowait(message)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        self._published += 1
+        self._delivered += delivered
+        return delivered
+
+    def has_subscribers(self, unit_id: str) -> bool:
+        return bool(self._subscribers.get(None)) or bool(self._subscribers.get(unit_id))
+
+    def publish(self, unit: UnitData) -> int:
+        """Serializa la unidad una sola vez (formato de UnitDataPublic) y la difunde."""
+        if not self.has_subscribers(unit.unit_id):
+            self._published += 1
+            return 0
+        payload = dumps(public_unit_dict(unit)).decode("utf-8")
+        return self.publish_payload(unit.unit_id, payload)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": self._count,
+            "rejected_subscriptions": self._rejected,
+            "published": self._published,
+            "delivered": self._delivered,
+            "dropped_consumers": self._dropped_consumers,
+        }
+
+
+unit_broadcaster = Broadcaster(
+    queue_size=settings.STREAM_QUEUE_SIZE,
+    max_subscribers=settings.STREAM_MAX_SUBSCRIBERS,
+    max_per_client=settings.STREAM_MAX_SUBSCRIBERS_PER_CLIENT,
+)
@@ -0,0 +1,108 @@
+# ws_espacial/app/services/coordination.py
+"""
+Elección de líder entre workers (uvicorn --workers N) mediante una concesión en SQLite.
+
+Solo el líder ejecuta las tareas con efectos externos (sondeo de las fuentes, compactación del
+histórico) y publica el snapshot de unidades; los demás workers lo siguen y sirven las lecturas
+desde su caché. El líder renueva la concesión cada LEADER_LEASE_SECONDS / 3; si deja de hacerlo
+(proceso caído o bloqueado), otro worker la obtiene cuando caduca.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db import async_session
+
+logger = logging.getLogger(__name__)
+
+POLLER_LEASE = "poller"
+
+Job = Callable[[], Awaitable[None]]
+
+
+class WorkerCoordinator:
+    def __init__(self, lease_name: str, lease_seconds: float, leader_jobs: List[Job], follower_jobs: List[Job]):
+        self.lease_name = lease_name
+        self.lease_seconds = lease_seconds
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.leadership_changes = 0
+        self._leader_jobs = leader_jobs
+        self._follower_jobs = follower_jobs
+        self._tasks: List[asyncio.Task] = []
+        self._role_started = False
+        self._lease_valid_until = 0.0
+
+    async def _try_acquire(self) -> bool:
+        now = time.time()
+        try:
+            acquired = await async_session.try_acquire_lease(
+                self.lease_name, self.holder_id, now=now, expires_at=now + self.lease_seconds
+            )
+        except Exception as e:
+            # Sin acceso a la BD se conserva el rol solo mientras la concesión propia no haya caducado
+            logger.warning("No se pudo renovar la concesión '%s': %s", self.lease_name, e)
+            return self.is_leader and time.time() < self._lease_valid_until
+        if acquired:
+            self._lease_valid_until = now + self.lease_seconds
+        return acquired
+
+    async def _switch_role(self, leader: bool) -> None:
+        await self._stop_jobs()
+        self.is_leader = leader
+        self.leadership_changes += 1
+        jobs = self._leader_jobs if leader else self._follower_jobs
+        self._tasks = [asyncio.create_task(job(), name=getattr(job, "__qualname__", repr(job))) for job in jobs]
+        self._role_started = True
+        logger.info("Worker %s actúa como %s.", self.holder_id, "líder" if leader else "seguidor",
+                    extra={"holder": self.holder_id, "leader": leader})
+
+    @property
+    def tasks(self) -> List[asyncio.Task]:
+        """Tareas del rol actual (para /healthz: un bucle del líder que termina deja el worker degradado)."""
+        return list(self._tasks)
+
+    async def _stop_jobs(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run(self) -> None:
+        try:
+            while True:
+                leader = await self._try_acquire()
+                if leader != self.is_leader or not self._role_started:
+                    await self._switch_role(leader)
+                await asyncio.sleep(self.lease_seconds / 3)
+        finally:
+            await self._stop_jobs()
+            if self.is_leader:
+                # Liberar la concesión permite que otro worker tome el relevo sin esperar a que caduque
+                try:
+                    await async_session.release_lease(self.lease_name, self.holder_id)
+                except Exception as e:
+                    logger.warning("No se pudo liberar la concesión '%s': %s", self.lease_name, e)
+                self.is_leader = False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "holder_id": self.holder_id,
+            "role": "leader" if self.is_leader else "follower",
+            "leadership_changes": self.leadership_changes,
+            "running_jobs": sum(1 for task in self._tasks if not task.done()),
+        }
+
+
+worker_coordinator: Optional[WorkerCoordinator] = None
+
+
+def build_worker_coordinator(leader_jobs: List[Job], follower_jobs: List[Job]) -> WorkerCoordinator:
+    global worker_coordinator
+    worker_coordinator = WorkerCoordinator(POLLER_LEASE, settings.LEADER_LEASE_SECONDS, leader_jobs, follower_jobs)
+    return worker_coordinator
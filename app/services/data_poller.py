@@ -1,78 +1,221 @@
 # ws_prueba/app/services/data_poller.py
 import asyncio
-import datetime
+import logging
+import os
 import random
+import time
+import uuid
 import httpx
-import json # Necesario si db_session.upsert_iss_data lo espera, aunque lo pasamos como dict
+from typing import Dict, List, Optional
 
 from app.core.config import settings
-from app.models.unit import UnitData # Usamos para parsear la respuesta de la ISS
-from app.db import session as db_session # Para guardar en la BD
+from app.core.metrics import UPSTREAM_FETCH_DURATION
+from app.db import async_session
+from app.models.unit import UnitData # Usamos para parsear la respuesta de las fuentes
+from app.services import unit_store # Guarda en la BD y actualiza el caché (write-through)
+from app.services.readiness import INITIAL_DATA, readiness
+from app.services.sources import PARSERS, PollSource, SourceParseError, default_iss_source, load_sources
 
-ISS_UNIT_ID = "ISS-001"
+logger = logging.getLogger(__name__)
 
-async def fetch_iss_location_and_update_db():
+# Cliente HTTP compartido: un solo pool de conexiones (keep-alive, DNS/TLS reutilizados) para todas las fuentes
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.POLL_DEFAULT_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.POLL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.POLL_MAX_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# Inicio de la última consulta a cada fuente (monotónico), del poller o de un refresco bajo demanda
+_last_fetch_started: Dict[str, float] = {}
+
+def last_fetch_started(source_name: str) -> Optional[float]:
+    return _last_fetch_started.get(source_name)
+
+def fetch_lease_name(source_name: str) -> str:
+    """Concesión que separa las consultas a una fuente entre workers (sondeo periódico y refrescos)."""
+    return f"fetch:{source_name}"
+
+async def record_shared_fetch(source: PollSource) -> None:
     """
-    Consulta la API de la ISS, transforma los datos y los guarda/actualiza en la BD.
+    Anuncia a los demás workers que el sondeo periódico consulta ahora la fuente: ocupa su concesión
+    durante REFRESH_MIN_INTERVAL_SECONDS con un titular de un solo uso, así que ningún refresco bajo
+    demanda la consulta otra vez en ese intervalo.
     """
+    expires_at = time.time() + settings.REFRESH_MIN_INTERVAL_SECONDS
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(settings.ISS_API_URL)
-            response.raise_for_status()
-            
-            iss_api_data = response.json()
-
-            if iss_api_data.get("message") == "success":
-                position = iss_api_data.get("iss_position", {})
-                timestamp_unix = iss_api_data.get("timestamp")
-
-                if not all([position.get("latitude"), position.get("longitude"), timestamp_unix is not None]):
-                    print(f"Error: Datos incompletos de la API de la ISS: {iss_api_data}")
-                    return
-
-                timestamp_dt = datetime.datetime.fromtimestamp(timestamp_unix, tz=datetime.timezone.utc)
-                
-                current_iss_pydantic_data = UnitData(
-                    unit_id=ISS_UNIT_ID,
-                    latitude=float(position["latitude"]),
-                    longitude=float(position["longitude"]),
-                    timestamp=timestamp_dt,
-                    sensors={
-                        "altitude_km": round(random.uniform(390, 430), 2),
-                        "velocity_kmh": round(random.uniform(27500, 28000), 0)
-                    }
-                )
-                
-                db_session.upsert_iss_data(
-                    unit_id=current_iss_pydantic_data.unit_id,
-                    latitude=current_iss_pydantic_data.latitude,
-                    longitude=current_iss_pydantic_data.longitude,
-                    api_timestamp=current_iss_pydantic_data.timestamp,
-                    sensors=current_iss_pydantic_data.sensors
-                )
-                # print(f"[{datetime.datetime.now()}] Datos de la ISS actualizados en la BD para {ISS_UNIT_ID}")
-            else:
-                print(f"Error: La API de la ISS no reportó éxito. Mensaje: {iss_api_data.get('message')}")
+        holder = f"poll:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        await async_session.set_lease(fetch_lease_name(source.name), holder, expires_at)
+    except Exception as e:
+        logger.warning("No se pudo anunciar la consulta a la fuente '%s': %s", source.name, e)
 
+
+class SourceState:
+    """Estado de sondeo de una fuente (para backoff y estadísticas)."""
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_duration_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+async def fetch_source(source: PollSource, client: Optional[httpx.AsyncClient] = None) -> List[UnitData]:
+    """Consulta una fuente y devuelve las unidades parseadas (lanza excepción si falla)."""
+    client = client or get_http_client()
+    response = await client.get(source.url, timeout=source.timeout_seconds)
+    response.raise_for_status()
+    return PARSERS[source.parser](response.json(), source)
+
+
+async def poll_source_once(source: PollSource, state: Optional[SourceState] = None,
+                           client: Optional[httpx.AsyncClient] = None) -> bool:
+    """
+    Consulta una fuente y guarda sus unidades. Devuelve True si tuvo éxito.
+    Los errores se registran y no se propagan.
+    """
+    _last_fetch_started[source.name] = time.monotonic()
+    start = time.perf_counter()
+    error: Optional[str] = None
+    outcome = "ok"
+    units: List[UnitData] = []
+    try:
+        units = await fetch_source(source, client)
     except httpx.HTTPStatusError as e:
-        print(f"Error HTTP al consultar la API de la ISS: {e.response.status_code} - {e.request.url}")
+        outcome = "http_error"
+        error = f"Error HTTP al consultar la fuente '{source.name}': {e.response.status_code} - {e.request.url}"
+    except httpx.TimeoutException as e:
+        outcome = "timeout"
+        error = f"Tiempo de espera agotado al consultar la fuente '{source.name}' ({type(e).__name__}) - URL: {e.request.url}"
     except httpx.RequestError as e:
-        print(f"Error de red al consultar la API de la ISS:")
-        print(f"  URL solicitada: {e.request.url}")
-        print(f"  Tipo de error: {type(e)}")
-        print(f"  Mensaje de error detallado: {e}")
-        print(f"  Representación del error: {repr(e)}")
+        outcome = "network_error"
+        error = f"Error de red al consultar la fuente '{source.name}' ({type(e).__name__}): {e!r} - URL: {e.request.url}"
+    except SourceParseError as e:
+        outcome = "parse_error"
+        error = f"Error: {e}"
     except Exception as e:
-        print(f"Error inesperado ({type(e).__name__}) al procesar datos de la ISS: {e}")
+        outcome = "error"
+        error = f"Error inesperado ({type(e).__name__}) al procesar datos de la fuente '{source.name}': {e}"
+    UPSTREAM_FETCH_DURATION.observe(time.perf_counter() - start, source.name, outcome)
+
+    if error is None:
+        try:
+            await unit_store.store_units(units)
+        except Exception as e:
+            error = f"Error inesperado ({type(e).__name__}) al guardar los datos de la fuente '{source.name}': {e}"
+
+    if state is not None:
+        state.last_duration_seconds = time.perf_counter() - start
+        state.last_error = error
+        if error is None:
+            state.successes += 1
+            state.consecutive_failures = 0
+        else:
+            state.failures += 1
+            state.consecutive_failures += 1
+    if error is not None:
+        logger.warning(error, extra={"source": source.name, "outcome": outcome})
+    else:
+        logger.debug("Fuente '%s' consultada: %d unidad(es)", source.name, len(units),
+                     extra={"source": source.name, "units": len(units)})
+    return error is None
+
+
+async def fetch_iss_location_and_update_db():
+    """
+    Consulta la API de la ISS, transforma los datos y los guarda/actualiza en la BD.
+    """
+    return await poll_source_once(default_iss_source())
+
+
+def backoff_delay(source: PollSource, consecutive_failures: int) -> float:
+    """Intervalo normal si no hay fallos; si los hay, backoff exponencial con jitter acotado."""
+    if consecutive_failures == 0:
+        return source.interval_seconds
+    delay = min(settings.POLL_BACKOFF_MAX_SECONDS, source.interval_seconds * 2 ** (consecutive_failures - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class MultiSourcePoller:
+    """
+    Consulta concurrentemente todas las fuentes registradas, cada una a su propio ritmo,
+    sobre un único cliente HTTP con pool de conexiones y con un límite global de concurrencia.
+    """
+    def __init__(self, sources: List[PollSource], max_concurrency: int):
+        self.sources = sources
+        self.states: Dict[str, SourceState] = {source.name: SourceState() for source in sources}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._first_round_pending = {source.name for source in sources}
+
+    def _first_poll_done(self, source: PollSource) -> None:
+        # Tras la primera consulta de todas las fuentes (con éxito o no) el proceso puede declararse listo
+        self._first_round_pending.discard(source.name)
+        if not self._first_round_pending:
+            readiness.mark(INITIAL_DATA)
+
+    async def _run_source(self, source: PollSource) -> None:
+        state = self.states[source.name]
+        # Arranque escalonado para que cientos de fuentes no disparen a la vez
+        await asyncio.sleep(random.uniform(0, min(source.interval_seconds, 1.0)))
+        while True:
+            async with self._semaphore:
+                if settings.REFRESH_ENABLED and settings.WORKER_COORDINATION_ENABLED:
+                    await record_shared_fetch(source)
+                await poll_source_once(source, state)
+            if source.name in self._first_round_pending:
+                self._first_poll_done(source)
+            await asyncio.sleep(backoff_delay(source, state.consecutive_failures))
+
+    async def run(self) -> None:
+        if not self.sources:
+            readiness.mark(INITIAL_DATA)
+            # Nada que sondear: la tarea queda en espera para no figurar como detenida en /healthz
+            await asyncio.Event().wait()
+        tasks = [asyncio.create_task(self._run_source(source)) for source in self.sources]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        return {
+            name: {
+                "successes": state.successes,
+                "failures": state.failures,
+                "consecutive_failures": state.consecutive_failures,
+                "last_duration_seconds": state.last_duration_seconds,
+                "last_error": state.last_error,
+            }
+            for name, state in self.states.items()
+        }
 
 
 async def continuous_data_poller(): # <--- ¡AQUÍ ESTÁ LA FUNCIÓN!
     """
-    Tarea en segundo plano que llama a fetch_iss_location_and_update_db()
-    periódicamente según el intervalo definido en la configuración.
+    Tarea en segundo plano que consulta periódicamente todas las fuentes registradas
+    según el intervalo definido para cada una.
     """
-    print(f"[{datetime.datetime.now()}] Iniciando sondeo continuo de datos de la ISS (intervalo: {settings.POLLING_INTERVAL_SECONDS}s) para BD...")
-    while True:
-        print(f"[{datetime.datetime.now()}] Poller: Intentando obtener y actualizar datos de la ISS en BD...")
-        await fetch_iss_location_and_update_db()
-        await asyncio.sleep(settings.POLLING_INTERVAL_SECONDS)
\ No newline at end of file
+    sources = load_sources()
+    logger.info("Iniciando sondeo continuo de %d fuente(s) (concurrencia máxima: %d)",
+                len(sources), settings.POLL_MAX_CONCURRENCY)
+    poller = MultiSourcePoller(sources, max_concurrency=settings.POLL_MAX_CONCURRENCY)
+    try:
+        await poller.run()
+    finally:
+        await close_http_client()
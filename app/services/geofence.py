@@ -0,0 +1,449 @@
+# ws_espacial/app/services/geofence.py
+"""
+Geocercas (polígonos y círculos) con eventos de entrada/salida evaluados en cada escritura.
+
+El motor vive en el worker líder (o en cada proceso, sin coordinación): allí pasan todas las
+posiciones nuevas, tanto las del poller y la ingesta propias como las que otros workers escriben en
+la BD (las absorbe el publicador del snapshot). Cada vez que se aplica la muestra más reciente de
+unas unidades se evalúan solo esas unidades, de forma incremental:
+
+  1. Prefiltro espacial: una rejilla de celdas lat/lon con las geocercas cuyo bbox toca cada celda;
+     cada punto solo se compara con las geocercas de su celda.
+  2. Descarte por bbox de los pares (punto, geocerca) candidatos.
+  3. Prueba exacta vectorizada sobre todos los pares a la vez: regla par-impar (ray casting) para
+     los polígonos, expandiendo cada par a las aristas de su polígono, y distancia de círculo
+     máximo para los círculos. Usa numpy si está instalado; si no, el mismo algoritmo en Python.
+
+La pertenencia actual (unidad -> geocercas) se guarda en memoria y los cambios generan eventos
+`enter` / `exit`, que se acumulan en un búfer y se vuelcan por lotes a geofence_events. Cada worker
+lee después los eventos nuevos de la tabla y los difunde a sus suscriptores SSE.
+
+Al activarse el motor, y al cambiar las geocercas, la pertenencia se recalcula en silencio desde
+las posiciones cacheadas: una geocerca nueva no genera `enter` de las unidades que ya estaban dentro.
+"""
+import asyncio
+import datetime
+import logging
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.cache.spatial_index import EARTH_RADIUS_KM, KM_PER_DEGREE_LAT, haversine_km
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.db import async_session
+from app.models.unit import UnitData
+from app.services.broadcaster import Broadcaster
+
+try:
+    import numpy as np
+except ImportError: # numpy es opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+POLYGON = "polygon"
+CIRCLE = "circle"
+ENTER = "enter"
+EXIT = "exit"
+
+Cell = Tuple[int, int]
+EventRow = Tuple[int, str, str, float, float, float] # fence_id, unit_id, event, ts, latitude, longitude
+
+
+def _unwrap_longitudes(lons: Sequence[float]) -> List[float]:
+    """Longitudes continuas (sin el salto de 360° del antimeridiano) a partir del primer vértice."""
+    lon = lons[0]
+    result = [lon]
+    for next_lon in lons[1:]:
+        lon += (next_lon - lon + 180) % 360 - 180
+        result.append(lon)
+    return result
+
+
+def _point_in_ring(x: float, y: float, xs: Sequence[float], ys: Sequence[float]) -> bool:
+    """Regla par-impar sobre el anillo (xs, ys), cerrado implícitamente."""
+    inside = False
+    x1, y1 = xs[-1], ys[-1]
+    for x2, y2 in zip(xs, ys):
+        if (y1 > y) != (y2 > y) and x < x1 + (x2 - x1) * (y - y1) / (y2 - y1):
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+def _haversine_km_numpy(lat1, lon1, lat2, lon2):
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+class FenceIndex:
+    """
+    Conjunto inmutable de geocercas compiladas: bbox, parámetros de los círculos, aristas de los
+    polígonos en arrays planos y la rejilla de prefiltrado. Se reconstruye entero al cambiar las
+    geocercas (fuera del event loop) y se sustituye de una vez.
+    """
+
+    def __init__(self, fences: Iterable[Tuple[int, str, dict]], cell_degrees: float):
+        self._cell_degrees = cell_degrees
+        self._lon_cells = int(math.ceil(360 / cell_degrees))
+        self._lat_cells = int(math.ceil(180 / cell_degrees))
+        self.ids: List[int] = []
+        self._is_circle: List[bool] = []
+        self._bbox: List[Tuple[float, float, float, float]] = [] # min_lat, max_lat, min_lon, max_lon
+        self._circles: List[Optional[Tuple[float, float, float]]] = []
+        self._rings: List[Optional[Tuple[List[float], List[float]]]] = []
+        self._cells: Dict[Cell, List[int]] = {}
+        for fence_id, kind, geometry in fences:
+            self._add(fence_id, kind, geometry)
+        self._arrays = self._build_arrays() if np is not None and self.ids else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _add(self, fence_id: int, kind: str, geometry: dict) -> None:
+        index = len(self.ids)
+        if kind == CIRCLE:
+            lat, lon, radius_km = geometry["latitude"], geometry["longitude"], geometry["radius_km"]
+            dlat = radius_km / KM_PER_DEGREE_LAT
+            min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+            dlon = 360.0
+            if min_lat > -90 and max_lat < 90:
+                dlon = dlat / max(math.cos(math.radians(max(abs(min_lat), abs(max_lat)))), 1e-12)
+            if dlon >= 180:
+                # Contiene un polo o es muy ancho: todas las longitudes
+                min_lon, max_lon = -180.0, 180.0
+            else:
+                min_lon, max_lon = lon - dlon, lon + dlon
+            self._circles.append((lat, lon, radius_km))
+            self._rings.append(None)
+        else:
+            coordinates = geometry["coordinates"]
+            xs = _unwrap_longitudes([lon for lon, _ in coordinates])
+            ys = [lat for _, lat in coordinates]
+            min_lat, max_lat, min_lon, max_lon = min(ys), max(ys), min(xs), max(xs)
+            self._circles.append(None)
+            self._rings.append((xs, ys))
+        self.ids.append(fence_id)
+        self._is_circle.append(kind == CIRCLE)
+        self._bbox.append((min_lat, max_lat, min_lon, max_lon))
+        for cell in self._cells_of(min_lat, max_lat, min_lon, max_lon):
+            self._cells.setdefault(cell, []).append(index)
+
+    def _cell_x(self, lon: float) -> int:
+        return int((lon + 180.0) // self._cell_degrees) % self._lon_cells
+
+    def _cell_y(self, lat: float) -> int:
+        return max(0, min(self._lat_cells - 1, int((lat + 90.0) // self._cell_degrees)))
+
+    def _cells_of(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Iterable[Cell]:
+        if max_lon - min_lon >= 360 - self._cell_degrees:
+            xs: Iterable[int] = range(self._lon_cells)
+        else:
+            first = int((min_lon + 180.0) // self._cell_degrees)
+            last = int((max_lon + 180.0) // self._cell_degrees)
+            xs = [x % self._lon_cells for x in range(first, last + 1)]
+        ys = range(self._cell_y(min_lat), self._cell_y(max_lat) + 1)
+        return [(x, y) for x in xs for y in ys]
+
+    def _build_arrays(self) -> dict:
+        edge_start, edge_count, x1, y1, x2, y2 = [], [], [], [], [], []
+        for ring in self._rings:
+            edge_start.append(len(x1))
+            if ring is None:
+                edge_count.append(0)
+                continue
+            xs, ys = ring
+            edge_count.append(len(xs))
+            x1.extend(xs[-1:] + xs[:-1])
+            y1.extend(ys[-1:] + ys[:-1])
+            x2.extend(xs)
+            y2.extend(ys)
+        nan = float("nan")
+        return {
+            "is_circle": np.array(self._is_circle, dtype=bool),
+            "min_lat": np.array([b[0] for b in self._bbox]),
+            "max_lat": np.array([b[1] for b in self._bbox]),
+            "min_lon": np.array([b[2] for b in self._bbox]),
+            "max_lon": np.array([b[3] for b in self._bbox]),
+            "c_lat": np.array([c[0] if c else nan for c in self._circles]),
+            "c_lon": np.array([c[1] if c else nan for c in self._circles]),
+            "c_radius": np.array([c[2] if c else nan for c in self._circles]),
+            "edge_start": np.array(edge_start, dtype=np.int64),
+            "edge_count": np.array(edge_count, dtype=np.int64),
+            "x1": np.array(x1), "y1": np.array(y1), "x2": np.array(x2), "y2": np.array(y2),
+        }
+
+    def candidate_pairs(self, points: Sequence[Tuple[float, float]]) -> Tuple[List[int], List[int]]:
+        """Pares (índice de punto, índice de geocerca) que comparten celda de la rejilla."""
+        pair_points: List[int] = []
+        pair_fences: List[int] = []
+        cells = self._cells
+        for i, (lat, lon) in enumerate(points):
+            candidates = cells.get((self._cell_x(lon), self._cell_y(lat)))
+            if candidates:
+                pair_points.extend([i] * len(candidates))
+                pair_fences.extend(candidates)
+        return pair_points, pair_fences
+
+    def containing(self, points: Sequence[Tuple[float, float]]) -> Tuple[List[List[int]], int]:
+        """Id de las geocercas que contienen cada punto (lat, lon), y cuántos pares pasaron el prefiltro."""
+        result: List[List[int]] = [[] for _ in points]
+        if not self.ids or not points:
+            return result, 0
+        pair_points, pair_fences = self.candidate_pairs(points)
+        if not pair_points:
+            return result, 0
+        if self._arrays is not None:
+            matches = self._containing_numpy(points, pair_points, pair_fences)
+        else:
+            matches = self._containing_python(points, pair_points, pair_fences)
+        ids = self.ids
+        for point, fence in matches:
+            result[point].append(ids[fence])
+        return result, len(pair_points)
+
+    def _containing_python(self, points, pair_points, pair_fences) -> List[Tuple[int, int]]:
+        matches = []
+        for point, fence in zip(pair_points, pair_fences):
+            lat, lon = points[point]
+            min_lat, max_lat, min_lon, max_lon = self._bbox[fence]
+            if not (min_lat <= lat <= max_lat):
+                continue
+            # Longitud del punto en el mismo tramo continuo que la geocerca
+            ulon = (lon - min_lon) % 360 + min_lon
+            if ulon > max_lon:
+                continue
+            if self._is_circle[fence]:
+                c_lat, c_lon, radius_km = self._circles[fence]
+                inside = haversine_km(lat, lon, c_lat, c_lon) <= radius_km
+            else:
+                xs, ys = self._rings[fence]
+                inside = _point_in_ring(ulon, lat, xs, ys)
+            if inside:
+                matches.append((point, fence))
+        return matches
+
+    def _containing_numpy(self, points, pair_points, pair_fences) -> List[Tuple[int, int]]:
+        a = self._arrays
+        coords = np.array(points, dtype=float)
+        p = np.array(pair_points, dtype=np.int64)
+        f = np.array(pair_fences, dtype=np.int64)
+        lat, lon = coords[p, 0], coords[p, 1]
+        min_lon = a["min_lon"][f]
+        ulon = (lon - min_lon) % 360 + min_lon
+        keep = (lat >= a["min_lat"][f]) & (lat <= a["max_lat"][f]) & (ulon <= a["max_lon"][f])
+        p, f, lat, lon, ulon = p[keep], f[keep], lat[keep], lon[keep], ulon[keep]
+        inside = np.zeros(p.size, dtype=bool)
+
+        circles = np.flatnonzero(a["is_circle"][f])
+        if circles.size:
+            fc = f[circles]
+            distance = _haversine_km_numpy(lat[circles], lon[circles], a["c_lat"][fc], a["c_lon"][fc])
+            inside[circles] = distance <= a["c_radius"][fc]
+
+        polygons = np.flatnonzero(~a["is_circle"][f])
+        if polygons.size:
+            fp = f[polygons]
+            counts = a["edge_count"][fp]
+            # Una fila por (par, arista del polígono del par)
+            pair_of_edge = np.repeat(np.arange(polygons.size), counts)
+            first_edge = np.cumsum(counts) - counts
+            edge = np.repeat(a["edge_start"][fp] - first_edge, counts) + np.arange(counts.sum())
+            x, y = ulon[polygons][pair_of_edge], lat[polygons][pair_of_edge]
+            x1, y1, x2, y2 = a["x1"][edge], a["y1"][edge], a["x2"][edge], a["y2"][edge]
+            straddles = (y1 > y) != (y2 > y)
+            dy = np.where(straddles, y2 - y1, 1.0)
+            crossings = straddles & (x < x1 + (x2 - x1) * (y - y1) / dy)
+            inside[polygons] = np.bincount(pair_of_edge, weights=crossings, minlength=polygons.size) % 2 == 1
+
+        return list(zip(p[inside].tolist(), f[inside].tolist()))
+
+
+class GeofenceEngine:
+    def __init__(self, cell_degrees: float):
+        self._cell_degrees = cell_degrees
+        self._index = FenceIndex((), cell_degrees)
+        self._revision: Optional[Tuple[int, int]] = None
+        self._inside: Dict[str, Set[int]] = {}
+        self._pending: List[EventRow] = []
+        self._flush_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self.active = False
+        self._evaluations = 0
+        self._points = 0
+        self._candidate_pairs = 0
+        self._events = 0
+        self._last_evaluation_ms = 0.0
+
+    # --- Evaluación ---
+
+    def evaluate(self, units: Sequence[UnitData]) -> int:
+        """Actualiza la pertenencia de estas unidades y encola sus eventos. Devuelve cuántos generó."""
+        if not self.active or not units or (not len(self._index) and not self._inside):
+            return 0
+        start = time.perf_counter()
+        containing, pairs = self._index.containing([(unit.latitude, unit.longitude) for unit in units])
+        produced = 0
+        for unit, fence_ids in zip(units, containing):
+            current = set(fence_ids)
+            previous = self._inside.get(unit.unit_id, set())
+            if current == previous:
+                continue
+            timestamp = unit.timestamp
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+            ts = timestamp.timestamp()
+            for fence_id in sorted(current - previous):
+                self._pending.append((fence_id, unit.unit_id, ENTER, ts, unit.latitude, unit.longitude))
+            for fence_id in sorted(previous - current):
+                self._pending.append((fence_id, unit.unit_id, EXIT, ts, unit.latitude, unit.longitude))
+            produced += len(current ^ previous)
+            if current:
+                self._inside[unit.unit_id] = current
+            else:
+                del self._inside[unit.unit_id]
+        self._evaluations += 1
+        self._points += len(units)
+        self._candidate_pairs += pairs
+        self._events += produced
+        self._last_evaluation_ms = (time.perf_counter() - start) * 1000
+        return produced
+
+    def _reseed(self) -> None:
+        """Pertenencia recalculada desde las posiciones cacheadas, sin generar eventos."""
+        units = unit_data_cache.peek_all()
+        containing, _ = self._index.containing([(unit.latitude, unit.longitude) for unit in units])
+        self._inside = {unit.unit_id: set(fence_ids) for unit, fence_ids in zip(units, containing) if fence_ids}
+
+    # --- Geocercas desde la BD ---
+
+    def notify_changed(self) -> None:
+        """Pide recargar las geocercas sin esperar a la próxima comprobación periódica."""
+        self._changed.set()
+
+    async def reload_if_changed(self) -> bool:
+        # La revisión se lee antes que las filas: un cambio intermedio provoca otra recarga
+        revision = await async_session.get_geofences_revision()
+        if revision == self._revision:
+            return False
+        rows = await async_session.get_geofences()
+        fences = [(row["id"], row["kind"], row["geometry"]) for row in rows]
+        self._index = await asyncio.get_running_loop().run_in_executor(
+            None, FenceIndex, fences, self._cell_degrees
+        )
+        self._revision = revision
+        self._reseed()
+        logger.info("Geocercas cargadas: %d (%d unidades dentro de alguna).", len(self._index), len(self._inside))
+        return True
+
+    # --- Volcado de eventos ---
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            try:
+                await async_session.insert_geofence_events(batch)
+            except Exception:
+                # Devolvemos el lote al búfer para reintentarlo en el próximo volcado
+                self._pending[:0] = batch
+                raise
+            return len(batch)
+
+    async def run(self) -> None:
+        """Tarea del líder: carga las geocercas, vuelca los eventos y recarga cuando cambian en la BD."""
+        self._revision = None
+        self._inside = {}
+        self.active = True
+        last_check = time.monotonic()
+        try:
+            while True:
+                try:
+                    if self._revision is None or self._changed.is_set() \
+                            or time.monotonic() - last_check >= settings.GEOFENCE_RELOAD_SECONDS:
+                        self._changed.clear()
+                        last_check = time.monotonic()
+                        await self.reload_if_changed()
+                    await self.flush()
+                except Exception as e:
+                    logger.exception("Error en el motor de geocercas: %s", e)
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=settings.GEOFENCE_FLUSH_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.active = False
+            self._inside = {}
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("No se pudieron volcar %d eventos de geocercas al detener el motor: %s", self.pending, e)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "active": self.active,
+            "numpy": np is not None,
+            "geofences": len(self._index),
+            "units_inside": len(self._inside),
+            "pending_events": len(self._pending),
+            "evaluations": self._evaluations,
+            "points_evaluated": self._points,
+            "candidate_pairs": self._candidate_pairs,
+            "events": self._events,
+            "last_evaluation_ms": round(self._last_evaluation_ms, 3),
+        }
+
+
+geofence_engine = GeofenceEngine(cell_degrees=settings.GEOFENCE_CELL_DEGREES)
+
+# Eventos difundidos a los suscriptores SSE, indexados por str(fence_id)
+geofence_broadcaster = Broadcaster(
+    queue_size=settings.STREAM_QUEUE_SIZE,
+    event="geofence",
+    max_subscribers=settings.STREAM_MAX_SUBSCRIBERS,
+    max_per_client=settings.STREAM_MAX_SUBSCRIBERS_PER_CLIENT,
+)
+
+
+class GeofenceEventTail:
+    """
+    Tarea de cada worker: lee de geofence_events los eventos nuevos (los escribe el líder) y los
+    difunde a los suscriptores de este proceso. Empieza por el último evento existente.
+    """
+
+    def __init__(self, broadcaster: Broadcaster):
+        self._broadcaster = broadcaster
+        self._last_id: Optional[int] = None
+
+    async def poll(self) -> int:
+        if self._last_id is None:
+            self._last_id = await async_session.get_last_geofence_event_id()
+            return 0
+        published = 0
+        while True:
+            rows = await async_session.get_geofence_events(after_id=self._last_id, limit=settings.GEOFENCE_PAGE_MAX_LIMIT)
+            for row in rows:
+                key = str(row["fence_id"])
+                if self._broadcaster.has_subscribers(key):
+                    self._broadcaster.publish_payload(key, dumps(row).decode("utf-8"))
+                published += 1
+            if rows:
+                self._last_id = rows[-1]["id"]
+            if len(rows) < settings.GEOFENCE_PAGE_MAX_LIMIT:
+                return published
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.exception("Error al leer los eventos de geocercas: %s", e)
+            await asyncio.sleep(settings.GEOFENCE_STREAM_POLL_SECONDS)
@@ -0,0 +1,106 @@
+# ws_espacial/app/services/history.py
+"""
+Histórico de posiciones de las unidades.
+Cada muestra almacenada se añade a un búfer en memoria que se vuelca a iss_data_history
+por lotes (executemany en una transacción), y una tarea de mantenimiento compacta los puntos
+antiguos en intervalos más gruesos para que la tabla siga siendo rápida con el paso de los meses.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import time
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.db import async_session
+from app.models.unit import UnitData
+
+logger = logging.getLogger(__name__)
+
+HistoryRow = Tuple[str, float, float, float, str]
+
+
+def _to_epoch(timestamp: datetime.datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    return timestamp.timestamp()
+
+
+class HistoryWriter:
+    """Búfer de inserciones del histórico. Se vacía al alcanzar HISTORY_BATCH_SIZE o periódicamente."""
+
+    def __init__(self, batch_size: int):
+        self._batch_size = batch_size
+        self._pending: List[HistoryRow] = []
+        self._flush_lock = asyncio.Lock()
+        self.flushed_rows = 0
+
+    def append(self, unit: UnitData) -> bool:
+        """Añade un punto al búfer. Devuelve True si el búfer alcanzó el tamaño de lote."""
+        self._pending.append((
+            unit.unit_id,
+            _to_epoch(unit.timestamp),
+            unit.latitude,
+            unit.longitude,
+            json.dumps(unit.sensors),
+        ))
+        return len(self._pending) >= self._batch_size
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            try:
+                await async_session.insert_history_batch(batch)
+            except Exception:
+                # Devolvemos el lote al búfer para reintentarlo en el próximo volcado
+                self._pending[:0] = batch
+                raise
+            self.flushed_rows += len(batch)
+            return len(batch)
+
+
+history_writer = HistoryWriter(batch_size=settings.HISTORY_BATCH_SIZE)
+
+
+async def record_history(unit: UnitData) -> None:
+    if history_writer.append(unit):
+        await history_writer.flush()
+
+
+async def history_flush_loop() -> None:
+    """Vuelca periódicamente el búfer para que el histórico no quede retrasado más de HISTORY_FLUSH_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.HISTORY_FLUSH_SECONDS)
+        try:
+            await history_writer.flush()
+        except Exception as e:
+            logger.exception("Error al volcar el histórico en la BD: %s", e)
+
+
+async def compact_history_once() -> dict:
+    now = time.time()
+    delete_before = now - settings.HISTORY_MAX_AGE_DAYS * 86400 if settings.HISTORY_MAX_AGE_DAYS > 0 else None
+    return await async_session.compact_history(
+        cutoff_ts=now - settings.HISTORY_RAW_RETENTION_HOURS * 3600,
+        bucket_seconds=settings.HISTORY_COMPACT_BUCKET_SECONDS,
+        delete_before_ts=delete_before,
+    )
+
+
+async def history_compaction_loop() -> None:
+    """Tarea de retención/compactación del histórico."""
+    while True:
+        try:
+            result = await compact_history_once()
+            if result["compacted"] or result["expired"]:
+                logger.info("Histórico compactado: %d puntos agrupados, %d puntos expirados.", result["compacted"], result["expired"])
+        except Exception as e:
+            logger.exception("Error al compactar el histórico: %s", e)
+        await asyncio.sleep(settings.HISTORY_COMPACTION_INTERVAL_SECONDS)
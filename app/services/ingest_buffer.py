@@ -0,0 +1,152 @@
+# ws_espacial/app/services/ingest_buffer.py
+"""
+Búfer de escritura para la ingesta masiva de telemetría.
+Los lotes aceptados por el endpoint de ingesta se acumulan aquí y una tarea en segundo plano
+los vuelca a través de unit_store.store_units (executemany en una transacción por lote).
+Si el búfer está lleno, los productores esperan un tiempo acotado y después se rechaza la
+petición (backpressure), en lugar de acumular memoria sin límite.
+Un lote que falla por un error permanente (datos que la BD no admite) se descarta y se cuenta
+como dead-lettered; ante errores transitorios se reintenta, como máximo INGEST_FLUSH_MAX_RETRIES veces.
+"""
+import asyncio
+import logging
+import sqlite3
+from typing import List
+
+from app.core.config import settings
+from app.models.unit import UnitData
+from app.services import unit_store
+
+logger = logging.getLogger(__name__)
+
+
+class IngestBufferFull(Exception):
+    """No hubo espacio en el búfer de ingesta dentro del tiempo de espera."""
+
+
+class IngestBatchTooLarge(ValueError):
+    """El lote no cabría en el búfer ni vacío: esperar no serviría de nada."""
+
+
+# Errores que se repetirían en cada reintento del mismo lote
+PERMANENT_ERRORS = (sqlite3.IntegrityError, ValueError, TypeError)
+
+
+class IngestBuffer:
+    def __init__(self, capacity: int, batch_size: int, flush_interval_seconds: float, max_retries: int):
+        self._capacity = capacity
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_seconds
+        self._max_retries = max_retries
+        self._pending: List[UnitData] = []
+        self._changed = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._failures = 0 # Fallos transitorios seguidos del lote en cabeza
+        self.accepted = 0
+        self.flushed = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, units: List[UnitData], timeout: float) -> None:
+        """Encola unidades; espera hasta `timeout` segundos si no hay espacio."""
+        if len(units) > self._capacity:
+            raise IngestBatchTooLarge("El lote supera la capacidad del búfer de ingesta.")
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: len(self._pending) + len(units) <= self._capacity),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                self.rejected += len(units)
+                raise IngestBufferFull()
+            self._pending.extend(units)
+            self.accepted += len(units)
+            self._changed.notify_all()
+
+    async def flush(self) -> int:
+        """Vuelca un lote (hasta batch_size unidades). Devuelve cuántas se procesaron (escritas o descartadas)."""
+        async with self._flush_lock:
+            async with self._changed:
+                batch = self._pending[:self._batch_size]
+                del self._pending[:len(batch)]
+            if not batch:
+                return 0
+            try:
+                await unit_store.store_units(batch)
+            except PERMANENT_ERRORS as e:
+                self._dead_letter(batch, e)
+            except Exception as e:
+                self._failures += 1
+                if self._failures > self._max_retries:
+                    self._dead_letter(batch, e)
+                else:
+                    # Se devuelve el lote al principio del búfer para reintentarlo
+                    async with self._changed:
+                        self._pending[:0] = batch
+                    raise
+            else:
+                self._failures = 0
+                self.flushed += len(batch)
+            async with self._changed:
+                self._changed.notify_all() # Hay espacio: despierta a los productores en espera
+            return len(batch)
+
+    def _dead_letter(self, batch: List[UnitData], error: Exception) -> None:
+        """Descarta un lote que no se puede escribir, para que no bloquee al resto de la ingesta."""
+        self._failures = 0
+        self.dead_lettered += len(batch)
+        logger.error("Lote de ingesta descartado (%d puntos, primera unidad %s): %r",
+                     len(batch), batch[0].unit_id, error)
+
+    async def drain(self) -> None:
+        """
+        Vuelca todo lo pendiente (al apagar). Un error transitorio no interrumpe el vaciado: se espera
+        flush_interval y se reintenta; tras max_retries fallos seguidos el lote se descarta, así que termina.
+        """
+        while self._pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Error al vaciar el búfer de ingesta (%d puntos pendientes): %s", len(self._pending), e)
+                await asyncio.sleep(self._flush_interval)
+
+    async def run(self) -> None:
+        """Tarea de volcado: escribe en cuanto hay un lote completo o ha pasado el intervalo."""
+        while True:
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: len(self._pending) >= self._batch_size),
+                        timeout=self._flush_interval,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                while await self.flush() == self._batch_size:
+                    pass
+            except Exception as e:
+                logger.exception("Error al volcar el búfer de ingesta: %s", e)
+                await asyncio.sleep(self._flush_interval)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "capacity": self._capacity,
+            "accepted": self.accepted,
+            "flushed": self.flushed,
+            "rejected": self.rejected,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+ingest_buffer = IngestBuffer(
+    capacity=settings.INGEST_BUFFER_CAPACITY,
+    batch_size=settings.INGEST_FLUSH_BATCH_SIZE,
+    flush_interval_seconds=settings.INGEST_FLUSH_INTERVAL_SECONDS,
+    max_retries=settings.INGEST_FLUSH_MAX_RETRIES,
+)
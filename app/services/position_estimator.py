@@ -0,0 +1,174 @@
+# ws_espacial/app/services/position_estimator.py
+"""
+Estimación de la posición de una unidad en un instante arbitrario a partir de las muestras guardadas.
+
+Entre dos muestras se interpola por el círculo máximo (slerp sobre vectores unitarios). Después de
+la última muestra se extrapola con la misma rotación (velocidad angular constante sobre el círculo
+máximo de las dos últimas muestras), como mucho POSITION_EXTRAPOLATION_MAX_SECONDS.
+
+Para las unidades en órbita (la ISS) el cálculo se hace en un marco inercial: a cada muestra se le
+suma a la longitud la rotación de la Tierra desde la muestra de referencia y al resultado se le
+resta la del instante pedido. Una órbita casi circular es un círculo máximo en ese marco, de modo
+que la traza sobre el suelo (que no es un círculo máximo) se reproduce bien y se puede extrapolar
+hasta ISS_EXTRAPOLATION_MAX_SECONDS sin consultar la fuente.
+
+Las muestras salen de la trayectoria en memoria (track_buffer) y, para instantes anteriores a su
+ventana, del histórico en la BD. El cálculo se vectoriza con NumPy si está instalado.
+"""
+import bisect
+import datetime
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.cache.track_buffer import np, unit_tracks
+from app.core.config import settings
+from app.db import async_session
+from app.services.sources import ISS_UNIT_ID
+
+EARTH_ROTATION_DEG_PER_SECOND = 360.0 / 86164.0905 # Día sideral
+ORBITAL_UNITS = {ISS_UNIT_ID}
+
+SAMPLE = "sample"
+INTERPOLATED = "interpolated"
+EXTRAPOLATED = "extrapolated"
+UNAVAILABLE = "unavailable"
+
+Samples = Tuple[Sequence[float], Sequence[float], Sequence[float]] # (ts, lat, lon) en orden cronológico
+
+
+def _plan(ts: Sequence[float], targets: Sequence[float], max_extrapolation: float) -> List[Tuple[str, int, int]]:
+    """Para cada instante: (método, índice de la muestra a, índice de la muestra b)."""
+    size = len(ts)
+    plan = []
+    for target in targets:
+        i = bisect.bisect_right(ts, target)
+        if i and ts[i - 1] == target:
+            plan.append((SAMPLE, i - 1, i - 1))
+        elif 0 < i < size and ts[i] - ts[i - 1] <= settings.POSITION_MAX_GAP_SECONDS:
+            plan.append((INTERPOLATED, i - 1, i))
+        elif (i == size and size >= 2 and target - ts[-1] <= max_extrapolation
+              and 0 < ts[-1] - ts[-2] <= settings.POSITION_MAX_GAP_SECONDS):
+            plan.append((EXTRAPOLATED, size - 2, size - 1))
+        else:
+            plan.append((UNAVAILABLE, -1, -1))
+    return plan
+
+
+def _slerp_numpy(t0, lat0, lon0, t1, lat1, lon1, targets, frame_rate: float):
+    t0, t1, targets = np.asarray(t0), np.asarray(t1), np.asarray(targets)
+    # Longitudes en el marco de cálculo (inercial si frame_rate > 0), referidas a t0
+    lam0 = np.radians(np.asarray(lon0))
+    lam1 = np.radians(np.asarray(lon1) + frame_rate * (t1 - t0))
+    phi0, phi1 = np.radians(np.asarray(lat0)), np.radians(np.asarray(lat1))
+    a = np.stack([np.cos(phi0) * np.cos(lam0), np.cos(phi0) * np.sin(lam0), np.sin(phi0)])
+    b = np.stack([np.cos(phi1) * np.cos(lam1), np.cos(phi1) * np.sin(lam1), np.sin(phi1)])
+    omega = np.arctan2(np.linalg.norm(np.cross(a, b, axis=0), axis=0), np.sum(a * b, axis=0))
+    span = np.where(t1 > t0, t1 - t0, 1.0)
+    f = np.where(t1 > t0, (targets - t0) / span, 0.0)
+    moving = omega > 1e-12
+    sin_omega = np.where(moving, np.sin(omega), 1.0)
+    wa = np.where(moving, np.sin((1 - f) * omega) / sin_omega, 1 - f)
+    wb = np.where(moving, np.sin(f * omega) / sin_omega, f)
+    p = wa * a + wb * b
+    lat = np.degrees(np.arctan2(p[2], np.hypot(p[0], p[1])))
+    lon = np.degrees(np.arctan2(p[1], p[0])) - frame_rate * (targets - t0)
+    lon = (lon + 180.0) % 360.0 - 180.0
+    return lat.tolist(), lon.tolist()
+
+
+def _slerp_python(t0, lat0, lon0, t1, lat1, lon1, targets, frame_rate: float):
+    lats, lons = [], []
+    for ta, phi_a, lam_a, tb, phi_b, lam_b, target in zip(t0, lat0, lon0, t1, lat1, lon1, targets):
+        phi_a, phi_b = math.radians(phi_a), math.radians(phi_b)
+        lam_a, lam_b = math.radians(lam_a), math.radians(lam_b + frame_rate * (tb - ta))
+        a = (math.cos(phi_a) * math.cos(lam_a), math.cos(phi_a) * math.sin(lam_a), math.sin(phi_a))
+        b = (math.cos(phi_b) * math.cos(lam_b), math.cos(phi_b) * math.sin(lam_b), math.sin(phi_b))
+        cross = (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+        omega = math.atan2(math.sqrt(sum(c * c for c in cross)), sum(x * y for x, y in zip(a, b)))
+        f = (target - ta) / (tb - ta) if tb > ta else 0.0
+        if omega > 1e-12:
+            wa, wb = math.sin((1 - f) * omega) / math.sin(omega), math.sin(f * omega) / math.sin(omega)
+        else:
+            wa, wb = 1 - f, f
+        p = [wa * x + wb * y for x, y in zip(a, b)]
+        lon = math.degrees(math.atan2(p[1], p[0])) - frame_rate * (target - ta)
+        lats.append(math.degrees(math.atan2(p[2], math.hypot(p[0], p[1]))))
+        lons.append((lon + 180.0) % 360.0 - 180.0)
+    return lats, lons
+
+
+def estimate_positions(samples: Samples, targets: Sequence[float], orbital: bool) -> List[Dict[str, object]]:
+    """Posición estimada para cada instante (epoch en segundos), en el orden recibido."""
+    ts, lat, lon = samples
+    max_extrapolation = (settings.ISS_EXTRAPOLATION_MAX_SECONDS if orbital
+                         else settings.POSITION_EXTRAPOLATION_MAX_SECONDS)
+    plan = _plan(ts, targets, max_extrapolation)
+    computed = [k for k, (method, _, _) in enumerate(plan) if method in (INTERPOLATED, EXTRAPOLATED)]
+    if computed:
+        pairs = [plan[k] for k in computed]
+        slerp = _slerp_numpy if np is not None else _slerp_python
+        lats, lons = slerp(
+            [ts[i] for _, i, _ in pairs], [lat[i] for _, i, _ in pairs], [lon[i] for _, i, _ in pairs],
+            [ts[j] for _, _, j in pairs], [lat[j] for _, _, j in pairs], [lon[j] for _, _, j in pairs],
+            [targets[k] for k in computed], EARTH_ROTATION_DEG_PER_SECOND if orbital else 0.0,
+        )
+        positions = dict(zip(computed, zip(lats, lons)))
+    else:
+        positions = {}
+
+    results = []
+    for k, (method, i, j) in enumerate(plan):
+        if method == SAMPLE:
+            latitude, longitude = lat[i], lon[i]
+        elif method == UNAVAILABLE:
+            latitude = longitude = None
+        else:
+            latitude, longitude = positions[k]
+        results.append({
+            "latitude": latitude,
+            "longitude": longitude,
+            "method": method,
+            # Distancia temporal a la muestra más cercana usada: indica la calidad de la estimación
+            "nearest_sample_seconds": None if method == UNAVAILABLE else min(abs(targets[k] - ts[i]), abs(targets[k] - ts[j])),
+        })
+    return results
+
+
+async def load_samples(unit_id: str, first: float, last: float) -> Optional[Samples]:
+    """
+    Muestras que cubren [first, last]: la trayectoria en memoria si su ventana llega hasta `first`;
+    si no, el histórico de la BD alrededor del rango completado con los puntos más recientes de la
+    trayectoria (el histórico se escribe en lotes y puede ir unos segundos por detrás).
+    """
+    track = unit_tracks.get(unit_id) if settings.TRACK_ENABLED else None
+    window = track.window() if track is not None and len(track) else None
+    if window is not None and window["ts"][0] <= first:
+        return window["ts"], window["lat"], window["lon"]
+
+    margin = settings.POSITION_MAX_GAP_SECONDS
+    rows = await async_session.get_history(
+        unit_id=unit_id, from_ts=first - margin, to_ts=last + margin,
+        step_seconds=None, limit=settings.HISTORY_MAX_POINTS,
+    )
+    ts, lat, lon = array("d"), array("d"), array("d")
+    for row in rows:
+        timestamp = datetime.datetime.fromisoformat(row["timestamp"]).timestamp()
+        if not ts or timestamp > ts[-1]:
+            ts.append(timestamp)
+            lat.append(row["latitude"])
+            lon.append(row["longitude"])
+    if window is not None:
+        start = bisect.bisect_right(window["ts"], ts[-1]) if ts else 0
+        ts.extend(window["ts"][start:])
+        lat.extend(window["lat"][start:])
+        lon.extend(window["lon"][start:])
+    return (ts, lat, lon) if ts else None
+
+
+async def estimate_unit_positions(unit_id: str, targets: Sequence[float]) -> Optional[List[Dict[str, object]]]:
+    """None si no hay ninguna muestra de la unidad cerca de los instantes pedidos."""
+    samples = await load_samples(unit_id, min(targets), max(targets))
+    if samples is None:
+        return None
+    return estimate_positions(samples, targets, orbital=unit_id in ORBITAL_UNITS)
@@ -0,0 +1,53 @@
+# ws_espacial/app/services/readiness.py
+"""
+Estado de arranque del proceso para /healthz (vivo) y /readyz (listo para recibir tráfico).
+
+El proceso está listo cuando la BD está inicializada y hay datos iniciales: el caché se precargó
+con unidades desde la BD, o terminó la primera ronda de sondeo (o se aplicó el primer snapshot en
+un seguidor). Si no llegan datos en READY_INITIAL_DATA_TIMEOUT_SECONDS (fuente caída en un
+despliegue nuevo) se declara listo igualmente, para no bloquear el despliegue. Al empezar el
+apagado deja de estar listo.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+DATABASE = "database"
+INITIAL_DATA = "initial_data"
+
+
+class Readiness:
+    def __init__(self):
+        self._checks: Dict[str, bool] = {DATABASE: False, INITIAL_DATA: False}
+        self._started_at: Optional[float] = None
+        self.shutting_down = False
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        self.shutting_down = False
+        for name in self._checks:
+            self._checks[name] = False
+
+    def mark(self, name: str) -> None:
+        self._checks[name] = True
+
+    def _initial_data_timed_out(self) -> bool:
+        return (self._started_at is not None
+                and time.monotonic() - self._started_at >= settings.READY_INITIAL_DATA_TIMEOUT_SECONDS)
+
+    def status(self) -> Dict[str, object]:
+        checks = dict(self._checks)
+        if not checks[INITIAL_DATA] and checks[DATABASE] and self._initial_data_timed_out():
+            checks[INITIAL_DATA] = True
+        ready = all(checks.values()) and not self.shutting_down
+        return {"ready": ready, "shutting_down": self.shutting_down, "checks": checks}
+
+
+readiness = Readiness()
+
+
+def stopped_tasks(tasks: List[asyncio.Task]) -> List[str]:
+    """Tareas de fondo que terminaron sin haber sido canceladas (todas son bucles sin fin)."""
+    return [task.get_name() for task in tasks if task.done() and not task.cancelled()]
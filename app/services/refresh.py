@@ -0,0 +1,121 @@
+# ws_espacial/app/services/refresh.py
+"""
+Refresco bajo demanda de una unidad cuando sus datos son más antiguos de lo que pide el cliente.
+
+Las peticiones concurrentes para la misma fuente comparten una única consulta en curso
+(singleflight): la primera la lanza y las demás esperan su resultado. Además, entre dos consultas
+a una misma fuente pasan al menos REFRESH_MIN_INTERVAL_SECONDS, contando también las del poller
+periódico; con varios workers la separación se garantiza con una concesión en la BD por fuente, que
+ocupan tanto los refrescos como el sondeo periódico del líder (data_poller.record_shared_fetch).
+Si la consulta no se permite o falla, la petición sigue adelante con los datos que haya.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import ONDEMAND_REFRESH_REQUESTS
+from app.db import async_session
+from app.services import data_poller
+from app.services.sources import PollSource, load_sources
+
+logger = logging.getLogger(__name__)
+
+# Resultado de refresh() (también es la etiqueta "outcome" de la métrica)
+FETCHED = "fetched" # Esta petición lanzó la consulta y tuvo éxito
+COALESCED = "coalesced" # Se unió a una consulta ya en curso
+THROTTLED = "throttled" # La última consulta a la fuente es demasiado reciente
+FAILED = "failed" # La consulta falló (los detalles quedan en el log del poller)
+UNSUPPORTED = "unsupported" # Ninguna fuente configurada describe esa unidad
+
+
+class SingleFlight:
+    """
+    Agrupa las llamadas concurrentes con la misma clave en una sola ejecución. La ejecución es una
+    tarea independiente: si un llamante se cancela (p. ej. el cliente se desconecta), los demás
+    siguen esperándola.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Resultado de func() y si se compartió con una ejecución ya en curso."""
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(func())
+            call.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(call), shared
+
+    def _finished(self, key: str, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            call.exception() # Marca la excepción como leída aunque ya no quede nadie esperando
+
+
+class OnDemandRefresher:
+    def __init__(self, min_interval_seconds: float):
+        self.min_interval_seconds = min_interval_seconds
+        self._flights = SingleFlight()
+        self._holder_prefix = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._sources: Optional[Dict[str, PollSource]] = None
+
+    def source_for(self, unit_id: str) -> Optional[PollSource]:
+        """Fuente que trae esa unidad: la de una sola unidad con ese unit_id, o la que la mapea."""
+        if self._sources is None:
+            sources: Dict[str, PollSource] = {}
+            for source in load_sources():
+                for mapped in [source.unit_id, *source.unit_id_map.values()]:
+                    if mapped:
+                        sources.setdefault(mapped, source)
+            self._sources = sources
+        return self._sources.get(unit_id)
+
+    async def refresh(self, unit_id: str) -> str:
+        """Consulta la fuente de la unidad (o se une a la consulta en curso). Devuelve el resultado."""
+        source = self.source_for(unit_id)
+        if source is None:
+            outcome = UNSUPPORTED
+        else:
+            outcome, shared = await self._flights.do(source.name, lambda: self._fetch(source))
+            if shared:
+                outcome = COALESCED
+        ONDEMAND_REFRESH_REQUESTS.labels(outcome).inc()
+        return outcome
+
+    async def _fetch(self, source: PollSource) -> str:
+        now = time.monotonic()
+        last = data_poller.last_fetch_started(source.name)
+        if last is not None and now - last < self.min_interval_seconds:
+            return THROTTLED
+        if settings.WORKER_COORDINATION_ENABLED and not await self._acquire_slot(source):
+            return THROTTLED
+        ok = await data_poller.poll_source_once(source)
+        return FETCHED if ok else FAILED
+
+    async def _acquire_slot(self, source: PollSource) -> bool:
+        # Concesión de un solo uso (titular nuevo cada vez): nadie, ni este worker, la renueva
+        # hasta que caduque, así que otra consulta a la fuente espera min_interval_seconds.
+        now = time.time()
+        try:
+            return await async_session.try_acquire_lease(
+                data_poller.fetch_lease_name(source.name), f"{self._holder_prefix}:{uuid.uuid4().hex[:8]}",
+                now=now, expires_at=now + self.min_interval_seconds,
+            )
+        except Exception as e:
+            logger.warning("No se pudo reservar el refresco de la fuente '%s': %s", source.name, e)
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": self._flights.in_flight(), "min_interval_seconds": self.min_interval_seconds}
+
+
+on_demand_refresher = OnDemandRefresher(min_interval_seconds=settings.REFRESH_MIN_INTERVAL_SECONDS)
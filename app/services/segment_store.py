@@ -0,0 +1,144 @@
+# ws_espacial/app/services/segment_store.py
+"""
+Segmentos columnares del histórico: sellado periódico y exportación sin copias.
+
+El líder sella cada intervalo de HISTORY_SEGMENT_SECONDS ya cerrado (más un margen para los puntos
+tardíos) en un archivo inmutable con el formato de app.db.segments, y lo registra en
+history_segments. La exportación de una unidad mapea los archivos en memoria y envía las rebanadas
+de sus columnas tal cual; solo el tramo reciente, aún sin sellar, se lee de SQLite.
+
+Los puntos que llegan a un intervalo ya sellado quedan solo en la tabla de histórico.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db import async_session
+from app.db.segments import Buffer, Segment, open_segments, write_segment_file
+
+logger = logging.getLogger(__name__)
+
+
+def segments_dir() -> str:
+    return settings.HISTORY_SEGMENTS_DIR or os.path.join(settings.SQLITE_INSTANCE_DIR, "segments")
+
+
+def _file_name(start_ts: float, end_ts: float) -> str:
+    return f"{int(start_ts)}-{int(end_ts)}.seg"
+
+
+async def roll_next_segment(now: Optional[float] = None) -> Optional[dict]:
+    """Sella el siguiente intervalo cerrado con datos. Devuelve su registro, o None si no hay ninguno."""
+    now = time.time() if now is None else now
+    span = settings.HISTORY_SEGMENT_SECONDS
+    next_ts = await async_session.get_next_history_ts(await async_session.get_last_history_segment_end())
+    if next_ts is None:
+        return None
+    start_ts = float(int(next_ts // span) * span)
+    end_ts = start_ts + span
+    if end_ts > now - settings.HISTORY_SEGMENT_SEAL_DELAY_SECONDS:
+        return None
+    builder = await async_session.get_history_columns(start_ts, end_ts)
+    directory = segments_dir()
+    file_name = _file_name(start_ts, end_ts)
+    parts = builder.frame_parts(start_ts, end_ts)
+
+    def write() -> int:
+        os.makedirs(directory, exist_ok=True)
+        return write_segment_file(os.path.join(directory, file_name), parts)
+
+    # El archivo se escribe antes de registrarlo: un registro siempre apunta a un archivo completo
+    size = await asyncio.get_running_loop().run_in_executor(None, write)
+    await async_session.insert_history_segment(start_ts, end_ts, file_name, len(builder.units), builder.rows, size)
+    return {"start_ts": start_ts, "end_ts": end_ts, "file_name": file_name,
+            "units": len(builder.units), "row_count": builder.rows, "size_bytes": size}
+
+
+async def expire_segments(now: Optional[float] = None) -> int:
+    """Borra los segmentos más antiguos que HISTORY_MAX_AGE_DAYS (la misma retención que el histórico)."""
+    if settings.HISTORY_MAX_AGE_DAYS <= 0:
+        return 0
+    now = time.time() if now is None else now
+    file_names = await async_session.delete_history_segments_before(now - settings.HISTORY_MAX_AGE_DAYS * 86400)
+    for file_name in file_names:
+        segment_cache.discard(file_name)
+        try:
+            os.remove(os.path.join(segments_dir(), file_name))
+        except FileNotFoundError:
+            pass
+    return len(file_names)
+
+
+async def segment_roll_loop() -> None:
+    """Tarea del líder: sella los intervalos pendientes (todos seguidos si va con retraso) y aplica la retención."""
+    while True:
+        try:
+            while (segment := await roll_next_segment()) is not None:
+                logger.info("Segmento sellado: %s (%d unidades, %d puntos, %d bytes).", segment["file_name"],
+                            segment["units"], segment["row_count"], segment["size_bytes"])
+                await asyncio.sleep(0) # Cede el event loop entre segmentos al ponerse al día
+            expired = await expire_segments()
+            if expired:
+                logger.info("Segmentos expirados: %d.", expired)
+        except Exception as e:
+            logger.exception("Error al sellar los segmentos del histórico: %s", e)
+        await asyncio.sleep(settings.HISTORY_SEGMENT_ROLL_INTERVAL_SECONDS)
+
+
+class SegmentCache:
+    """
+    Segmentos abiertos (mapeados en memoria), LRU. Al descartar uno no se cierra el mmap: una
+    exportación en curso puede tener aún rebanadas suyas, y se libera al soltarlas.
+    """
+
+    def __init__(self, max_files: int):
+        self._max_files = max_files
+        self._segments: "OrderedDict[str, Segment]" = OrderedDict()
+
+    def get(self, file_name: str) -> Segment:
+        segment = self._segments.get(file_name)
+        if segment is not None:
+            self._segments.move_to_end(file_name)
+            return segment
+        segment = open_segments(os.path.join(segments_dir(), file_name))[0]
+        self._segments[file_name] = segment
+        while len(self._segments) > self._max_files:
+            self._segments.popitem(last=False)
+        return segment
+
+    def discard(self, file_name: str) -> None:
+        self._segments.pop(file_name, None)
+
+
+segment_cache = SegmentCache(max_files=settings.HISTORY_SEGMENT_OPEN_FILES)
+
+
+async def export_unit_parts(unit_id: str, from_ts: Optional[float], to_ts: Optional[float]) -> List[Buffer]:
+    """
+    Frames de la unidad en [from_ts, to_ts): uno por segmento sellado (rebanadas del mmap) y uno
+    con el tramo posterior al último segmento, leído de la BD. Lista vacía si no hay puntos.
+    """
+    parts: List[Buffer] = []
+    for row in await async_session.get_history_segments(from_ts, to_ts):
+        try:
+            segment = segment_cache.get(row["file_name"])
+        except FileNotFoundError:
+            continue # Expirado entre la consulta y la apertura
+        parts.extend(segment.unit_frame_parts(unit_id, from_ts, to_ts))
+
+    sealed_until = await async_session.get_last_history_segment_end()
+    tail_from = max(ts for ts in (from_ts, sealed_until, float("-inf")) if ts is not None)
+    tail_to = to_ts if to_ts is not None else float("inf")
+    if tail_from < tail_to:
+        builder = await async_session.get_history_columns(tail_from, tail_to, [unit_id])
+        if builder.rows:
+            # Límites finitos en los metadatos: sin rango pedido, los del propio tramo
+            parts.extend(builder.frame_parts(
+                tail_from if from_ts is not None or sealed_until is not None else builder.ts[0],
+                to_ts if to_ts is not None else builder.ts[-1] + 1e-6,
+            ))
+    return parts
@@ -0,0 +1,174 @@
+# ws_espacial/app/services/snapshot.py
+"""
+Snapshot compartido de las últimas posiciones, publicado por el worker líder para los demás.
+
+El líder escribe el fichero completo en un temporal y lo renombra (os.replace), de modo que un
+lector nunca ve un fichero a medias. Los seguidores detectan el cambio con os.stat (sin BD),
+lo mapean en memoria (mmap), verifican la suma de comprobación y aplican solo las unidades cuyo
+timestamp cambió.
+
+Formato: cabecera "<8sQQI" (magia, generación, longitud del cuerpo, CRC32 del cuerpo) seguida de
+un array JSON de [unit_id, latitude, longitude, timestamp_iso, sensors].
+"""
+import asyncio
+import datetime
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.core.config import settings
+from app.core.serialization import dumps, loads
+from app.db import async_session
+from app.models.unit import UnitData
+from app.services import unit_store
+from app.services.readiness import INITIAL_DATA, readiness
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WSESNAP1"
+HEADER = struct.Struct("<8sQQI")
+ABSORB_BATCH_ROWS = 5000 # Filas leídas por consulta al recoger los cambios de otros workers
+
+
+def snapshot_path() -> str:
+    return settings.SNAPSHOT_FILE or os.path.join(settings.SQLITE_INSTANCE_DIR, "units_snapshot.bin")
+
+
+def write_snapshot(path: str, generation: int, units: List[UnitData]) -> int:
+    """Serializa y publica el snapshot de forma atómica. Devuelve el tamaño del cuerpo."""
+    body = dumps([[u.unit_id, u.latitude, u.longitude, u.timestamp.isoformat(), u.sensors] for u in units])
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, generation, len(body), zlib.crc32(body)))
+        f.write(body)
+    os.replace(tmp_path, path)
+    return len(body)
+
+
+def read_snapshot(path: str) -> Optional[Tuple[int, list]]:
+    """Lee el snapshot mapeándolo en memoria. None si no existe o está incompleto/corrupto."""
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < HEADER.size:
+                    return None
+                magic, generation, length, crc = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or len(mm) < HEADER.size + length:
+                    return None
+                body = mm[HEADER.size:HEADER.size + length]
+    except (FileNotFoundError, ValueError):
+        return None # ValueError: fichero vacío (no se puede mapear)
+    if zlib.crc32(body) != crc:
+        return None
+    return generation, loads(body)
+
+
+def _db_timestamp(epoch_seconds: float) -> str:
+    # Mismo formato que CURRENT_TIMESTAMP de SQLite (UTC, resolución de segundos)
+    return datetime.datetime.fromtimestamp(epoch_seconds, tz=datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SnapshotPublisher:
+    """
+    Lado del líder: recoge las filas escritas por otros workers (ingesta) y publica el snapshot
+    cuando cambia la versión del caché.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._watermark: Optional[int] = None # Último change_seq recogido (exclusivo)
+        self._published_version: Optional[int] = None
+        self.published = 0
+        self.absorbed = 0
+
+    async def absorb_db_changes(self) -> int:
+        """
+        Recoge las filas con change_seq posterior a la marca de agua. La marca es exclusiva, así que
+        cada fila se lee una vez; las que escribió este mismo worker ya están en el caché con el mismo
+        timestamp y apply_external_units las ignora (sin volver a difundirlas).
+        """
+        if self._watermark is None:
+            # Al asumir el liderazgo se relee un margen hacia atrás por si el líder anterior no llegó a publicar
+            since = _db_timestamp(time.time() - settings.LEADER_LEASE_SECONDS - 2)
+            self._watermark = await async_session.get_change_seq_before(since)
+        applied = 0
+        while True:
+            rows, _ = await async_session.get_iss_data_changes(since=self._watermark, limit=ABSORB_BATCH_ROWS)
+            if not rows:
+                break
+            self._watermark = rows[-1]["change_seq"]
+            for row in rows:
+                del row["change_seq"]
+            applied += unit_store.apply_external_units([UnitData(**row) for row in rows])
+            if len(rows) < ABSORB_BATCH_ROWS:
+                break
+        self.absorbed += applied
+        return applied
+
+    async def publish_if_changed(self) -> bool:
+        version = unit_data_cache.version
+        if version == self._published_version:
+            return False
+        units = unit_data_cache.peek_all()
+        # Serializar la flota completa es CPU: fuera del event loop
+        await asyncio.get_running_loop().run_in_executor(None, write_snapshot, self.path, version, units)
+        self._published_version = version
+        self.published += 1
+        return True
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.absorb_db_changes()
+                await self.publish_if_changed()
+            except Exception as e:
+                logger.exception("Error al publicar el snapshot de unidades: %s", e)
+            await asyncio.sleep(settings.SNAPSHOT_INTERVAL_SECONDS)
+
+
+class SnapshotFollower:
+    """Lado de los seguidores: aplica el snapshot del líder al caché local sin consultar la BD."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file_key: Optional[Tuple[int, int, int]] = None
+        self._applied: Dict[str, str] = {} # unit_id -> timestamp ISO ya aplicado
+        self.generation: Optional[int] = None
+        self.loads = 0
+
+    async def poll(self) -> int:
+        """Aplica el snapshot si el fichero cambió. Devuelve cuántas unidades se actualizaron."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+        file_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_key == self._file_key:
+            return 0
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, read_snapshot, self.path)
+        if snapshot is None:
+            return 0
+        self._file_key = file_key
+        self.generation, rows = snapshot
+        changed = []
+        for unit_id, latitude, longitude, timestamp, sensors in rows:
+            # Solo se validan (pydantic) las unidades cuyo timestamp cambió desde el último snapshot
+            if self._applied.get(unit_id) != timestamp:
+                self._applied[unit_id] = timestamp
+                changed.append(UnitData(unit_id=unit_id, latitude=latitude, longitude=longitude,
+                                        timestamp=timestamp, sensors=sensors))
+        self.loads += 1
+        applied = unit_store.apply_external_units(changed)
+        readiness.mark(INITIAL_DATA)
+        return applied
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.exception("Error al leer el snapshot de unidades: %s", e)
+            await asyncio.sleep(settings.SNAPSHOT_INTERVAL_SECONDS)
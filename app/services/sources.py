@@ -0,0 +1,136 @@
+# ws_espacial/app/services/sources.py
+"""
+Registro de fuentes de datos externas que consulta el poller.
+Cada fuente indica URL, parser, intervalo, timeout y (opcionalmente) cómo mapear
+los identificadores de la fuente a nuestros unit_id.
+"""
+import datetime
+import json
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.unit import UnitData, UnitDataInput
+
+logger = logging.getLogger(__name__)
+
+ISS_UNIT_ID = "ISS-001"
+
+# Elementos descartados por fuente (inválidos dentro de una respuesta por lo demás correcta)
+skipped_items: Dict[str, int] = {}
+
+
+class SourceParseError(ValueError):
+    """La respuesta de la fuente no tiene el formato esperado."""
+
+
+@dataclass
+class PollSource:
+    name: str
+    url: str
+    parser: str
+    interval_seconds: float = field(default_factory=lambda: float(settings.POLLING_INTERVAL_SECONDS))
+    timeout_seconds: float = field(default_factory=lambda: settings.POLL_DEFAULT_TIMEOUT_SECONDS)
+    unit_id: Optional[str] = None # Para fuentes que describen una sola unidad
+    unit_id_map: Dict[str, str] = field(default_factory=dict) # id en la fuente -> unit_id propio
+
+    def map_unit_id(self, upstream_id: str) -> str:
+        return self.unit_id_map.get(upstream_id, upstream_id)
+
+
+SourceParser = Callable[[Any, PollSource], List[UnitData]]
+PARSERS: Dict[str, SourceParser] = {}
+
+
+def register_parser(name: str) -> Callable[[SourceParser], SourceParser]:
+    def decorator(func: SourceParser) -> SourceParser:
+        PARSERS[name] = func
+        return func
+    return decorator
+
+
+def _parse_timestamp(value: Any) -> datetime.datetime:
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+    if isinstance(value, str):
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+    raise SourceParseError(f"Timestamp no reconocido: {value!r}")
+
+
+@register_parser("open_notify_iss")
+def parse_open_notify_iss(payload: Any, source: PollSource) -> List[UnitData]:
+    """Formato de http://api.open-notify.org/iss-now.json"""
+    if payload.get("message") != "success":
+        raise SourceParseError(f"La API de la ISS no reportó éxito. Mensaje: {payload.get('message')}")
+    position = payload.get("iss_position", {})
+    timestamp_unix = payload.get("timestamp")
+    if not all([position.get("latitude"), position.get("longitude"), timestamp_unix is not None]):
+        raise SourceParseError(f"Datos incompletos de la API de la ISS: {payload}")
+    return [UnitDataInput(
+        unit_id=source.unit_id or ISS_UNIT_ID,
+        latitude=float(position["latitude"]),
+        longitude=float(position["longitude"]),
+        timestamp=_parse_timestamp(timestamp_unix),
+        sensors={
+            "altitude_km": round(random.uniform(390, 430), 2),
+            "velocity_kmh": round(random.uniform(27500, 28000), 0)
+        }
+    )]
+
+
+@register_parser("units_json")
+def parse_units_json(payload: Any, source: PollSource) -> List[UnitData]:
+    """
+    Formato genérico: lista de objetos (o {"units": [...]}) con
+    id/unit_id, latitude, longitude, timestamp (unix o ISO 8601) y sensors opcional.
+    Un elemento inválido se descarta (y se cuenta) sin perder el resto; solo una respuesta
+    sin la forma esperada lanza SourceParseError.
+    """
+    items = payload.get("units") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        raise SourceParseError("Se esperaba una lista de unidades.")
+    units = []
+    skipped = 0
+    for index, item in enumerate(items):
+        try:
+            upstream_id = item.get("unit_id") or item.get("id")
+            if upstream_id is None:
+                raise SourceParseError("unidad sin identificador")
+            units.append(UnitDataInput(
+                unit_id=source.map_unit_id(str(upstream_id)),
+                latitude=float(item["latitude"]),
+                longitude=float(item["longitude"]),
+                timestamp=_parse_timestamp(item["timestamp"]),
+                sensors=item.get("sensors") or {},
+            ))
+        except (AttributeError, KeyError, TypeError, ValueError) as e: # ValidationError y SourceParseError son ValueError
+            skipped += 1
+            logger.debug("Fuente '%s': elemento %d descartado (%s): %r", source.name, index, e, item)
+    if skipped:
+        skipped_items[source.name] = skipped_items.get(source.name, 0) + skipped
+        logger.warning("Fuente '%s': %d de %d elemento(s) inválido(s) descartado(s).", source.name, skipped, len(items),
+                       extra={"source": source.name, "skipped": skipped})
+    return units
+
+
+def default_iss_source() -> PollSource:
+    return PollSource(name="iss", url=settings.ISS_API_URL, parser="open_notify_iss", unit_id=ISS_UNIT_ID)
+
+
+def load_sources() -> List[PollSource]:
+    """
+    Fuentes configuradas: la ISS por defecto, más las definidas en POLL_SOURCES_FILE
+    (lista JSON de objetos con los campos de PollSource).
+    """
+    sources = [default_iss_source()] if settings.POLL_ISS_ENABLED else []
+    if settings.POLL_SOURCES_FILE:
+        with open(settings.POLL_SOURCES_FILE, encoding="utf-8") as f:
+            for entry in json.load(f):
+                source = PollSource(**entry)
+                if source.parser not in PARSERS:
+                    raise ValueError(f"Parser desconocido '{source.parser}' en la fuente '{source.name}'.")
+                sources.append(source)
+    return sources
@@ -0,0 +1,155 @@
+# ws_espacial/app/services/unit_store.py
+"""
+Ruta única de escritura/lectura de los datos de unidades.
+Escribe en SQLite, actualiza el caché en memoria (write-through) y difunde la
+actualización a los suscriptores de streaming; las lecturas se sirven desde el caché y solo recurren a la BD si este no tiene el dato.
+"""
+import datetime
+import json
+from typing import Dict, Iterable, List, Optional
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.cache.spatial_index import unit_spatial_index
+from app.cache.track_buffer import unit_tracks
+from app.core.config import settings
+from app.db import async_session
+from app.models.unit import UnitData
+from app.services.broadcaster import unit_broadcaster
+from app.services.geofence import geofence_engine
+from app.services.history import record_history
+
+
+async def store_unit_data(unit: UnitData) -> None:
+    """Persiste los datos de una unidad (último valor e histórico), actualiza el caché y notifica a los suscriptores."""
+    await store_units([unit])
+
+
+def _normalize_timestamp(unit: UnitData) -> UnitData:
+    """Timestamps siempre en UTC con zona horaria (los naive se interpretan como UTC)."""
+    timestamp = unit.timestamp
+    if timestamp.tzinfo is None:
+        return unit.model_copy(update={"timestamp": timestamp.replace(tzinfo=datetime.timezone.utc)})
+    if timestamp.utcoffset() != datetime.timedelta(0):
+        return unit.model_copy(update={"timestamp": timestamp.astimezone(datetime.timezone.utc)})
+    return unit
+
+
+async def store_units(units: List[UnitData]) -> None:
+    """
+    Como store_unit_data, para un lote: una sola transacción en la BD para todas las unidades.
+    Todas las muestras van al histórico; la tabla de último valor, el caché y los suscriptores
+    solo reciben la muestra más reciente de cada unidad (las llegadas fuera de orden no retroceden).
+    """
+    if not units:
+        return
+    units = [_normalize_timestamp(unit) for unit in units]
+    latest: Dict[str, UnitData] = {}
+    for unit in units:
+        current = latest.get(unit.unit_id)
+        if current is None or unit.timestamp >= current.timestamp:
+            latest[unit.unit_id] = unit
+
+    await async_session.upsert_iss_data_many([
+        (unit.unit_id, unit.latitude, unit.longitude, unit.timestamp.isoformat(), json.dumps(unit.sensors))
+        for unit in latest.values()
+    ])
+    _apply_latest(latest.values())
+    if settings.TRACK_ENABLED:
+        unit_tracks.append_many(sorted(units, key=lambda unit: unit.timestamp))
+    for unit in units:
+        await record_history(unit)
+
+
+def _apply_latest(units: Iterable[UnitData], strict: bool = False) -> List[UnitData]:
+    """
+    Actualiza caché, índice espacial y suscriptores con las unidades que no son más antiguas que las
+    cacheadas (con `strict`, solo las estrictamente más recientes). Devuelve las que se aplicaron.
+    """
+    fresh = []
+    for unit in units:
+        cached = unit_data_cache.peek(unit.unit_id)
+        if cached is None or cached.timestamp < unit.timestamp or (not strict and cached.timestamp == unit.timestamp):
+            fresh.append(unit)
+    unit_spatial_index.upsert_many((unit.unit_id, unit.latitude, unit.longitude) for unit in fresh)
+    for unit in fresh:
+        unit_data_cache.set(unit.unit_id, unit)
+        unit_broadcaster.publish(unit)
+    if geofence_engine.active:
+        geofence_engine.evaluate(fresh)
+    return fresh
+
+
+def apply_external_units(units: List[UnitData]) -> int:
+    """
+    Incorpora unidades ya persistidas por otro proceso (snapshot del líder o filas escritas por otro
+    worker): actualiza caché, índice y suscriptores, sin tocar la BD ni el histórico.
+    La comparación es estricta: una unidad con el mismo timestamp que la cacheada ya se aplicó
+    (por ejemplo, la escribió este mismo worker) y no se vuelve a difundir ni a evaluar.
+    Devuelve cuántas eran más recientes que las cacheadas.
+    """
+    latest: Dict[str, UnitData] = {}
+    for unit in map(_normalize_timestamp, units):
+        current = latest.get(unit.unit_id)
+        if current is None or unit.timestamp >= current.timestamp:
+            latest[unit.unit_id] = unit
+    fresh = _apply_latest(latest.values(), strict=True)
+    if settings.TRACK_ENABLED:
+        unit_tracks.append_many(fresh)
+    return len(fresh)
+
+
+async def get_unit_data(unit_id: str) -> Optional[UnitData]:
+    """
+    Lee una unidad desde el caché; si no está, la busca en la BD y la guarda en el caché.
+    Con coordinación entre workers y el caché completo, un fallo significa que la unidad no existe:
+    todas las escrituras pasan por el caché de este proceso o llegan por el snapshot del líder.
+    """
+    cached = unit_data_cache.get(unit_id)
+    if cached is not None:
+        return cached
+    if settings.WORKER_COORDINATION_ENABLED and unit_data_cache.is_loaded():
+        return None
+    row = await async_session.get_iss_data_by_id(unit_id=unit_id)
+    if row is None:
+        return None
+    unit = UnitData(**row)
+    unit_data_cache.set(unit.unit_id, unit)
+    unit_spatial_index.upsert(unit.unit_id, unit.latitude, unit.longitude)
+    return unit
+
+
+async def get_units_data(unit_ids: List[str]) -> Dict[str, UnitData]:
+    """
+    Como get_unit_data, para una lista de unit_id (sin repetidos): las que faltan en el caché se
+    leen de la BD con consultas IN por bloques y se guardan en el caché. Las que no existen no aparecen.
+    """
+    found = unit_data_cache.get_many(unit_ids)
+    missing = [unit_id for unit_id in unit_ids if unit_id not in found]
+    if not missing or (settings.WORKER_COORDINATION_ENABLED and unit_data_cache.is_loaded()):
+        return found
+    rows = await async_session.get_iss_data_by_ids(missing, chunk_size=settings.UNITS_BATCH_CHUNK_SIZE)
+    for row in rows:
+        unit = UnitData(**row)
+        unit_data_cache.set(unit.unit_id, unit)
+        unit_spatial_index.upsert(unit.unit_id, unit.latitude, unit.longitude)
+        found[unit.unit_id] = unit
+    return found
+
+
+async def get_all_unit_data() -> List[UnitData]:
+    """Lee todas las unidades desde el caché; si aún no está completo, hace la carga desde la BD."""
+    cached = unit_data_cache.get_all()
+    if cached is not None:
+        return cached
+    await warm_cache_from_db()
+    return unit_data_cache.get_all() or []
+
+
+async def warm_cache_from_db() -> int:
+    """Carga en el caché todas las filas de iss_data. Devuelve el número de unidades cargadas."""
+    rows = await async_session.get_all_iss_data_from_db()
+    units = [UnitData(**row) for row in rows]
+    unit_data_cache.load(units)
+    # El índice se construye desde el caché: así respeta los datos más recientes que conserve
+    unit_spatial_index.upsert_many((u.unit_id, u.latitude, u.longitude) for u in unit_data_cache.peek_all())
+    return len(units)
@@ -0,0 +1,88 @@
+# ws_espacial/benchmarks/app_server.py
+"""
+Arranque de la aplicación con uvicorn para los benchmarks (un único worker):
+  - running_app: dentro del proceso del benchmark (comparte el event loop con el cliente).
+  - app_subprocess: en un proceso aparte, para que el generador de carga no compita con el servidor.
+La configuración (variables de entorno) debe fijarse antes de llamarlos.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+import httpx
+import uvicorn
+
+
+@asynccontextmanager
+async def running_app(port: int, host: str = "127.0.0.1") -> AsyncIterator[str]:
+    """Levanta la app (con su startup/shutdown) y devuelve la URL base mientras dura el bloque."""
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(
+        app, host=host, port=port, log_level="warning", ws="websockets", backlog=4096,
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result() # Propaga el error de arranque
+        await asyncio.sleep(0.05)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+@asynccontextmanager
+async def app_subprocess(port: int, host: str = "127.0.0.1", startup_timeout: float = 30.0) -> AsyncIterator[str]:
+    """Lanza `uvicorn app.main:app` en un proceso hijo (hereda el entorno) y espera a que responda."""
+    base_url = f"http://{host}:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", host, "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096"],
+        env=dict(os.environ),
+    )
+    try:
+        await _wait_until_ready(base_url, process, startup_timeout)
+        yield base_url
+    finally:
+        process.terminate() # SIGTERM: uvicorn ejecuta el shutdown de la app
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@asynccontextmanager
+async def module_subprocess(module: str, args: List[str], ready_url: str, startup_timeout: float = 15.0) -> AsyncIterator[None]:
+    """Lanza `python -m <module> <args>` (p. ej. benchmarks.fake_upstream) y espera a que responda ready_url."""
+    process = subprocess.Popen([sys.executable, "-m", module, *args], env=dict(os.environ), stdout=subprocess.DEVNULL)
+    try:
+        await _wait_until_ready(ready_url, process, startup_timeout)
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    last_error: Optional[Exception] = None
+    async with httpx.AsyncClient(timeout=2) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"El proceso terminó durante el arranque (código {process.returncode}).")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError as e:
+                last_error = e
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} no respondió en {timeout} s: {last_error}")
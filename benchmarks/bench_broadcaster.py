@@ -0,0 +1,180 @@
+# ws_espacial/benchmarks/bench_broadcaster.py
+"""
+Prueba de carga del broadcaster de streaming.
+
+Modos:
+  - inprocess: N suscriptores como corrutinas en el mismo loop (coste puro del fan-out).
+  - websocket: levanta la app con uvicorn en este proceso (un único worker) y abre N
+               conexiones WebSocket reales a /api/v1/client/units/stream.
+
+En ambos casos se publican --updates actualizaciones a --rate por segundo y se mide la
+latencia publicación→recepción (p50/p95/p99), los mensajes perdidos y los clientes descartados.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_broadcaster --mode inprocess --subscribers 1000 10000 50000
+    python -m benchmarks.bench_broadcaster --mode websocket --subscribers 500 2000
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_stream_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+os.environ.setdefault("STREAM_HEARTBEAT_SECONDS", "5")
+os.environ.setdefault("POLLING_INTERVAL_SECONDS", "3600")
+os.environ.setdefault("ISS_API_URL", "http://127.0.0.1:9/unused")
+# Todas las conexiones salen de la misma IP: sin límites de suscripciones ni de tasa por IP
+os.environ.setdefault("STREAM_MAX_SUBSCRIBERS", "0")
+os.environ.setdefault("STREAM_MAX_SUBSCRIBERS_PER_CLIENT", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+from app.models.unit import UnitData  # noqa: E402
+from app.services.broadcaster import HEARTBEAT, unit_broadcaster  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def make_update(seq: int) -> UnitData:
+    # El instante de publicación viaja en los sensores para medir la latencia en el receptor
+    return UnitData(
+        unit_id="ISS-001", latitude=float(seq % 90), longitude=float(seq % 180),
+        timestamp=datetime.datetime.now(datetime.timezone.utc),
+        sensors={"seq": seq, "sent_at": time.perf_counter()},
+    )
+
+
+def summarize(mode: str, subscribers: int, updates: int, latencies: List[float], received: int, publish_ms: List[float]) -> dict:
+    expected = subscribers * updates
+    return {
+        "mode": mode,
+        "subscribers": subscribers,
+        "updates": updates,
+        "delivered": received,
+        "delivery_ratio": round(received / expected, 4) if expected else None,
+        "dropped_consumers": unit_broadcaster.stats()["dropped_consumers"],
+        "publish_ms": {"p50": round(percentile(publish_ms, 50), 3), "max": round(max(publish_ms, default=0.0), 3)},
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+        },
+    }
+
+
+async def publish_updates(updates: int, rate: float, publish_ms: List[float]) -> None:
+    for seq in range(updates):
+        start = time.perf_counter()
+        unit_broadcaster.publish(make_update(seq))
+        publish_ms.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(1 / rate)
+
+
+async def run_inprocess(subscribers: int, updates: int, rate: float) -> dict:
+    latencies: List[float] = []
+    received = 0
+
+    async def consumer():
+        nonlocal received
+        subscription = unit_broadcaster.subscribe()
+        try:
+            count = 0
+            async for message in subscription.messages():
+                if message is HEARTBEAT:
+                    continue
+                sent_at = json.loads(message.json)["sensors"]["sent_at"]
+                latencies.append((time.perf_counter() - sent_at) * 1000)
+                received += 1
+                count += 1
+                if count == updates:
+                    return
+        finally:
+            subscription.close()
+
+    tasks = [asyncio.create_task(consumer()) for _ in range(subscribers)]
+    await asyncio.sleep(0.1)
+    publish_ms: List[float] = []
+    await publish_updates(updates, rate, publish_ms)
+    await asyncio.wait(tasks, timeout=10)
+    for task in tasks:
+        task.cancel()
+    return summarize("inprocess", subscribers, updates, latencies, received, publish_ms)
+
+
+async def run_websocket(subscribers: int, updates: int, rate: float, port: int) -> dict:
+    from benchmarks.app_server import running_app
+
+    async with running_app(port) as base_url:
+        return await _drive_websockets(base_url.replace("http://", "ws://") + "/api/v1/client/units/stream",
+                                       subscribers, updates, rate)
+
+
+async def _drive_websockets(url: str, subscribers: int, updates: int, rate: float) -> dict:
+    import websockets
+
+    latencies: List[float] = []
+    received = 0
+
+    async def client(ready: asyncio.Event):
+        nonlocal received
+        async with websockets.connect(url, max_queue=None, open_timeout=60) as ws:
+            ready.set()
+            count = 0
+            while count < updates:
+                data = json.loads(await ws.recv())
+                if "sensors" not in data:
+                    continue
+                latencies.append((time.perf_counter() - data["sensors"]["sent_at"]) * 1000)
+                received += 1
+                count += 1
+
+    readies = []
+    tasks = []
+    for _ in range(subscribers):
+        ready = asyncio.Event()
+        readies.append(ready)
+        tasks.append(asyncio.create_task(client(ready)))
+    await asyncio.wait_for(asyncio.gather(*(r.wait() for r in readies)), timeout=120)
+    while unit_broadcaster.stats()["subscribers"] < subscribers:
+        await asyncio.sleep(0.05)
+
+    publish_ms: List[float] = []
+    await publish_updates(updates, rate, publish_ms)
+    await asyncio.wait(tasks, timeout=30)
+    for task in tasks:
+        task.cancel()
+    return summarize("websocket", subscribers, updates, latencies, received, publish_ms)
+
+
+async def main(args: argparse.Namespace) -> None:
+    results = []
+    for subscribers in args.subscribers:
+        if args.mode == "inprocess":
+            results.append(await run_inprocess(subscribers, args.updates, args.rate))
+        else:
+            results.append(await run_websocket(subscribers, args.updates, args.rate, args.port))
+    json.dump({"results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "websocket"], default="inprocess")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--updates", type=int, default=20, help="Actualizaciones publicadas por nivel")
+    parser.add_argument("--rate", type=float, default=10.0, help="Actualizaciones por segundo")
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
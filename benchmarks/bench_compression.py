@@ -0,0 +1,100 @@
+# ws_espacial/benchmarks/bench_compression.py
+"""
+Benchmark de la compresión de respuestas: CPU frente a ancho de banda.
+
+Para el listado completo de --units unidades (mismo JSON que GET /client/units) mide, por
+codificación disponible (gzip siempre; br y zstd si están instalados) y por nivel (el de las
+variantes cacheadas y el rápido de los cuerpos por petición): tamaño, ratio, ms de compresión y de
+descompresión, el tiempo de transferencia a --bandwidth-mbps, y el coste de CPU por petición
+con --requests-per-cycle peticiones por ciclo del poller, comprimiendo una vez por versión
+(cacheado) o en cada petición.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_compression --units 10000 --requests-per-cycle 100
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from app.core import compression  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.serialization import encode_units  # noqa: E402
+from app.models.unit import UnitData  # noqa: E402
+
+DECOMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {"gzip": gzip.decompress}
+if compression.brotli is not None:
+    DECOMPRESSORS["br"] = compression.brotli.decompress
+if compression.zstandard is not None:
+    DECOMPRESSORS["zstd"] = compression.zstandard.ZstdDecompressor().decompress
+
+
+def make_body(count: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return encode_units(
+        UnitData(
+            unit_id=f"UNIT-{i:06d}", latitude=rng.uniform(-90, 90), longitude=rng.uniform(-180, 180),
+            timestamp=now - datetime.timedelta(seconds=rng.randint(0, 600)),
+            sensors={"temperature": round(rng.uniform(-20, 40), 2), "battery": rng.randint(0, 100), "status": "ok"},
+        )
+        for i in range(count)
+    )
+
+
+def timed_ms(func: Callable[[], bytes], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def transfer_ms(size: int, bandwidth_mbps: float) -> float:
+    return size * 8 / (bandwidth_mbps * 1e6) * 1000
+
+
+def main(args: argparse.Namespace) -> None:
+    body = make_body(args.units, args.seed)
+    report = {
+        "units": args.units,
+        "identity_bytes": len(body),
+        "identity_transfer_ms": round(transfer_ms(len(body), args.bandwidth_mbps), 1),
+        "bandwidth_mbps": args.bandwidth_mbps,
+        "requests_per_cycle": args.requests_per_cycle,
+        "encodings": {},
+    }
+    for encoding in compression.available_encodings():
+        for mode, levels in (("cached", settings.COMPRESSION_LEVELS), ("dynamic", settings.COMPRESSION_DYNAMIC_LEVELS)):
+            level = levels[encoding]
+            compressed = compression.CODECS[encoding](body, level)
+            assert DECOMPRESSORS[encoding](compressed) == body
+            compress_ms = timed_ms(lambda: compression.CODECS[encoding](body, level), args.repeat)
+            report["encodings"][f"{encoding}/{mode}(level={level})"] = {
+                "bytes": len(compressed),
+                "ratio": round(len(body) / len(compressed), 1),
+                "compress_ms": round(compress_ms, 2),
+                "decompress_ms": round(timed_ms(lambda: DECOMPRESSORS[encoding](compressed), args.repeat), 2),
+                "transfer_ms": round(transfer_ms(len(compressed), args.bandwidth_mbps), 1),
+                # CPU de servidor por petición: una compresión por versión frente a una por petición
+                "cpu_ms_per_request_cached": round(compress_ms / args.requests_per_cycle, 3),
+                "cpu_ms_per_request_uncached": round(compress_ms, 2),
+            }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=10000)
+    parser.add_argument("--requests-per-cycle", type=int, default=100, help="Peticiones por versión de los datos")
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0, help="Ancho de banda del cliente")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
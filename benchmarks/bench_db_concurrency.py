@@ -0,0 +1,128 @@
+# ws_espacial/benchmarks/bench_db_concurrency.py
+"""
+Benchmark de latencia de lecturas concurrentes mientras el "poller" escribe.
+
+Compara dos modos dentro del mismo event loop:
+  - blocking: las corrutinas llaman directamente a app.db.session (como antes).
+  - executor: las corrutinas usan app.db.async_session (pool + executor dedicado).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_db_concurrency --readers 200 --duration 5
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+# La configuración se lee al importar app.core.config: preparamos el entorno antes.
+_tmp_dir = tempfile.mkdtemp(prefix="bench_db_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+
+from app.db import async_session, session  # noqa: E402
+from app.db.pool import close_pool  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def writer(stop: asyncio.Event, units: int, mode: str, interval: float) -> int:
+    """Simula al poller: reescribe todas las unidades en cada ciclo."""
+    cycles = 0
+    while not stop.is_set():
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for i in range(units):
+            kwargs = dict(
+                unit_id=f"UNIT-{i:05d}", latitude=float(i % 90), longitude=float(i % 180),
+                api_timestamp=now, sensors={"altitude_km": 410.0, "velocity_kmh": 27600.0},
+            )
+            if mode == "executor":
+                await async_session.upsert_iss_data(**kwargs)
+            else:
+                session.upsert_iss_data(**kwargs)
+        cycles += 1
+        await asyncio.sleep(interval)
+    return cycles
+
+
+async def reader(stop: asyncio.Event, units: int, mode: str, latencies: List[float], reader_id: int) -> None:
+    i = reader_id
+    while not stop.is_set():
+        unit_id = f"UNIT-{i % units:05d}"
+        start = time.perf_counter()
+        if mode == "executor":
+            await async_session.get_iss_data_by_id(unit_id=unit_id)
+        else:
+            session.get_iss_data_by_id(unit_id=unit_id)
+            await asyncio.sleep(0)  # Cede el loop como lo haría un endpoint real
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: List[float]) -> None:
+    """Mide cuánto se retrasa el event loop: refleja el impacto en TODAS las peticiones."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append((time.perf_counter() - start - 0.005) * 1000)
+
+
+async def run_mode(mode: str, readers: int, units: int, duration: float, write_interval: float) -> dict:
+    latencies: List[float] = []
+    lags: List[float] = []
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(reader(stop, units, mode, latencies, r)) for r in range(readers)]
+    writer_task = asyncio.create_task(writer(stop, units, mode, write_interval))
+    lag_task = asyncio.create_task(probe_loop_lag(stop, lags))
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks, lag_task)
+    cycles = await writer_task
+    return {
+        "mode": mode,
+        "reads": len(latencies),
+        "reads_per_second": round(len(latencies) / duration, 1),
+        "write_cycles": cycles,
+        "read_latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        },
+        "event_loop_lag_ms": {
+            "p99": round(percentile(lags, 99), 3),
+            "max": round(max(lags), 3) if lags else 0.0,
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    await async_session.init_db()
+    results = []
+    for mode in args.modes:
+        results.append(await run_mode(mode, args.readers, args.units, args.duration, args.write_interval))
+    close_pool()
+    json.dump({"readers": args.readers, "units": args.units, "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=100, help="Lectores concurrentes")
+    parser.add_argument("--units", type=int, default=500, help="Unidades reescritas por ciclo del writer")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por modo")
+    parser.add_argument("--write-interval", type=float, default=0.05, help="Pausa entre ciclos de escritura (s)")
+    parser.add_argument("--modes", nargs="+", default=["blocking", "executor"], choices=["blocking", "executor"])
+    asyncio.run(main(parser.parse_args()))
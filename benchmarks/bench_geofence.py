@@ -0,0 +1,164 @@
+# ws_espacial/benchmarks/bench_geofence.py
+"""
+Benchmark del motor de geocercas: --fences geocercas (polígonos de 5 a 12 vértices y círculos,
+repartidos por todo el globo) frente a --units unidades que se mueven en cada ciclo.
+
+Mide, por ciclo del poller (todas las unidades con posición nueva):
+  - engine: GeofenceEngine.evaluate (prefiltro por rejilla + bbox + prueba exacta vectorizada,
+    con numpy si está instalado), incluida la generación de eventos enter/exit.
+  - python: el mismo índice forzando la prueba exacta en Python (solo si numpy está instalado).
+  - brute_force: cada unidad contra todas las geocercas sin prefiltro, medido sobre --brute-sample
+    unidades y extrapolado al ciclo completo.
+
+Verifica que el motor y la fuerza bruta coinciden en las unidades de la muestra.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_geofence --fences 10000 --units 10000 --cycles 5
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from app.cache.spatial_index import haversine_km  # noqa: E402
+from app.models.unit import UnitData  # noqa: E402
+from app.services import geofence  # noqa: E402
+from app.services.geofence import CIRCLE, POLYGON, FenceIndex, GeofenceEngine, _point_in_ring, _unwrap_longitudes  # noqa: E402
+
+
+def make_fences(count: int, rng: random.Random) -> List[Tuple[int, str, dict]]:
+    fences = []
+    for fence_id in range(1, count + 1):
+        lat = math.degrees(math.asin(rng.uniform(-1, 1))) * 0.95 # Uniforme en superficie
+        lon = rng.uniform(-180, 180)
+        if rng.random() < 0.3:
+            fences.append((fence_id, CIRCLE, {"latitude": lat, "longitude": lon, "radius_km": rng.uniform(10, 150)}))
+            continue
+        radius = rng.uniform(0.2, 1.5)
+        vertices = rng.randint(5, 12)
+        coordinates = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            r = radius * rng.uniform(0.5, 1.0)
+            vlat = max(-89.9, min(89.9, lat + r * math.sin(angle)))
+            vlon = (lon + r * math.cos(angle) / max(math.cos(math.radians(vlat)), 0.1) + 180) % 360 - 180
+            coordinates.append([vlon, vlat])
+        fences.append((fence_id, POLYGON, {"coordinates": coordinates}))
+    return fences
+
+
+def make_units(count: int, rng: random.Random, timestamp: datetime.datetime) -> List[UnitData]:
+    return [
+        UnitData(unit_id=f"UNIT-{i:06d}", latitude=math.degrees(math.asin(rng.uniform(-1, 1))),
+                 longitude=rng.uniform(-180, 180), timestamp=timestamp)
+        for i in range(count)
+    ]
+
+
+def move(units: List[UnitData], rng: random.Random, step_degrees: float, timestamp: datetime.datetime) -> List[UnitData]:
+    return [
+        unit.model_copy(update={
+            "latitude": max(-90.0, min(90.0, unit.latitude + rng.uniform(-step_degrees, step_degrees))),
+            "longitude": (unit.longitude + rng.uniform(-step_degrees, step_degrees) + 180) % 360 - 180,
+            "timestamp": timestamp,
+        })
+        for unit in units
+    ]
+
+
+def brute_force(fences, lat: float, lon: float) -> List[int]:
+    inside = []
+    for fence_id, kind, geometry in fences:
+        if kind == CIRCLE:
+            if haversine_km(lat, lon, geometry["latitude"], geometry["longitude"]) <= geometry["radius_km"]:
+                inside.append(fence_id)
+            continue
+        xs = _unwrap_longitudes([vlon for vlon, _ in geometry["coordinates"]])
+        ys = [vlat for _, vlat in geometry["coordinates"]]
+        ulon = (lon - min(xs)) % 360 + min(xs)
+        if _point_in_ring(ulon, lat, xs, ys):
+            inside.append(fence_id)
+    return inside
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    fences = make_fences(args.fences, rng)
+    start = time.perf_counter()
+    index = FenceIndex(fences, args.cell_degrees)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    engine = GeofenceEngine(cell_degrees=args.cell_degrees)
+    engine._index = index
+    engine.active = True
+    units = make_units(args.units, rng, now)
+    engine.evaluate(units)
+    engine._pending.clear()
+
+    cycle_ms, events = [], 0
+    cycles = []
+    for cycle in range(1, args.cycles + 1):
+        units = move(units, rng, args.step_degrees, now + datetime.timedelta(seconds=cycle))
+        cycles.append(units)
+        start = time.perf_counter()
+        events += engine.evaluate(units)
+        cycle_ms.append((time.perf_counter() - start) * 1000)
+    stats = engine.stats()
+
+    report = {
+        "fences": args.fences,
+        "units": args.units,
+        "numpy_installed": geofence.np is not None,
+        "index_build_ms": round(build_ms, 1),
+        "candidate_pairs_per_cycle": round(stats["candidate_pairs"] / (args.cycles + 1)),
+        "events_per_cycle": round(events / args.cycles, 1),
+        "engine": {
+            "ms_per_cycle": round(sum(cycle_ms) / len(cycle_ms), 2),
+            "units_per_s": round(args.units * len(cycle_ms) / (sum(cycle_ms) / 1000)),
+        },
+    }
+
+    points = [(unit.latitude, unit.longitude) for unit in cycles[-1]]
+    if geofence.np is not None:
+        arrays, index._arrays = index._arrays, None
+        start = time.perf_counter()
+        python_result, _ = index.containing(points)
+        python_ms = (time.perf_counter() - start) * 1000
+        index._arrays = arrays
+        numpy_result, _ = index.containing(points)
+        report["python"] = {"ms_per_cycle": round(python_ms, 2),
+                            "same_result": [sorted(r) for r in python_result] == [sorted(r) for r in numpy_result]}
+
+    sample = cycles[-1][:args.brute_sample]
+    start = time.perf_counter()
+    expected = [brute_force(fences, unit.latitude, unit.longitude) for unit in sample]
+    brute_ms = (time.perf_counter() - start) * 1000 * args.units / len(sample)
+    engine_result, _ = index.containing([(unit.latitude, unit.longitude) for unit in sample])
+    report["brute_force"] = {
+        "ms_per_cycle_extrapolated": round(brute_ms, 1),
+        "sample_units": len(sample),
+        "same_result": [sorted(r) for r in engine_result] == expected,
+    }
+    report["speedup_vs_brute_force"] = round(brute_ms / report["engine"]["ms_per_cycle"], 1)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fences", type=int, default=10000)
+    parser.add_argument("--units", type=int, default=10000)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--step-degrees", type=float, default=0.05, help="Desplazamiento máximo por ciclo")
+    parser.add_argument("--cell-degrees", type=float, default=1.0)
+    parser.add_argument("--brute-sample", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
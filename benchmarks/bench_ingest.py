@@ -0,0 +1,112 @@
+# ws_espacial/benchmarks/bench_ingest.py
+"""
+Benchmark de la ingesta masiva (POST /api/v1/client/units/ingest) contra un único worker.
+
+Levanta la app con uvicorn en este proceso, genera un token y envía --requests peticiones
+de --batch puntos (JSON o NDJSON) con --concurrency clientes. Informa:
+  - puntos aceptados por segundo (respuesta 202),
+  - puntos escritos por segundo (hasta que el búfer de ingesta queda vacío),
+  - latencia por petición (p50/p95/p99) y respuestas 503 por backpressure.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_ingest --batch 5000 --requests 40 --concurrency 4 --format ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+os.environ.setdefault("POLL_ISS_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+from app.services.ingest_buffer import ingest_buffer  # noqa: E402
+from benchmarks.app_server import running_app  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def make_body(batch: int, units: int, fmt: str, seq: int) -> bytes:
+    now = time.time()
+    points = [
+        {"unit_id": f"DEV-{random.randrange(units):05d}", "latitude": random.uniform(-80, 80),
+         "longitude": random.uniform(-180, 180), "timestamp": now + seq * 1e-3 + i * 1e-6,
+         "sensors": {"temp_c": round(random.uniform(-20, 40), 2), "battery": round(random.random(), 3)}}
+        for i in range(batch)
+    ]
+    if fmt == "ndjson":
+        return "\n".join(json.dumps(p) for p in points).encode()
+    return json.dumps(points).encode()
+
+
+async def main(args: argparse.Namespace) -> None:
+    bodies = [make_body(args.batch, args.units, args.format, i) for i in range(args.requests)]
+    content_type = "application/x-ndjson" if args.format == "ndjson" else "application/json"
+    latencies: List[float] = []
+    statuses: dict = {}
+
+    async with running_app(args.port) as base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            token = (await client.post("/api/v1/admin/tokens/generate", json={"client_id": "bench-ingest"})).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}", "Content-Type": content_type}
+            queue: asyncio.Queue = asyncio.Queue()
+            for body in bodies:
+                queue.put_nowait(body)
+
+            async def worker():
+                while not queue.empty():
+                    body = queue.get_nowait()
+                    start = time.perf_counter()
+                    response = await client.post("/api/v1/client/units/ingest", content=body, headers=headers)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            accepted_elapsed = time.perf_counter() - start
+            while ingest_buffer.pending:
+                await asyncio.sleep(0.01)
+            written_elapsed = time.perf_counter() - start
+
+    accepted = ingest_buffer.accepted
+    json.dump({
+        "format": args.format,
+        "batch": args.batch,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "statuses": statuses,
+        "points_accepted": accepted,
+        "accepted_points_per_second": round(accepted / accepted_elapsed, 1),
+        "written_points_per_second": round(ingest_buffer.flushed / written_elapsed, 1),
+        "request_latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+        },
+    }, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=5000, help="Puntos por petición")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--units", type=int, default=10000, help="Unidades distintas")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json")
+    parser.add_argument("--port", type=int, default=8766)
+    asyncio.run(main(parser.parse_args()))
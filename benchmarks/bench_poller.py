@@ -0,0 +1,136 @@
+# ws_espacial/benchmarks/bench_poller.py
+"""
+Benchmark del poller multi-fuente contra un upstream local (benchmarks/fake_upstream.py).
+
+Compara:
+  - shared:     MultiSourcePoller con un único cliente HTTP con pool de conexiones.
+  - per_cycle:  un httpx.AsyncClient nuevo en cada consulta (comportamiento anterior).
+
+Informa consultas completadas por segundo, latencia por consulta (p50/p95/p99),
+errores y conexiones TCP abiertas contra el upstream.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_poller --sources 300 --interval 1 --duration 10 --latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_poller_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+
+import httpx  # noqa: E402
+
+from app.db import async_session  # noqa: E402
+from app.db.pool import close_pool  # noqa: E402
+from app.services import data_poller  # noqa: E402
+from app.services.sources import PollSource  # noqa: E402
+from benchmarks.fake_upstream import FakeUpstream  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def make_sources(base_url: str, count: int, interval: float, units: int) -> List[PollSource]:
+    return [
+        PollSource(name=f"src-{i}", url=f"{base_url}/units/src{i}.json?count={units}",
+                   parser="units_json", interval_seconds=interval, timeout_seconds=5.0)
+        for i in range(count)
+    ]
+
+
+async def run_shared(sources: List[PollSource], duration: float, concurrency: int) -> dict:
+    poller = data_poller.MultiSourcePoller(sources, max_concurrency=concurrency)
+    task = asyncio.create_task(poller.run())
+    durations: List[float] = []
+    seen = {name: 0 for name in poller.states}
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        await asyncio.sleep(0.01)
+        # Se toma la duración de cada consulta nueva (el intervalo de muestreo es menor que el de sondeo)
+        for name, state in poller.states.items():
+            completed = state.successes + state.failures
+            if completed != seen[name] and state.last_duration_seconds is not None:
+                durations.append(state.last_duration_seconds * 1000)
+                seen[name] = completed
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await data_poller.close_http_client()
+    successes = sum(s.successes for s in poller.states.values())
+    failures = sum(s.failures for s in poller.states.values())
+    return {"successes": successes, "failures": failures, "latencies": durations}
+
+
+async def run_per_cycle(sources: List[PollSource], duration: float, concurrency: int) -> dict:
+    """Reproduce el comportamiento anterior: cliente nuevo por consulta, sin límite compartido."""
+    semaphore = asyncio.Semaphore(concurrency)
+    successes = failures = 0
+    latencies: List[float] = []
+    stop = time.perf_counter() + duration
+
+    async def loop(source: PollSource):
+        nonlocal successes, failures
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            async with semaphore:
+                async with httpx.AsyncClient(timeout=source.timeout_seconds) as client:
+                    ok = await data_poller.poll_source_once(source, client=client)
+            latencies.append((time.perf_counter() - start) * 1000)
+            successes += ok
+            failures += not ok
+            await asyncio.sleep(source.interval_seconds)
+
+    await asyncio.gather(*(loop(s) for s in sources))
+    return {"successes": successes, "failures": failures, "latencies": latencies}
+
+
+async def main(args: argparse.Namespace) -> None:
+    await async_session.init_db()
+    results = []
+    for mode in args.modes:
+        upstream = await FakeUpstream(latency_ms=args.latency_ms, error_rate=args.error_rate).start()
+        sources = make_sources(upstream.base_url, args.sources, args.interval, args.units_per_source)
+        runner = run_shared if mode == "shared" else run_per_cycle
+        outcome = await runner(sources, args.duration, args.concurrency)
+        await upstream.stop()
+        latencies = outcome["latencies"]
+        results.append({
+            "mode": mode,
+            "sources": args.sources,
+            "fetches_per_second": round((outcome["successes"] + outcome["failures"]) / args.duration, 1),
+            "successes": outcome["successes"],
+            "failures": outcome["failures"],
+            "upstream_tcp_connections": upstream.connections,
+            "fetch_latency_ms": {
+                "p50": round(percentile(latencies, 50), 3),
+                "p95": round(percentile(latencies, 95), 3),
+                "p99": round(percentile(latencies, 99), 3),
+            },
+        })
+    close_pool()
+    json.dump({"results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=300)
+    parser.add_argument("--units-per-source", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=1.0, help="Intervalo de sondeo de cada fuente (s)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--modes", nargs="+", default=["shared", "per_cycle"], choices=["shared", "per_cycle"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+# ws_espacial/benchmarks/bench_refresh.py
+"""
+Benchmark del refresco bajo demanda (GET /api/v1/client/units/data?max_age=...) con un upstream
+local lento (benchmarks/fake_upstream.py).
+
+Levanta la app con uvicorn en este proceso, con el poller periódico prácticamente parado, y lanza
+--clients clientes que piden los datos de la ISS sin pausa durante --duration segundos con un
+max_age menor que la antigüedad habitual de los datos. Informa:
+  - peticiones de los clientes frente a consultas que llegaron al upstream,
+  - el reparto de ondemand_refresh_requests por resultado (fetched / coalesced / throttled),
+  - latencia por petición (p50/p95/p99) y la antigüedad máxima de los datos servidos.
+
+Sin agrupación, cada petición con datos antiguos haría su propia consulta al upstream.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_refresh --clients 50 --duration 10 --latency-ms 300 --max-age 1
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_refresh_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+os.environ.setdefault("POLLING_INTERVAL_SECONDS", "3600")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.metrics import ONDEMAND_REFRESH_REQUESTS  # noqa: E402
+from benchmarks.app_server import running_app  # noqa: E402
+from benchmarks.fake_upstream import FakeUpstream  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def client_loop(client: httpx.AsyncClient, url: str, stop_at: float, latencies: List[float],
+                      ages: List[float], statuses: dict) -> None:
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url)
+        except httpx.TransportError as e:
+            statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            timestamp = datetime.datetime.fromisoformat(response.json()["timestamp"])
+            ages.append((datetime.datetime.now(datetime.timezone.utc) - timestamp).total_seconds())
+
+
+async def main(args: argparse.Namespace) -> None:
+    upstream = await FakeUpstream(latency_ms=args.latency_ms).start()
+    # Las fuentes se leen de settings al arrancar el poller y en el primer refresco: basta fijarlo aquí
+    settings.ISS_API_URL = f"{upstream.base_url}/iss-now.json"
+    settings.REFRESH_MIN_INTERVAL_SECONDS = args.min_interval
+    try:
+        async with running_app(args.port) as base_url:
+            url = f"{base_url}/api/v1/client/units/data?max_age={args.max_age}"
+            async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=args.clients)) as client:
+                while (await client.get(f"{base_url}/api/v1/client/units/data")).status_code != 200:
+                    await asyncio.sleep(0.1) # Espera a la primera consulta del poller
+                upstream_before = upstream.requests
+                latencies: List[float] = []
+                ages: List[float] = []
+                statuses: dict = {}
+                start = time.perf_counter()
+                await asyncio.gather(*(
+                    client_loop(client, url, start + args.duration, latencies, ages, statuses)
+                    for _ in range(args.clients)
+                ))
+                elapsed = time.perf_counter() - start
+    finally:
+        await upstream.stop()
+
+    outcomes = {outcome: int(ONDEMAND_REFRESH_REQUESTS.value(outcome))
+                for outcome in ("fetched", "coalesced", "throttled", "failed")}
+    report = {
+        "clients": args.clients,
+        "duration_s": round(elapsed, 2),
+        "max_age_s": args.max_age,
+        "min_interval_s": args.min_interval,
+        "upstream_latency_ms": args.latency_ms,
+        "client_requests": len(latencies),
+        "statuses": statuses,
+        "upstream_requests": upstream.requests - upstream_before,
+        "refresh_outcomes": outcomes,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+        },
+        "max_served_age_s": round(max(ages, default=0.0), 2),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Latencia del upstream simulado")
+    parser.add_argument("--max-age", type=float, default=1.0)
+    parser.add_argument("--min-interval", type=float, default=2.0, help="REFRESH_MIN_INTERVAL_SECONDS")
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
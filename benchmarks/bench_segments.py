@@ -0,0 +1,114 @@
+# ws_espacial/benchmarks/bench_segments.py
+"""
+Benchmark de la exportación del histórico de una unidad: filas de SQLite frente a segmentos columnares.
+
+Llena una BD temporal con --units unidades y --days días de histórico (un punto cada --interval
+segundos, dos sensores numéricos y uno de texto), sella los segmentos y mide, para una unidad:
+  - rows: lo que haría la exportación fila a fila (get_history sin límite: SELECT + json.loads
+    de los sensores + diccionarios por punto + JSON).
+  - segments: export_unit_parts (rebanadas de los segmentos mapeados en memoria) y la lectura de
+    las columnas con app.db.segments (numpy.frombuffer si está instalado), sin análisis.
+
+Verifica que ambas rutas devuelven los mismos timestamps.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_segments --units 50 --days 30 --interval 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# La configuración se lee al importar app.core.config: preparamos el entorno antes.
+_tmp_dir = tempfile.mkdtemp(prefix="bench_segments_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+
+from app.core.serialization import dumps  # noqa: E402
+from app.db import async_session, segments  # noqa: E402
+from app.db.pool import close_pool  # noqa: E402
+from app.services import segment_store  # noqa: E402
+
+
+async def fill(args: argparse.Namespace, start_ts: float) -> int:
+    rng = random.Random(args.seed)
+    await async_session.upsert_iss_data_many([
+        (f"UNIT-{u:04d}", 0.0, 0.0, "2024-01-01T00:00:00+00:00", "{}") for u in range(args.units)
+    ])
+    points = int(args.days * 86400 / args.interval)
+    for u in range(args.units):
+        rows = [
+            (f"UNIT-{u:04d}", start_ts + i * args.interval, rng.uniform(-90, 90), rng.uniform(-180, 180),
+             json.dumps({"temperature": round(rng.uniform(-20, 40), 2), "battery": rng.randint(0, 100), "status": "ok"}))
+            for i in range(points)
+        ]
+        await async_session.insert_history_batch(rows)
+    return points
+
+
+async def main(args: argparse.Namespace) -> None:
+    await async_session.init_db()
+    now = time.time()
+    start_ts = (int(now - args.days * 86400) // 3600 - 1) * 3600.0
+    points = await fill(args, start_ts)
+
+    start = time.perf_counter()
+    sealed = 0
+    while await segment_store.roll_next_segment(now + 86400) is not None:
+        sealed += 1
+    seal_s = time.perf_counter() - start
+    unit_id = "UNIT-0000"
+
+    start = time.perf_counter()
+    rows = await async_session.get_history(unit_id=unit_id, from_ts=0, to_ts=float("inf"), step_seconds=None, limit=-1)
+    body = dumps(rows)
+    rows_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    parts = await segment_store.export_unit_parts(unit_id, None, None)
+    export_ms = (time.perf_counter() - start) * 1000
+    export = b"".join(memoryview(part).cast("B") for part in parts) # Lo que recibe el cliente
+    start = time.perf_counter()
+    frames = list(segments.iter_segments(export))
+    columns = [frame.to_dict() for frame in frames]
+    load_ms = (time.perf_counter() - start) * 1000
+    ts = [t for frame in columns for t in frame["ts"]]
+
+    report = {
+        "units": args.units,
+        "points_per_unit": points,
+        "segments_sealed": sealed,
+        "seal_s": round(seal_s, 2),
+        "numpy_installed": segments.np is not None,
+        "rows": {"ms": round(rows_ms, 1), "bytes": len(body)},
+        "segments": {
+            "export_ms": round(export_ms, 1),
+            "client_load_ms": round(load_ms, 2),
+            "bytes": len(export),
+            "frames": len(frames),
+        },
+        "speedup": round(rows_ms / (export_ms + load_ms), 1),
+        "same_timestamps": ts == [row["ts"] for row in await _raw_ts(unit_id)],
+    }
+    close_pool()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+async def _raw_ts(unit_id: str):
+    builder = await async_session.get_history_columns(float("-inf"), float("inf"), [unit_id])
+    return [{"ts": ts} for ts in builder.ts]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=50)
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=60, help="Segundos entre puntos")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
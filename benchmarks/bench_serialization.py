@@ -0,0 +1,116 @@
+# ws_espacial/benchmarks/bench_serialization.py
+"""
+Microbenchmark de la serialización de listas de unidades (p. ej. GET /units con 10k unidades).
+
+Compara:
+  - response_model: lo que haría FastAPI devolviendo List[UnitDataPublic] (validación del modelo,
+    jsonable_encoder y json.dumps de JSONResponse).
+  - pydantic_rows: la ruta anterior de client_data.py (UnitDataPublic por fila + model_dump + json.dumps).
+  - fast_stdlib / fast_orjson: app.core.serialization (diccionarios directos + codificador único;
+    orjson solo si está instalado).
+
+Informa respuestas/s, unidades/s y MB/s, y verifica que todas las rutas producen los mismos bytes.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_serialization --units 10000 --repeat 10
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core import serialization  # noqa: E402
+from app.models.unit import UnitData, UnitDataPublic  # noqa: E402
+
+
+def make_units(count: int, seed: int) -> List[UnitData]:
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        UnitData(
+            unit_id=f"UNIT-{i:06d}", latitude=rng.uniform(-90, 90), longitude=rng.uniform(-180, 180),
+            timestamp=now - datetime.timedelta(seconds=rng.randint(0, 600)),
+            sensors={"temperature": round(rng.uniform(-20, 40), 2), "battery": rng.randint(0, 100), "status": "ok"},
+        )
+        for i in range(count)
+    ]
+
+
+def _starlette_dumps(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _to_public(unit: UnitData) -> UnitDataPublic:
+    return UnitDataPublic(unit_id=unit.unit_id, latitude=unit.latitude, longitude=unit.longitude,
+                          timestamp_iso=unit.timestamp.isoformat(), sensors=unit.sensors)
+
+
+def response_model_path(units: List[UnitData]) -> bytes:
+    adapter = TypeAdapter(List[UnitDataPublic])
+    models = adapter.validate_python([_to_public(unit) for unit in units])
+    return _starlette_dumps(jsonable_encoder(models, by_alias=True))
+
+
+def pydantic_rows_path(units: List[UnitData]) -> bytes:
+    return _starlette_dumps([_to_public(unit).model_dump(by_alias=True) for unit in units])
+
+
+def fast_stdlib_path(units: List[UnitData]) -> bytes:
+    return serialization._encoder.encode([serialization.public_unit_dict(unit) for unit in units]).encode("utf-8")
+
+
+def fast_orjson_path(units: List[UnitData]) -> bytes:
+    return serialization.orjson.dumps([serialization.public_unit_dict(unit) for unit in units])
+
+
+def measure(func: Callable[[List[UnitData]], bytes], units: List[UnitData], repeat: int) -> Dict[str, float]:
+    body = func(units) # Calentamiento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = func(units)
+    elapsed = (time.perf_counter() - start) / repeat
+    return {
+        "ms_per_response": round(elapsed * 1000, 2),
+        "responses_per_s": round(1 / elapsed, 1),
+        "units_per_s": round(len(units) / elapsed),
+        "mb_per_s": round(len(body) / elapsed / 1e6, 1),
+        "body_bytes": len(body),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    units = make_units(args.units, args.seed)
+    paths = {
+        "response_model": response_model_path,
+        "pydantic_rows": pydantic_rows_path,
+        "fast_stdlib": fast_stdlib_path,
+    }
+    if serialization.orjson is not None:
+        paths["fast_orjson"] = fast_orjson_path
+
+    reference = pydantic_rows_path(units)
+    report = {"units": args.units, "orjson_installed": serialization.orjson is not None, "paths": {}}
+    for name, func in paths.items():
+        report["paths"][name] = {**measure(func, units, args.repeat), "same_bytes": func(units) == reference}
+    baseline = report["paths"]["pydantic_rows"]["ms_per_response"]
+    for result in report["paths"].values():
+        result["speedup_vs_pydantic_rows"] = round(baseline / result["ms_per_response"], 2)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,112 @@
+# ws_espacial/benchmarks/bench_spatial_index.py
+"""
+Benchmark del índice espacial (rejilla) frente a un recorrido lineal de todas las unidades.
+
+Consultas: bbox de --bbox-deg grados, radio de --radius-km y k vecinos más cercanos.
+Informa microsegundos por consulta (media y p99) y verifica que ambos métodos coinciden.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_spatial_index --units 100000 --queries 500
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from app.cache.spatial_index import SpatialGridIndex, haversine_km  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def timed(queries: List[tuple], func: Callable) -> Tuple[List[float], list]:
+    durations, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(func(*query))
+        durations.append((time.perf_counter() - start) * 1e6)
+    return durations, results
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    return {"mean_us": round(sum(durations) / len(durations), 1), "p99_us": round(percentile(durations, 99), 1)}
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    positions = {f"UNIT-{i}": (rng.uniform(-85, 85), rng.uniform(-180, 180)) for i in range(args.units)}
+    index = SpatialGridIndex(cell_degrees=args.cell_degrees)
+    start = time.perf_counter()
+    index.upsert_many((unit_id, lat, lon) for unit_id, (lat, lon) in positions.items())
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Actualización incremental: mover un 10 % de las unidades (como haría el poller)
+    moved = rng.sample(list(positions), max(1, args.units // 10))
+    start = time.perf_counter()
+    for unit_id in moved:
+        lat, lon = rng.uniform(-85, 85), rng.uniform(-180, 180)
+        positions[unit_id] = (lat, lon)
+        index.upsert(unit_id, lat, lon)
+    upsert_us = (time.perf_counter() - start) * 1e6 / len(moved)
+
+    # El bbox no cruza el antimeridiano, para compararlo con el filtro lineal sin normalizar
+    centers = [(rng.uniform(-80, 80), rng.uniform(-180, 180 - args.bbox_deg)) for _ in range(args.queries)]
+    bbox_queries = [(lon, lat, lon + args.bbox_deg, lat + args.bbox_deg) for lat, lon in centers]
+    radius_queries = [(lat, lon, args.radius_km) for lat, lon in centers]
+    knn_queries = [(lat, lon, args.k) for lat, lon in centers]
+
+    def linear_bbox(min_lon, min_lat, max_lon, max_lat):
+        return [u for u, (lat, lon) in positions.items() if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon]
+
+    def linear_radius(lat, lon, radius):
+        found = [(u, haversine_km(lat, lon, a, b)) for u, (a, b) in positions.items()]
+        return sorted((item for item in found if item[1] <= radius), key=lambda item: item[1])
+
+    def linear_knn(lat, lon, k):
+        nearest = heapq.nsmallest(k, ((haversine_km(lat, lon, a, b), u) for u, (a, b) in positions.items()))
+        return [(u, d) for d, u in nearest]
+
+    report = {"units": args.units, "cell_degrees": args.cell_degrees, "build_ms": round(build_ms, 1),
+              "incremental_upsert_us": round(upsert_us, 2), "queries": {}}
+    linear_sample = min(args.queries, args.linear_queries)
+    for name, queries, indexed, linear in (
+        ("bbox", bbox_queries, index.query_bbox, linear_bbox),
+        ("radius", radius_queries, index.query_radius, linear_radius),
+        ("knn", knn_queries, index.query_nearest, linear_knn),
+    ):
+        index_durations, index_results = timed(queries, indexed)
+        linear_durations, linear_results = timed(queries[:linear_sample], linear)
+        agree = all(
+            sorted(map(str, a)) == sorted(map(str, b)) if name == "bbox" else [u for u, _ in a] == [u for u, _ in b]
+            for a, b in zip(index_results, linear_results)
+        )
+        report["queries"][name] = {
+            "index": summarize(index_durations),
+            "linear_scan": summarize(linear_durations),
+            "speedup": round(sum(linear_durations) / len(linear_durations) / (sum(index_durations) / len(index_durations)), 1),
+            "mean_results": round(sum(len(r) for r in index_results) / len(index_results), 1),
+            "results_match": agree,
+        }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--linear-queries", type=int, default=20, help="Consultas de referencia por recorrido lineal (lentas)")
+    parser.add_argument("--cell-degrees", type=float, default=1.0)
+    parser.add_argument("--bbox-deg", type=float, default=2.0)
+    parser.add_argument("--radius-km", type=float, default=100.0)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
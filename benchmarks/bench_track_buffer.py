@@ -0,0 +1,146 @@
+# ws_espacial/benchmarks/bench_track_buffer.py
+"""
+Benchmark de la trayectoria en columnas (UnitTrack) frente a guardar cada muestra como UnitData.
+
+Mide la memoria por unidad con la ventana llena (tracemalloc), la latencia de leer los últimos
+--minutes minutos y la de calcular las estadísticas de velocidad/rumbo. La referencia es un deque
+de UnitData por unidad recorrido con un bucle sobre los objetos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_track_buffer --units 200 --points 720 --sensors 2
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from app.cache.spatial_index import haversine_km  # noqa: E402
+from app.cache.track_buffer import UnitTrack, np, track_stats  # noqa: E402
+from app.models.unit import UnitData  # noqa: E402
+
+EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_samples(rng: random.Random, unit_id: str, points: int, sensors: int, interval: float) -> List[UnitData]:
+    lat, lon = rng.uniform(-50, 50), rng.uniform(-180, 180)
+    samples = []
+    for i in range(points):
+        lat = max(-85.0, min(85.0, lat + rng.uniform(-0.05, 0.05)))
+        lon = (lon + 180 + rng.uniform(0, 0.1)) % 360 - 180
+        samples.append(UnitData(
+            unit_id=unit_id, latitude=lat, longitude=lon,
+            timestamp=EPOCH + datetime.timedelta(seconds=i * interval),
+            sensors={f"s{j}": rng.uniform(0, 100) for j in range(sensors)},
+        ))
+    return samples
+
+
+def measure_memory(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def list_window(samples, since: datetime.datetime) -> List[UnitData]:
+    return [unit for unit in samples if unit.timestamp >= since]
+
+
+def list_stats(window: List[UnitData]) -> Dict[str, float]:
+    distance = max_speed = 0.0
+    for prev, cur in zip(window, window[1:]):
+        d = haversine_km(prev.latitude, prev.longitude, cur.latitude, cur.longitude)
+        distance += d
+        dt = (cur.timestamp - prev.timestamp).total_seconds()
+        if dt > 0:
+            max_speed = max(max_speed, d / dt * 3600)
+    return {"distance_km": distance, "max_speed_kmh": max_speed}
+
+
+def timed_us(func: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    fleets = [make_samples(rng, f"UNIT-{i}", args.points, args.sensors, args.interval) for i in range(args.units)]
+
+    def build_tracks() -> List[UnitTrack]:
+        tracks = []
+        for samples in fleets:
+            track = UnitTrack(args.points)
+            for unit in samples:
+                track.append(unit.timestamp.timestamp(), unit.latitude, unit.longitude, unit.sensors)
+            tracks.append(track)
+        return tracks
+
+    def build_lists() -> List[collections.deque]:
+        # Copias: las UnitData de `fleets` ya existen y no contarían en la medición
+        return [collections.deque((unit.model_copy(deep=True) for unit in samples), maxlen=args.points)
+                for samples in fleets]
+
+    track_bytes = measure_memory(build_tracks)
+    list_bytes = measure_memory(build_lists)
+    tracks, lists = build_tracks(), build_lists()
+
+    end = EPOCH + datetime.timedelta(seconds=(args.points - 1) * args.interval)
+    since = end - datetime.timedelta(minutes=args.minutes)
+    since_ts = since.timestamp()
+    track, samples = tracks[0], lists[0]
+
+    track_window = track.window(since_ts)
+    list_win = list_window(samples, since)
+    vector_stats = track_stats(track_window)
+    loop_stats = list_stats(list_win)
+
+    report = {
+        "units": args.units,
+        "points_per_unit": args.points,
+        "numeric_sensors": args.sensors,
+        "numpy": np is not None,
+        "memory_bytes_per_unit": {
+            "track_columns": round(track_bytes / args.units),
+            "unitdata_list": round(list_bytes / args.units),
+            "documented_estimate": (3 + args.sensors) * 8 * args.points,
+            "ratio": round(list_bytes / track_bytes, 1),
+        },
+        "window_points": len(track_window["ts"]),
+        "read_us": {
+            "track_columns": round(timed_us(lambda: track.window(since_ts), args.repeat), 1),
+            "unitdata_list": round(timed_us(lambda: list_window(samples, since), args.repeat), 1),
+        },
+        "stats_us": {
+            "track_columns": round(timed_us(lambda: track_stats(track.window(since_ts)), args.repeat), 1),
+            "unitdata_list": round(timed_us(lambda: list_stats(list_window(samples, since)), args.repeat), 1),
+        },
+        "results_match": abs(vector_stats["distance_km"] - loop_stats["distance_km"]) < 1e-6
+                         and abs(vector_stats["max_speed_kmh"] - loop_stats["max_speed_kmh"]) < 1e-6,
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=200)
+    parser.add_argument("--points", type=int, default=720, help="Puntos por unidad (ventana llena)")
+    parser.add_argument("--sensors", type=int, default=2, help="Sensores numéricos por muestra")
+    parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre muestras")
+    parser.add_argument("--minutes", type=float, default=30.0, help="Ventana de lectura")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+# ws_espacial/benchmarks/bench_units_batch.py
+"""
+Benchmark de la consulta de muchas unidades por id: /units/batch frente a N llamadas sueltas.
+
+Llena una BD temporal con --fleet unidades, elige --ids unit_id al azar (más --missing que no
+existen) y mide:
+  - db: N consultas get_iss_data_by_id frente a get_iss_data_by_ids (IN por bloques), con la BD fría
+    para la aplicación (sin caché).
+  - http: con la app levantada en este proceso, GET y POST /units/batch frente a N peticiones
+    sueltas a /units/data (el único endpoint de una unidad; mismo trabajo por petición: caché,
+    serialización y una ida y vuelta HTTP), con --concurrency conexiones.
+
+Verifica que el lote devuelve las unidades en el orden pedido y marca los ids inexistentes.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_units_batch --fleet 50000 --ids 1000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_units_batch_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+os.environ.setdefault("POLL_ISS_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db import async_session  # noqa: E402
+from benchmarks.app_server import running_app  # noqa: E402
+
+
+async def fill(fleet: int, rng: random.Random) -> None:
+    await async_session.init_db()
+    await async_session.upsert_iss_data_many([
+        (f"UNIT-{i:06d}", rng.uniform(-90, 90), rng.uniform(-180, 180), "2024-01-01T00:00:00+00:00",
+         json.dumps({"temperature": round(rng.uniform(-20, 40), 2), "battery": rng.randint(0, 100)}))
+        for i in range(fleet)
+    ])
+
+
+async def bench_db(unit_ids: List[str]) -> dict:
+    start = time.perf_counter()
+    single = [await async_session.get_iss_data_by_id(unit_id) for unit_id in unit_ids]
+    single_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    batch = await async_session.get_iss_data_by_ids(unit_ids, chunk_size=settings.UNITS_BATCH_CHUNK_SIZE)
+    batch_ms = (time.perf_counter() - start) * 1000
+    return {
+        "single_calls_ms": round(single_ms, 1),
+        "batch_ms": round(batch_ms, 1),
+        "speedup": round(single_ms / batch_ms, 1),
+        "same_units": sorted(row["unit_id"] for row in single if row) == sorted(row["unit_id"] for row in batch),
+    }
+
+
+async def bench_http(base_url: str, unit_ids: List[str], concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=f"{base_url}/api/v1/client", timeout=60,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        await client.get("/units/batch", params={"ids": unit_ids[0]}) # Conexión y caché calientes
+
+        start = time.perf_counter()
+        get_response = await client.get("/units/batch", params={"ids": ",".join(unit_ids)})
+        get_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        post_response = await client.post("/units/batch", json={"unit_ids": unit_ids})
+        post_ms = (time.perf_counter() - start) * 1000
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def single() -> int:
+            async with semaphore:
+                return (await client.get("/units/data")).status_code
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(single() for _ in unit_ids))
+        single_ms = (time.perf_counter() - start) * 1000
+
+    body = post_response.json()
+    return {
+        "batch_get_ms": round(get_ms, 1),
+        "batch_post_ms": round(post_ms, 1),
+        "batch_bytes": len(post_response.content),
+        "single_calls_ms": round(single_ms, 1),
+        "single_calls_ok": statuses.count(200),
+        "speedup": round(single_ms / post_ms, 1),
+        "same_result": get_response.json() == body,
+        "in_request_order": [item["unit_id"] for item in body["results"]] == unit_ids,
+        "missing": len(body["missing"]),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    await fill(args.fleet, rng)
+    unit_ids = [f"UNIT-{i:06d}" for i in rng.sample(range(args.fleet), args.ids)]
+    unit_ids += [f"GHOST-{i:06d}" for i in range(args.missing)]
+    rng.shuffle(unit_ids)
+    # La ISS existe para que /units/data responda 200 en las llamadas sueltas
+    await async_session.upsert_iss_data_many([("ISS-001", 0.0, 0.0, "2024-01-01T00:00:00+00:00", "{}")])
+
+    report = {"fleet": args.fleet, "ids": len(unit_ids), "db": await bench_db(unit_ids)}
+    async with running_app(args.port) as base_url:
+        report["http"] = await bench_http(base_url, unit_ids, args.concurrency)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fleet", type=int, default=50000)
+    parser.add_argument("--ids", type=int, default=1000)
+    parser.add_argument("--missing", type=int, default=0, help="unit_id inexistentes añadidos a la lista")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
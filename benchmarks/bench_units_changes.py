@@ -0,0 +1,123 @@
+# ws_espacial/benchmarks/bench_units_changes.py
+"""
+Benchmark de la sincronización incremental: GET /units/changes?since= frente a GET /units completo.
+
+Llena una BD temporal con --fleet unidades, levanta la app en este proceso y simula --polls
+sondeos de un cliente: antes de cada uno se escriben --changed unidades al azar (como lo haría el
+poller, con upsert_iss_data_many). Por sondeo mide bytes transferidos y latencia del listado
+completo y de los cambios desde el high_water anterior, con y sin gzip.
+
+Verifica que el estado del cliente reconstruido con los cambios coincide con el listado completo.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_units_changes --fleet 50000 --changed 50 --polls 10
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_units_changes_")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "bench.db")
+os.environ.setdefault("POLL_ISS_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ADMISSION_ENABLED", "false") # La carga inicial de la flota retrasa el event loop
+
+import httpx  # noqa: E402
+
+from app.db import async_session  # noqa: E402
+from benchmarks.app_server import running_app  # noqa: E402
+
+
+def unit_row(unit_id: str, rng: random.Random, timestamp: str) -> tuple:
+    return (unit_id, rng.uniform(-90, 90), rng.uniform(-180, 180), timestamp,
+            json.dumps({"temperature": round(rng.uniform(-20, 40), 2), "battery": rng.randint(0, 100), "status": "ok"}))
+
+
+async def timed_get(client: httpx.AsyncClient, url: str, params: dict, encoding: str) -> tuple:
+    start = time.perf_counter()
+    response = await client.get(url, params=params, headers={"Accept-Encoding": encoding})
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    wire_bytes = int(response.headers.get("content-length", len(response.content)))
+    response.raise_for_status()
+    return response.json(), wire_bytes, elapsed_ms
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    unit_ids = [f"UNIT-{i:06d}" for i in range(args.fleet)]
+    base = datetime.datetime.now(datetime.timezone.utc)
+    await async_session.init_db()
+    await async_session.upsert_iss_data_many([unit_row(unit_id, rng, base.isoformat()) for unit_id in unit_ids])
+
+    totals = {encoding: {"full_bytes": 0, "full_ms": 0.0, "changes_bytes": 0, "changes_ms": 0.0}
+              for encoding in ("identity", "gzip")}
+    async with running_app(args.port) as base_url:
+        async with httpx.AsyncClient(base_url=f"{base_url}/api/v1/client", timeout=60) as client:
+            first, _, _ = await timed_get(client, "/units/changes", {"since": 0}, "identity")
+            # Flota grande: la primera consulta pide resincronizar; el cliente carga el listado completo
+            state: Dict[str, dict] = {unit["unit_id"]: unit for unit in first["units"]}
+            if first["resync_required"]:
+                full, _, _ = await timed_get(client, "/units", {}, "identity")
+                state = {unit["unit_id"]: unit for unit in full}
+            since, epoch = first["high_water"], first["epoch"]
+
+            resyncs = 0
+            for poll in range(1, args.polls + 1):
+                timestamp = (base + datetime.timedelta(seconds=poll)).isoformat()
+                await async_session.upsert_iss_data_many(
+                    [unit_row(unit_id, rng, timestamp) for unit_id in rng.sample(unit_ids, args.changed)]
+                )
+                await asyncio.sleep(args.settle) # El líder incorpora al caché las escrituras hechas en la BD
+                for encoding, total in totals.items():
+                    _, full_bytes, full_ms = await timed_get(client, "/units", {}, encoding)
+                    changes, changes_bytes, changes_ms = await timed_get(client, "/units/changes",
+                                                                      {"since": since, "epoch": epoch}, encoding)
+                    total["full_bytes"] += full_bytes
+                    total["full_ms"] += full_ms
+                    total["changes_bytes"] += changes_bytes
+                    total["changes_ms"] += changes_ms
+                resyncs += changes["resync_required"]
+                for unit in changes["units"]:
+                    state[unit["unit_id"]] = unit
+                since, epoch = changes["high_water"], changes["epoch"]
+            full, _, _ = await timed_get(client, "/units", {}, "identity")
+
+    per_poll: Dict[str, dict] = {}
+    for encoding, total in totals.items():
+        per_poll[encoding] = {
+            "full_kb": round(total["full_bytes"] / args.polls / 1024, 1),
+            "full_ms": round(total["full_ms"] / args.polls, 1),
+            "changes_kb": round(total["changes_bytes"] / args.polls / 1024, 2),
+            "changes_ms": round(total["changes_ms"] / args.polls, 1),
+            "bytes_ratio": round(total["full_bytes"] / max(total["changes_bytes"], 1)),
+        }
+    report = {
+        "fleet": args.fleet,
+        "changed_per_poll": args.changed,
+        "polls": args.polls,
+        "per_poll": per_poll,
+        "resyncs": resyncs,
+        "client_state_matches_full_listing": state == {unit["unit_id"]: unit for unit in full},
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fleet", type=int, default=50000)
+    parser.add_argument("--changed", type=int, default=50, help="Unidades que cambian entre dos sondeos")
+    parser.add_argument("--polls", type=int, default=10)
+    parser.add_argument("--settle", type=float, default=1.0, help="Segundos entre la escritura y el sondeo")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
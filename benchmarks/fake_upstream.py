@@ -0,0 +1,132 @@
+# ws_espacial/benchmarks/fake_upstream.py
+"""
+Servidor HTTP mínimo (asyncio, sin dependencias) que imita a las fuentes externas.
+
+Rutas:
+  GET /iss-now.json        -> formato de open-notify (parser "open_notify_iss")
+  GET /units/<fuente>.json -> lista de unidades (parser "units_json"); ?count=N unidades
+
+Latencia, tasa de errores y tamaño de los sensores son configurables, para poder
+ejecutar benchmarks completamente offline. Admite keep-alive.
+
+Uso independiente:
+    python -m benchmarks.fake_upstream --port 9100 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeUpstream:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 error_rate: float = 0.0, sensor_count: int = 2, units_per_source: int = 1):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.sensor_count = sensor_count
+        self.units_per_source = units_per_source
+        self.requests = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "FakeUpstream":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _sensors(self) -> dict:
+        return {f"sensor_{i}": round(random.uniform(0, 1000), 3) for i in range(self.sensor_count)}
+
+    def _render(self, path: str, query: dict) -> Tuple[int, bytes]:
+        now = time.time()
+        if path.endswith("/iss-now.json"):
+            body = {
+                "message": "success",
+                "timestamp": int(now),
+                "iss_position": {"latitude": f"{random.uniform(-51.6, 51.6):.4f}",
+                                 "longitude": f"{random.uniform(-180, 180):.4f}"},
+            }
+            return 200, json.dumps(body).encode()
+        if path.startswith("/units/"):
+            source = path.rsplit("/", 1)[-1].removesuffix(".json")
+            count = int(query.get("count", [self.units_per_source])[0])
+            body = [
+                {"id": f"{source}-{i}", "latitude": random.uniform(-80, 80), "longitude": random.uniform(-180, 180),
+                 "timestamp": now, "sensors": self._sensors()}
+                for i in range(count)
+            ]
+            return 200, json.dumps(body).encode()
+        return 404, b'{"detail":"not found"}'
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    if header.lower().startswith(b"connection:") and b"close" in header.lower():
+                        keep_alive = False
+                self.requests += 1
+                target = request_line.decode("latin-1").split(" ")[1]
+                parts = urlsplit(target)
+                if self.latency_ms:
+                    await asyncio.sleep(self.latency_ms / 1000)
+                if random.random() < self.error_rate:
+                    status, body = 503, b'{"detail":"fake upstream error"}'
+                else:
+                    status, body = self._render(parts.path, parse_qs(parts.query))
+                reason = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    upstream = await FakeUpstream(
+        port=args.port, latency_ms=args.latency_ms, error_rate=args.error_rate,
+        sensor_count=args.sensors, units_per_source=args.units_per_source,
+    ).start()
+    print(f"Fake upstream escuchando en {upstream.base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--sensors", type=int, default=2, help="Sensores por unidad (tamaño de la respuesta)")
+    parser.add_argument("--units-per-source", type=int, default=1)
+    try:
+        asyncio.run(_serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,322 @@
+# ws_espacial/benchmarks/loadtest.py
+"""
+Suite de carga reproducible y completamente offline.
+
+Levanta un upstream falso (benchmarks/fake_upstream.py) que sirve la ISS y --sources fuentes de
+telemetría, arranca la app con uvicorn (un worker) apuntando a él, cada uno en su propio proceso, y,
+cuando el poller ya ha cargado datos, ejecuta cada escenario con --concurrency clientes durante
+--duration segundos desde este proceso.
+
+Escenarios:
+  units_all     GET  /client/units                      (listado completo)
+  units_page    GET  /client/units?limit=100            (paginación por cursor)
+  units_ndjson  GET  /client/units?format=ndjson        (streaming)
+  iss_data      GET  /client/units/data
+  iss_data_304  GET  /client/units/data con If-None-Match
+  admin_list    GET  /admin/tokens/active?limit=100
+  admin_issue   POST /admin/tokens/generate + /admin/tokens/revoke
+  auth_ingest   POST /client/units/ingest (autenticado, --ingest-batch puntos)
+
+El resultado (JSON) incluye por escenario: peticiones, peticiones por segundo, errores, códigos de
+estado y latencia p50/p95/p99/max en ms. Con --compare se contrasta con un resultado anterior y el
+proceso termina con código 1 si algún escenario empeora más de --tolerance.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.loadtest --concurrency 32 --duration 10 --output results.json
+    python -m benchmarks.loadtest --scenarios iss_data units_page --compare results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _configure_environment(args: argparse.Namespace) -> None:
+    """La configuración de la app se lee al importarla: se fija antes de cualquier import de app.*"""
+    tmp_dir = tempfile.mkdtemp(prefix="loadtest_")
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    sources_file = os.path.join(tmp_dir, "sources.json")
+    with open(sources_file, "w", encoding="utf-8") as f:
+        json.dump([
+            {"name": f"fleet-{i}", "url": f"{upstream_url}/units/fleet{i}.json?count={args.units_per_source}",
+             "parser": "units_json", "interval_seconds": args.poll_interval, "timeout_seconds": 5.0}
+            for i in range(args.sources)
+        ], f)
+    os.environ.setdefault("JWT_SECRET_KEY", "loadtest-secret")
+    os.environ["SQLITE_INSTANCE_DIR"] = tmp_dir
+    os.environ["SQLITE_DATABASE_URL"] = os.path.join(tmp_dir, "loadtest.db")
+    os.environ["ISS_API_URL"] = f"{upstream_url}/iss-now.json"
+    os.environ["POLLING_INTERVAL_SECONDS"] = str(max(1, int(args.poll_interval)))
+    os.environ["POLL_SOURCES_FILE"] = sources_file
+    # La suite mide capacidad: sin límites de tasa ni rechazo por sobrecarga salvo que se pidan
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class ScenarioResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies_ms: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+
+    def record(self, status: Optional[int], elapsed_ms: float) -> None:
+        self.latencies_ms.append(elapsed_ms)
+        if status is None:
+            self.errors += 1
+            return
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status >= 400:
+            self.errors += 1
+
+    def summary(self, elapsed_seconds: float) -> dict:
+        return {
+            "requests": len(self.latencies_ms),
+            "requests_per_second": round(len(self.latencies_ms) / elapsed_seconds, 1),
+            "errors": self.errors,
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+            "latency_ms": {
+                "p50": round(percentile(self.latencies_ms, 50), 3),
+                "p95": round(percentile(self.latencies_ms, 95), 3),
+                "p99": round(percentile(self.latencies_ms, 99), 3),
+                "max": round(max(self.latencies_ms, default=0.0), 3),
+            },
+        }
+
+
+# Cada escenario recibe el cliente HTTP y el contexto compartido y devuelve el código de estado
+Scenario = Callable[["httpx.AsyncClient", dict], Awaitable[int]]
+
+
+async def _units_all(client, ctx) -> int:
+    return (await client.get("/api/v1/client/units")).status_code
+
+
+async def _units_page(client, ctx) -> int:
+    # Recorre el listado página a página; cada petición es una página
+    response = await client.get("/api/v1/client/units", params={"limit": 100, **({"after": ctx["cursor"]} if ctx.get("cursor") else {})})
+    ctx["cursor"] = response.headers.get("x-next-cursor")
+    return response.status_code
+
+
+async def _units_ndjson(client, ctx) -> int:
+    async with client.stream("GET", "/api/v1/client/units", params={"format": "ndjson"}) as response:
+        async for _ in response.aiter_bytes():
+            pass
+        return response.status_code
+
+
+async def _iss_data(client, ctx) -> int:
+    return (await client.get("/api/v1/client/units/data")).status_code
+
+
+async def _iss_data_304(client, ctx) -> int:
+    response = await client.get("/api/v1/client/units/data", headers={"If-None-Match": ctx.get("etag", "")})
+    if response.status_code == 200:
+        ctx["etag"] = response.headers.get("etag", "")
+    return response.status_code
+
+
+async def _admin_list(client, ctx) -> int:
+    return (await client.get("/api/v1/admin/tokens/active", params={"limit": 100})).status_code
+
+
+async def _admin_issue(client, ctx) -> int:
+    client_id = f"loadtest-{next(ctx['client_seq'])}"
+    response = await client.post("/api/v1/admin/tokens/generate", json={"client_id": client_id})
+    if response.status_code != 201:
+        return response.status_code
+    response = await client.post("/api/v1/admin/tokens/revoke", json={"token": response.json()["access_token"]})
+    return response.status_code
+
+
+async def _auth_ingest(client, ctx) -> int:
+    now = time.time()
+    body = [
+        {"unit_id": f"LT-{i:04d}", "latitude": (i % 160) - 80.0, "longitude": (i % 360) - 180.0,
+         "timestamp": now, "sensors": {"seq": i}}
+        for i in range(ctx["ingest_batch"])
+    ]
+    response = await client.post("/api/v1/client/units/ingest", json=body, headers=ctx["auth_headers"])
+    return response.status_code
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "units_all": _units_all,
+    "units_page": _units_page,
+    "units_ndjson": _units_ndjson,
+    "iss_data": _iss_data,
+    "iss_data_304": _iss_data_304,
+    "admin_list": _admin_list,
+    "admin_issue": _admin_issue,
+    "auth_ingest": _auth_ingest,
+}
+
+
+async def run_scenario(client, name: str, ctx: dict, concurrency: int, duration: float) -> dict:
+    import httpx
+
+    scenario = SCENARIOS[name]
+    result = ScenarioResult(name)
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        worker_ctx = dict(ctx) # Estado propio por cliente (cursor, ETag)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status: Optional[int] = await scenario(client, worker_ctx)
+            except httpx.HTTPError:
+                status = None
+            result.record(status, (time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return result.summary(time.perf_counter() - start)
+
+
+async def _wait_for_data(client, expected_units: int, timeout: float) -> int:
+    deadline = time.perf_counter() + timeout
+    units = 0
+    while time.perf_counter() < deadline:
+        response = await client.get("/api/v1/client/units")
+        if response.status_code == 200:
+            units = len(response.json())
+            if units >= expected_units:
+                break
+        await asyncio.sleep(0.2)
+    return units
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from benchmarks.app_server import app_subprocess, module_subprocess
+
+    upstream_args = [
+        "--port", str(args.upstream_port), "--latency-ms", str(args.upstream_latency_ms),
+        "--error-rate", str(args.upstream_error_rate), "--sensors", str(args.sensors),
+    ]
+    async with module_subprocess("benchmarks.fake_upstream", upstream_args, f"http://127.0.0.1:{args.upstream_port}/"):
+        async with app_subprocess(args.port) as base_url:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+                units_loaded = await _wait_for_data(client, 1 + args.sources * args.units_per_source, timeout=30)
+                token = (await client.post("/api/v1/admin/tokens/generate", json={"client_id": "loadtest-ingest"})).json()["access_token"]
+                ctx = {
+                    "auth_headers": {"Authorization": f"Bearer {token}"},
+                    "ingest_batch": args.ingest_batch,
+                    "client_seq": itertools.count(),
+                }
+                # Tokens de relleno para que el listado de administración tenga contenido realista
+                await client.post("/api/v1/admin/tokens/generate/bulk", json={"client_ids": [f"filler-{i}" for i in range(1000)]})
+
+                scenarios = {}
+                for name in args.scenarios:
+                    if args.warmup:
+                        await run_scenario(client, name, ctx, args.concurrency, args.warmup)
+                    scenarios[name] = await run_scenario(client, name, ctx, args.concurrency, args.duration)
+                    print(f"{name}: {scenarios[name]['requests_per_second']} req/s, "
+                          f"p99 {scenarios[name]['latency_ms']['p99']} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "sources": args.sources,
+            "units_per_source": args.units_per_source,
+            "units_loaded": units_loaded,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "upstream_error_rate": args.upstream_error_rate,
+            "sensors": args.sensors,
+            "ingest_batch": args.ingest_batch,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Escenarios que empeoran más de `tolerance` (fracción) en throughput o en p99 respecto al baseline."""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if result["requests_per_second"] < previous["requests_per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['requests_per_second']} -> {result['requests_per_second']} req/s")
+        if result["latency_ms"]["p99"] > previous["latency_ms"]["p99"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {previous['latency_ms']['p99']} -> {result['latency_ms']['p99']} ms")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por escenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Segundos de calentamiento por escenario (0 = sin calentamiento)")
+    parser.add_argument("--sources", type=int, default=10, help="Fuentes de telemetría del upstream falso")
+    parser.add_argument("--units-per-source", type=int, default=100)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--sensors", type=int, default=4, help="Sensores por unidad (tamaño de la respuesta)")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--ingest-batch", type=int, default=100)
+    parser.add_argument("--port", type=int, default=0, help="Puerto de la app (0 = libre)")
+    parser.add_argument("--upstream-port", type=int, default=0, help="Puerto del upstream falso (0 = libre)")
+    parser.add_argument("--output", help="Fichero donde escribir el resultado JSON (por defecto, stdout)")
+    parser.add_argument("--compare", help="Resultado JSON anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento tolerado al comparar (0.2 = 20%%)")
+    cli_args = parser.parse_args()
+    cli_args.port = cli_args.port or _free_port()
+    cli_args.upstream_port = cli_args.upstream_port or _free_port()
+    _configure_environment(cli_args)
+
+    report = asyncio.run(main(cli_args))
+    if cli_args.output:
+        with open(cli_args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if cli_args.compare:
+        with open(cli_args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), cli_args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
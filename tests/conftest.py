@@ -0,0 +1,61 @@
+# ws_espacial/tests/conftest.py
+"""
+Configuración común de las pruebas: una BD temporal por sesión y la app sin fuentes externas.
+La configuración se lee al importar app.core.config, así que el entorno se prepara antes.
+"""
+import datetime
+import os
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="ws_espacial_tests_")
+os.environ["SQLITE_INSTANCE_DIR"] = _tmp_dir
+os.environ["SQLITE_DATABASE_URL"] = os.path.join(_tmp_dir, "tests.db")
+os.environ["JWT_SECRET_KEY"] = "test-secret"
+os.environ["POLL_ISS_ENABLED"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["ADMISSION_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db import session  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.unit import UnitData  # noqa: E402
+
+API = "/api/v1"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    session.init_db()
+    yield
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Una sola vez por sesión: los búferes y motores globales se atan al event loop del lifespan
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def token(client):
+    """Token de un cliente nuevo, emitido por el endpoint de administración."""
+    response = client.post(f"{API}/admin/tokens/generate", json={"client_id": f"client-{os.urandom(4).hex()}"})
+    assert response.status_code == 201
+    return response.json()["access_token"]
+
+
+def make_unit(unit_id: str, seconds_ago: float = 0.0, latitude: float = 10.0, longitude: float = 20.0,
+              **sensors) -> UnitData:
+    timestamp = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=seconds_ago)
+    return UnitData(unit_id=unit_id, latitude=latitude, longitude=longitude, timestamp=timestamp, sensors=sensors)
+
+
+def unique_id(prefix: str = "UNIT") -> str:
+    return f"{prefix}-{os.urandom(4).hex()}"
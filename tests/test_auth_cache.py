@@ -0,0 +1,34 @@
+# ws_espacial/tests/test_auth_cache.py
+import anyio
+
+from app.core.config import settings
+from app.db import async_session
+from app.security import jwt_manager
+from app.security.auth_cache import auth_cache
+from tests.conftest import API, unique_id
+
+# Endpoint autenticado barato: una unidad sin histórico da 404 si el token es válido
+PROTECTED = f"{API}/client/units/{unique_id('GHOST')}/export"
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_revoked_token_is_rejected_despite_cached_decision(client, token):
+    assert client.get(PROTECTED, headers=_auth(token)).status_code == 404
+    assert auth_cache.get(jwt_manager.hash_token(token)) is not None # La decisión quedó en caché
+
+    assert client.post(f"{API}/admin/tokens/revoke", json={"token": token}).status_code == 200
+    assert client.get(PROTECTED, headers=_auth(token)).status_code == 401
+
+
+def test_revocation_in_another_worker_is_seen_through_the_epoch(client, token, monkeypatch):
+    # Cada petición consulta la época (también la próxima, ya programada con el intervalo normal)
+    monkeypatch.setattr(settings, "AUTH_REVOCATION_CHECK_SECONDS", 0.0)
+    monkeypatch.setattr(auth_cache, "_next_epoch_check", 0.0)
+    assert client.get(PROTECTED, headers=_auth(token)).status_code == 404
+
+    # Revocación directa en la BD, sin pasar por el caché de este worker
+    anyio.run(async_session.revoke_token, jwt_manager.hash_token(token))
+    assert client.get(PROTECTED, headers=_auth(token)).status_code == 401
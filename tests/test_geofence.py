@@ -0,0 +1,45 @@
+# ws_espacial/tests/test_geofence.py
+import json
+
+import anyio
+
+from app.db import async_session
+from app.services.geofence import CIRCLE, GeofenceEngine
+from tests.conftest import API, make_unit, unique_id
+
+CENTER = (-60.0, -120.0) # (lat, lon) lejos de las unidades de las demás pruebas
+
+
+async def _engine_with_fence() -> tuple:
+    geometry = {"latitude": CENTER[0], "longitude": CENTER[1], "radius_km": 50.0}
+    (fence_id,) = await async_session.create_geofences([("zona", CIRCLE, json.dumps(geometry))])
+    engine = GeofenceEngine(cell_degrees=1.0)
+    await engine.reload_if_changed()
+    engine.active = True
+    return engine, fence_id
+
+
+async def _enter_and_exit(unit_id: str) -> int:
+    engine, fence_id = await _engine_with_fence()
+    outside = make_unit(unit_id, seconds_ago=30, latitude=CENTER[0] + 5, longitude=CENTER[1])
+    inside = make_unit(unit_id, seconds_ago=20, latitude=CENTER[0], longitude=CENTER[1] + 0.1)
+    still_inside = make_unit(unit_id, seconds_ago=10, latitude=CENTER[0] + 0.1, longitude=CENTER[1])
+    left = make_unit(unit_id, seconds_ago=0, latitude=CENTER[0] + 1, longitude=CENTER[1])
+
+    assert engine.evaluate([outside]) == 0
+    assert engine.evaluate([inside]) == 1
+    assert engine.evaluate([still_inside]) == 0 # Sin cambio de pertenencia no hay evento
+    assert engine.evaluate([left]) == 1
+    assert await engine.flush() == 2
+    return fence_id
+
+
+def test_enter_and_exit_events_are_recorded(client):
+    unit_id = unique_id()
+    fence_id = anyio.run(_enter_and_exit, unit_id)
+
+    response = client.get(f"{API}/client/geofences/events", params={"fence_id": fence_id, "unit_id": unit_id})
+    assert response.status_code == 200
+    events = response.json()
+    assert [event["event"] for event in events] == ["enter", "exit"]
+    assert events[0]["latitude"] == CENTER[0]
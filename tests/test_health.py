@@ -0,0 +1,31 @@
+# ws_espacial/tests/test_health.py
+import asyncio
+
+import anyio
+
+from app.services import coordination
+from app.services.coordination import WorkerCoordinator
+
+
+async def dead_poller() -> None:
+    raise RuntimeError("la fuente devolvió basura")
+
+
+async def idle_job() -> None:
+    await asyncio.sleep(3600)
+
+
+async def _leader_with_dead_job() -> WorkerCoordinator:
+    coordinator = WorkerCoordinator("test-lease", 30.0, leader_jobs=[dead_poller, idle_job], follower_jobs=[])
+    await coordinator._switch_role(True)
+    await asyncio.sleep(0.01)
+    return coordinator
+
+
+def test_healthz_degraded_when_leader_job_stops(client, monkeypatch):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    monkeypatch.setattr(coordination, "worker_coordinator", anyio.run(_leader_with_dead_job))
+    response = client.get("/healthz")
+    assert response.status_code == 503
+    assert response.json() == {"status": "degraded", "stopped_tasks": ["dead_poller"]}
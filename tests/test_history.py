@@ -0,0 +1,35 @@
+# ws_espacial/tests/test_history.py
+from app.db import session
+from tests.conftest import unique_id
+
+BUCKET = 300
+
+
+def _points(unit_id: str, timestamps) -> list:
+    return [(unit_id, float(ts), 1.0, 2.0, "{}") for ts in timestamps]
+
+
+def _history(unit_id: str) -> list:
+    with session.get_db_connection() as conn:
+        return [tuple(row) for row in conn.execute(
+            "SELECT ts, resolution_seconds FROM iss_data_history WHERE unit_id = ? ORDER BY ts", (unit_id,)
+        )]
+
+
+def test_compaction_only_processes_range_since_watermark():
+    unit_id = unique_id()
+    # Por encima de la marca actual (la BD de pruebas es compartida) y alineado al intervalo
+    base = (int(session.get_compacted_until() or 0) // BUCKET + 1) * BUCKET
+    session.insert_history_batch(_points(unit_id, range(base, base + 600, 60)))
+
+    result = session.compact_history(cutoff_ts=base + 600, bucket_seconds=BUCKET, delete_before_ts=None)
+    assert result["compacted"] == 8
+    assert session.get_compacted_until() == base + 600
+    assert _history(unit_id) == [(base, BUCKET), (base + 300, BUCKET)]
+
+    # Un punto tardío anterior a la marca no se vuelve a procesar; solo el tramo nuevo
+    session.insert_history_batch(_points(unit_id, [base + 30]) + _points(unit_id, range(base + 600, base + 900, 60)))
+    result = session.compact_history(cutoff_ts=base + 900, bucket_seconds=BUCKET, delete_before_ts=None)
+    assert result["compacted"] == 4
+    assert session.get_compacted_until() == base + 900
+    assert _history(unit_id) == [(base, BUCKET), (base + 30, 0), (base + 300, BUCKET), (base + 600, BUCKET)]
@@ -0,0 +1,40 @@
+# ws_espacial/tests/test_http_cache.py
+import anyio
+
+from app.services import unit_store
+from app.services.sources import ISS_UNIT_ID
+from tests.conftest import API, make_unit, unique_id
+
+
+def store(*units):
+    anyio.run(unit_store.store_units, list(units))
+
+
+def test_unit_data_304_on_matching_etag(client):
+    store(make_unit(ISS_UNIT_ID, latitude=12.0))
+    first = client.get(f"{API}/client/units/data")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get(f"{API}/client/units/data", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_etag_changes_when_data_changes(client):
+    store(make_unit(ISS_UNIT_ID, seconds_ago=1, latitude=13.0))
+    etag = client.get(f"{API}/client/units/data").headers["etag"]
+    store(make_unit(ISS_UNIT_ID, latitude=14.0))
+
+    response = client.get(f"{API}/client/units/data", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["latitude"] == 14.0
+    assert response.headers["etag"] != etag
+
+
+def test_units_listing_304_and_identity_etag(client):
+    store(make_unit(unique_id()))
+    plain = client.get(f"{API}/client/units", headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert client.get(f"{API}/client/units", headers={"Accept-Encoding": "identity",
+                                                      "If-None-Match": plain.headers["etag"]}).status_code == 304
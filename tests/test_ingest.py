@@ -0,0 +1,120 @@
+# ws_espacial/tests/test_ingest.py
+import json
+import sqlite3
+
+import pytest
+
+from app.api.v1.endpoints import client_ingest
+from app.core.config import settings
+from app.services import unit_store
+from app.services.ingest_buffer import IngestBuffer, IngestBufferFull
+from tests.conftest import API, make_unit, unique_id
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _point(unit_id: str, latitude, longitude) -> dict:
+    return {"unit_id": unit_id, "latitude": latitude, "longitude": longitude,
+            "timestamp": "2024-01-01T00:00:00+00:00", "sensors": {}}
+
+
+@pytest.mark.parametrize("latitude,longitude", [(95.0, 0.0), (0.0, -181.0), ("NaN", 0.0), (0.0, "Infinity")])
+def test_invalid_point_is_rejected(client, token, latitude, longitude):
+    response = client.post(f"{API}/client/units/ingest", headers=_auth(token),
+                           json=[_point(unique_id(), 10.0, 20.0), _point(unique_id(), latitude, longitude)])
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["loc"][0] == 1
+
+
+def test_valid_points_are_accepted(client, token):
+    response = client.post(f"{API}/client/units/ingest", headers=_auth(token),
+                           json=[_point(unique_id(), -90.0, 180.0)])
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 1}
+
+
+@pytest.mark.anyio
+async def test_permanent_error_dead_letters_the_batch(monkeypatch):
+    async def failing_store(units):
+        raise sqlite3.IntegrityError("constraint failed")
+
+    monkeypatch.setattr(unit_store, "store_units", failing_store)
+    buffer = IngestBuffer(capacity=10, batch_size=10, flush_interval_seconds=0.01, max_retries=3)
+    await buffer.submit([make_unit(unique_id()), make_unit(unique_id())], timeout=0.1)
+
+    assert await buffer.flush() == 2
+    assert buffer.pending == 0
+    assert buffer.stats()["dead_lettered"] == 2
+
+
+@pytest.mark.anyio
+async def test_transient_error_is_retried_up_to_the_cap(monkeypatch):
+    calls = []
+
+    async def busy_store(units):
+        calls.append(len(units))
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(unit_store, "store_units", busy_store)
+    buffer = IngestBuffer(capacity=10, batch_size=10, flush_interval_seconds=0.01, max_retries=2)
+    await buffer.submit([make_unit(unique_id())], timeout=0.1)
+
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            await buffer.flush()
+        assert buffer.pending == 1 # Vuelve al búfer para reintentarlo
+    assert await buffer.flush() == 1 # Tercer fallo: supera el máximo y se descarta
+    assert buffer.pending == 0 and buffer.dead_lettered == 1
+    assert len(calls) == 3
+
+
+def test_oversized_body_is_rejected_before_reading(client, token, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_MAX_BODY_BYTES", 100)
+    body = json.dumps([_point(unique_id(), 10.0, 20.0) for _ in range(5)])
+    response = client.post(f"{API}/client/units/ingest", content=body,
+                           headers={**_auth(token), "Content-Type": "application/json"})
+    assert response.status_code == 413
+
+    # Sin Content-Length (transferencia por bloques) el tope se aplica a lo recibido
+    response = client.post(f"{API}/client/units/ingest", content=iter([body[:80].encode(), body[80:].encode()]),
+                           headers={**_auth(token), "Content-Type": "application/json"})
+    assert response.status_code == 413
+
+
+@pytest.mark.anyio
+async def test_full_buffer_rejects_until_flushed(monkeypatch):
+    async def store(units):
+        pass
+
+    monkeypatch.setattr(unit_store, "store_units", store)
+    buffer = IngestBuffer(capacity=2, batch_size=10, flush_interval_seconds=0.01, max_retries=3)
+    await buffer.submit([make_unit(unique_id()), make_unit(unique_id())], timeout=0.1)
+    with pytest.raises(IngestBufferFull):
+        await buffer.submit([make_unit(unique_id())], timeout=0.05)
+    assert buffer.rejected == 1
+
+    await buffer.flush()
+    await buffer.submit([make_unit(unique_id())], timeout=0.05)
+    assert buffer.pending == 1
+
+
+def test_ingest_answers_503_with_retry_after_when_buffer_is_full(client, token, monkeypatch):
+    monkeypatch.setattr(client_ingest, "ingest_buffer",
+                        IngestBuffer(capacity=1, batch_size=1, flush_interval_seconds=0.01, max_retries=3))
+    monkeypatch.setattr(settings, "INGEST_ENQUEUE_TIMEOUT_SECONDS", 0.05)
+    assert client.post(f"{API}/client/units/ingest", headers=_auth(token),
+                       json=[_point(unique_id(), 1.0, 2.0)]).status_code == 202
+
+    response = client.post(f"{API}/client/units/ingest", headers=_auth(token), json=[_point(unique_id(), 1.0, 2.0)])
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+
+def test_batch_larger_than_buffer_capacity_is_413(client, token, monkeypatch):
+    monkeypatch.setattr(client_ingest, "ingest_buffer",
+                        IngestBuffer(capacity=1, batch_size=1, flush_interval_seconds=0.01, max_retries=3))
+    response = client.post(f"{API}/client/units/ingest", headers=_auth(token),
+                           json=[_point(unique_id(), 1.0, 2.0), _point(unique_id(), 1.0, 2.0)])
+    assert response.status_code == 413
@@ -0,0 +1,21 @@
+# ws_espacial/tests/test_positions.py
+import anyio
+
+from app.core.config import settings
+from app.services import unit_store
+from tests.conftest import API, make_unit, unique_id
+
+
+def test_position_response_is_negotiated(client, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_BYTES", 0)
+    unit = make_unit(unique_id(), latitude=5.0, longitude=6.0)
+    anyio.run(unit_store.store_units, [unit])
+
+    response = client.get(f"{API}/client/units/{unit.unit_id}/position",
+                          params={"at": unit.timestamp.isoformat()}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    body = response.json()
+    assert body["method"] == "sample"
+    assert (body["latitude"], body["longitude"]) == (5.0, 6.0)
@@ -0,0 +1,46 @@
+# ws_espacial/tests/test_refresh.py
+import pytest
+
+from app.core.config import settings
+from app.services import data_poller
+from app.services.refresh import FETCHED, THROTTLED, OnDemandRefresher
+from app.services.sources import PollSource
+from tests.conftest import unique_id
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def polls(monkeypatch):
+    """Sustituye la consulta real a la fuente y registra las fuentes consultadas."""
+    calls = []
+
+    async def fake_poll_source_once(source, state=None, client=None):
+        calls.append(source.name)
+        return True
+
+    monkeypatch.setattr(data_poller, "poll_source_once", fake_poll_source_once)
+    monkeypatch.setattr(settings, "WORKER_COORDINATION_ENABLED", True)
+    return calls
+
+
+def _source() -> PollSource:
+    return PollSource(name=unique_id("SRC"), url="http://127.0.0.1:9/unused", parser="iss", unit_id=unique_id())
+
+
+async def test_leader_poll_in_another_worker_throttles_on_demand_fetch(polls):
+    source = _source()
+    await data_poller.record_shared_fetch(source) # El sondeo periódico del líder, en otro worker
+    refresher = OnDemandRefresher(min_interval_seconds=settings.REFRESH_MIN_INTERVAL_SECONDS)
+
+    assert await refresher._fetch(source) == THROTTLED
+    assert polls == []
+
+
+async def test_on_demand_fetches_are_spaced_across_workers(polls):
+    source = _source()
+    first, second = OnDemandRefresher(min_interval_seconds=60), OnDemandRefresher(min_interval_seconds=60)
+
+    assert await first._fetch(source) == FETCHED
+    assert await second._fetch(source) == THROTTLED
+    assert polls == [source.name]
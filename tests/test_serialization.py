@@ -0,0 +1,22 @@
+# ws_espacial/tests/test_serialization.py
+import json
+
+import pytest
+
+from app.core import serialization
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_non_finite_floats_become_null(monkeypatch, use_orjson):
+    if use_orjson and serialization.orjson is None:
+        pytest.skip("orjson no está instalado")
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    content = {"a": float("nan"), "b": [1.5, float("inf"), (float("-inf"),)], "c": {"d": 2}}
+
+    assert json.loads(serialization.dumps(content)) == {"a": None, "b": [1.5, None, [None]], "c": {"d": 2}}
+
+
+def test_stdlib_fallback_keeps_big_integers(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps({"n": 2 ** 70, "x": 0.5}) == b'{"n":1180591620717411303424,"x":0.5}'
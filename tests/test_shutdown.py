@@ -0,0 +1,66 @@
+# ws_espacial/tests/test_shutdown.py
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from app import main
+from app.services import unit_store
+from app.services.ingest_buffer import IngestBuffer
+from app.services.readiness import readiness
+from tests.conftest import make_unit, unique_id
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def shutdown_steps(monkeypatch):
+    """_shutdown sobre una app sin tareas, registrando qué pasos se ejecutan."""
+    steps = []
+
+    async def history_flush():
+        steps.append("history")
+        return 0
+
+    async def geofence_flush():
+        steps.append("geofence")
+        return 0
+
+    monkeypatch.setattr(readiness, "shutting_down", False) # Se restaura al terminar la prueba
+    monkeypatch.setattr(main.history_writer, "flush", history_flush)
+    monkeypatch.setattr(main.geofence_engine, "flush", geofence_flush)
+    monkeypatch.setattr(main, "close_pool", lambda: steps.append("close_pool"))
+    return steps
+
+
+async def test_drain_survives_locked_database_and_shutdown_completes(monkeypatch, shutdown_steps):
+    calls = []
+    units = [make_unit(unique_id()), make_unit(unique_id())]
+
+    async def locked_store(batch):
+        # El búfer global de la app (en el hilo del TestClient) también puede escribir mientras tanto
+        if batch[0].unit_id in {unit.unit_id for unit in units}:
+            calls.append(len(batch))
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(unit_store, "store_units", locked_store)
+    buffer = IngestBuffer(capacity=10, batch_size=10, flush_interval_seconds=0.001, max_retries=2)
+    await buffer.submit(units, timeout=0.1)
+    monkeypatch.setattr(main, "ingest_buffer", buffer)
+
+    await main._shutdown(SimpleNamespace(state=SimpleNamespace(background_tasks=[])))
+
+    assert len(calls) == 3 # Dos reintentos y el lote se descarta
+    assert buffer.pending == 0 and buffer.dead_lettered == 2
+    assert shutdown_steps == ["history", "geofence", "close_pool"]
+
+
+async def test_failing_flush_does_not_skip_later_shutdown_steps(monkeypatch, shutdown_steps):
+    async def broken_history_flush():
+        shutdown_steps.append("history")
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(main.history_writer, "flush", broken_history_flush)
+    await main._shutdown(SimpleNamespace(state=SimpleNamespace(background_tasks=[])))
+
+    assert shutdown_steps == ["history", "geofence", "close_pool"]
@@ -0,0 +1,51 @@
+# ws_espacial/tests/test_snapshot.py
+import json
+
+import pytest
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.db import async_session
+from app.services import unit_store
+from app.services.broadcaster import unit_broadcaster
+from app.services.snapshot import SnapshotPublisher
+from tests.conftest import make_unit, unique_id
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_absorb_skips_own_writes_and_reads_each_row_once(tmp_path):
+    publisher = SnapshotPublisher(str(tmp_path / "snapshot.bin"))
+    await publisher.absorb_db_changes() # Sitúa la marca de agua
+
+    own = make_unit(unique_id(), latitude=1.0)
+    await unit_store.store_units([own]) # Escritura del propio líder: caché + BD
+    version = unit_data_cache.version
+    published = unit_broadcaster.stats()["published"]
+
+    assert await publisher.absorb_db_changes() == 0
+    assert unit_data_cache.version == version
+    assert unit_broadcaster.stats()["published"] == published
+
+    # Fila escrita por otro worker (solo en la BD), más reciente
+    other = make_unit(own.unit_id, seconds_ago=-5, latitude=2.0)
+    await async_session.upsert_iss_data_many([
+        (other.unit_id, other.latitude, other.longitude, other.timestamp.isoformat(), json.dumps(other.sensors))
+    ])
+    assert await publisher.absorb_db_changes() == 1
+    assert unit_data_cache.peek(own.unit_id).latitude == 2.0
+    assert unit_broadcaster.stats()["published"] == published + 1
+
+    # Marca de agua exclusiva: la misma fila no se vuelve a leer
+    version = unit_data_cache.version
+    assert await publisher.absorb_db_changes() == 0
+    assert unit_data_cache.version == version
+
+
+async def test_new_leader_absorbs_recent_rows_from_previous_leader(tmp_path):
+    unit = make_unit(unique_id(), latitude=3.0)
+    await async_session.upsert_iss_data_many([
+        (unit.unit_id, unit.latitude, unit.longitude, unit.timestamp.isoformat(), json.dumps(unit.sensors))
+    ])
+    publisher = SnapshotPublisher(str(tmp_path / "snapshot.bin"))
+    assert await publisher.absorb_db_changes() >= 1
+    assert unit_data_cache.peek(unit.unit_id).latitude == 3.0
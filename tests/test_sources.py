@@ -0,0 +1,27 @@
+# ws_espacial/tests/test_sources.py
+import pytest
+
+from app.services import sources
+from app.services.sources import PollSource, SourceParseError, parse_units_json
+
+
+def test_invalid_items_are_skipped_and_counted():
+    source = PollSource(name="fleet-test", url="http://upstream/units.json", parser="units_json")
+    payload = {"units": [
+        {"id": "A", "latitude": 1.0, "longitude": 2.0, "timestamp": 1700000000},
+        {"latitude": 1.0, "longitude": 2.0, "timestamp": 1700000000}, # Sin identificador
+        {"id": "B", "latitude": 95.0, "longitude": 2.0, "timestamp": 1700000000}, # Fuera de rango
+        {"id": "C", "latitude": "x", "longitude": 2.0, "timestamp": 1700000000},
+        {"id": "D", "latitude": 1.0, "longitude": 2.0, "timestamp": [1]},
+        "no es un objeto",
+        {"unit_id": "E", "latitude": -1.0, "longitude": -2.0, "timestamp": "2024-01-01T00:00:00Z"},
+    ]}
+
+    assert [unit.unit_id for unit in parse_units_json(payload, source)] == ["A", "E"]
+    assert sources.skipped_items["fleet-test"] == 5
+
+
+@pytest.mark.parametrize("payload", [{"units": "x"}, {"other": []}, 42])
+def test_wrong_payload_shape_raises(payload):
+    with pytest.raises(SourceParseError):
+        parse_units_json(payload, PollSource(name="shape-test", url="http://upstream", parser="units_json"))
@@ -0,0 +1,32 @@
+# ws_espacial/tests/test_spatial.py
+import anyio
+import pytest
+
+from app.cache.spatial_index import SpatialGridIndex
+from app.services import unit_store
+from tests.conftest import API, make_unit, unique_id
+
+
+def test_bbox_normalizes_longitudes_for_cells_and_membership():
+    index = SpatialGridIndex(cell_degrees=1.0)
+    index.upsert_many([("east", 0.0, 175.0), ("west", 0.0, -175.0), ("edge", 0.0, 180.0), ("far", 0.0, 0.0)])
+
+    assert sorted(index.query_bbox(170, -10, -170, 10)) == ["east", "edge", "west"]
+    # El mismo rectángulo expresado con max_lon > 180 da el mismo resultado
+    assert sorted(index.query_bbox(170, -10, 190, 10)) == ["east", "edge", "west"]
+    assert sorted(index.query_bbox(170, -10, 180, 10)) == ["east", "edge"]
+    assert len(index.query_bbox(-180, -10, 180, 10)) == 4
+
+
+@pytest.mark.parametrize("bbox", ["-200,0,10,10", "0,-95,10,10", "0,0,181,10", "0,0,10,nan"])
+def test_bbox_out_of_range_is_rejected(client, bbox):
+    assert client.get(f"{API}/client/units", params={"bbox": bbox}).status_code == 422
+
+
+def test_bbox_across_antimeridian_endpoint(client):
+    east, west = unique_id("EAST"), unique_id("WEST")
+    anyio.run(unit_store.store_units, [make_unit(east, latitude=-45.0, longitude=179.5),
+                                       make_unit(west, latitude=-45.0, longitude=-179.5)])
+    response = client.get(f"{API}/client/units", params={"bbox": "179,-46,-179,-44"})
+    assert response.status_code == 200
+    assert {east, west} <= {unit["unit_id"] for unit in response.json()}
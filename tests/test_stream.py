@@ -0,0 +1,76 @@
+# ws_espacial/tests/test_stream.py
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1.endpoints.client_stream import sse_subscription_response
+
+from app.services.broadcaster import (
+    STREAM_LIMIT, STREAM_LIMIT_CLIENT, Broadcaster, SubscriptionLimitError, unit_broadcaster
+)
+from tests.conftest import API
+
+
+def test_broadcaster_caps_subscribers_globally_and_per_client():
+    broadcaster = Broadcaster(queue_size=4, max_subscribers=3, max_per_client=2)
+    first = broadcaster.subscribe(client_key="a")
+    broadcaster.subscribe(client_key="a")
+    with pytest.raises(SubscriptionLimitError) as error:
+        broadcaster.subscribe(client_key="a")
+    assert error.value.reason == STREAM_LIMIT_CLIENT
+
+    broadcaster.subscribe(client_key="b")
+    with pytest.raises(SubscriptionLimitError) as error:
+        broadcaster.subscribe(client_key="c")
+    assert error.value.reason == STREAM_LIMIT
+
+    first.close()
+    first.close() # Cerrar dos veces no descuenta dos veces
+    assert broadcaster.stats()["subscribers"] == 2
+    assert broadcaster.limit_reason("a") is None
+    assert broadcaster.stats()["rejected_subscriptions"] == 2
+
+
+def test_sse_rejects_client_over_its_limit(client, monkeypatch):
+    monkeypatch.setattr(unit_broadcaster, "max_per_client", 1)
+    held = unit_broadcaster.subscribe(client_key="testclient")
+    try:
+        response = client.get(f"{API}/client/units/stream/sse")
+        assert response.status_code == 429
+        assert "retry-after" in response.headers
+    finally:
+        held.close()
+
+
+def test_websocket_closed_before_accept_over_limit(client, monkeypatch):
+    monkeypatch.setattr(unit_broadcaster, "max_subscribers", 1)
+    held = unit_broadcaster.subscribe()
+    try:
+        with pytest.raises(WebSocketDisconnect) as error:
+            with client.websocket_connect(f"{API}/client/units/stream"):
+                pass
+        assert error.value.code == 1013
+    finally:
+        held.close()
+
+
+@pytest.mark.anyio
+async def test_sse_reserves_slot_before_responding_and_releases_it():
+    broadcaster = Broadcaster(queue_size=4, max_per_client=1)
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "client": ("10.0.0.1", 1234)}
+    response = sse_subscription_response(broadcaster, Request(scope), unit_id=None)
+    assert broadcaster.stats()["subscribers"] == 1 # Reservado antes de empezar a responder
+
+    with pytest.raises(HTTPException) as error:
+        sse_subscription_response(broadcaster, Request(scope), unit_id=None)
+    assert error.value.status_code == 429
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await response(scope, receive, send) # El cliente se va antes del primer evento
+    assert broadcaster.stats()["subscribers"] == 0
@@ -0,0 +1,57 @@
+# ws_espacial/tests/test_unit_store.py
+import pytest
+
+from app.cache.in_memory_cache import unit_data_cache
+from app.core.config import settings
+from app.db import async_session
+from app.services import unit_store
+from tests.conftest import make_unit, unique_id
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_write_through_updates_cache_and_version():
+    unit_id = unique_id()
+    before = unit_data_cache.version
+    await unit_store.store_units([make_unit(unit_id, latitude=1.5)])
+
+    assert unit_data_cache.version > before
+    assert unit_data_cache.peek(unit_id).latitude == 1.5
+    assert (await async_session.get_iss_data_by_id(unit_id))["latitude"] == 1.5
+
+
+async def test_older_sample_does_not_replace_newer_one():
+    unit_id = unique_id()
+    await unit_store.store_units([make_unit(unit_id, seconds_ago=0, latitude=2.0)])
+    version = unit_data_cache.lookup_version(unit_id)
+    await unit_store.store_units([make_unit(unit_id, seconds_ago=60, latitude=3.0)])
+
+    assert unit_data_cache.lookup_version(unit_id) == version
+    assert unit_data_cache.peek(unit_id).latitude == 2.0
+    assert (await async_session.get_iss_data_by_id(unit_id))["latitude"] == 2.0
+
+
+async def test_cache_miss_falls_back_to_db(monkeypatch):
+    # Con coordinación y el caché completo, un fallo significa "no existe": aquí se prueba la BD
+    monkeypatch.setattr(settings, "WORKER_COORDINATION_ENABLED", False)
+    unit_id = unique_id()
+    unit = make_unit(unit_id, latitude=4.0)
+    await async_session.upsert_iss_data_many([
+        (unit.unit_id, unit.latitude, unit.longitude, unit.timestamp.isoformat(), "{}")
+    ])
+    assert unit_data_cache.peek(unit_id) is None
+    loaded = await unit_store.get_unit_data(unit_id)
+    assert loaded is not None and loaded.latitude == 4.0
+    assert unit_data_cache.peek(unit_id) is not None
+
+
+async def test_upsert_many_counts_only_rows_written():
+    newer, older = make_unit("X", seconds_ago=0), make_unit("X", seconds_ago=60)
+    unit_ids = [unique_id(), unique_id()]
+
+    def rows(unit):
+        return [(unit_id, unit.latitude, unit.longitude, unit.timestamp.isoformat(), "{}") for unit_id in unit_ids]
+
+    assert await async_session.upsert_iss_data_many(rows(newer)) == 2
+    assert await async_session.upsert_iss_data_many(rows(older)) == 0 # Más antiguas: la condición las descarta
+    assert await async_session.upsert_iss_data_many(rows(newer)) == 2 # Mismo timestamp: se reescriben
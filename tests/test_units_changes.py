@@ -0,0 +1,75 @@
+# ws_espacial/tests/test_units_changes.py
+import anyio
+
+from app.core.config import settings
+from app.db import async_session
+from app.services import unit_store
+from tests.conftest import API, make_unit, unique_id
+
+CHANGES = f"{API}/client/units/changes"
+
+
+def _high_water(client) -> int:
+    body = client.get(CHANGES, params={"since": 0}).json()
+    return body["high_water"]
+
+
+def test_changes_since_n_returns_only_later_writes(client, monkeypatch):
+    monkeypatch.setattr(settings, "UNITS_CHANGES_MAX_UNITS", 100000)
+    first, second = unique_id(), unique_id()
+    anyio.run(unit_store.store_units, [make_unit(first, seconds_ago=10)])
+    since = _high_water(client)
+    anyio.run(unit_store.store_units, [make_unit(second, latitude=7.0), make_unit(first, latitude=8.0)])
+
+    body = client.get(CHANGES, params={"since": since}).json()
+    assert body["resync_required"] is False
+    assert {unit["unit_id"]: unit["latitude"] for unit in body["units"]} == {first: 8.0, second: 7.0}
+    assert body["high_water"] >= since + 2
+
+    # Sin cambios nuevos: lista vacía y la misma marca
+    again = client.get(CHANGES, params={"since": body["high_water"]}).json()
+    assert again["units"] == [] and again["high_water"] == body["high_water"]
+
+
+def test_older_sample_does_not_produce_a_change(client):
+    unit_id = unique_id()
+    anyio.run(unit_store.store_units, [make_unit(unit_id)])
+    since = _high_water(client)
+    anyio.run(unit_store.store_units, [make_unit(unit_id, seconds_ago=60)])
+    assert client.get(CHANGES, params={"since": since}).json()["units"] == []
+
+
+def test_unknown_or_too_old_sequence_requires_resync(client, monkeypatch):
+    high_water = _high_water(client)
+    assert client.get(CHANGES, params={"since": high_water + 1000}).json()["resync_required"] is True
+
+    monkeypatch.setattr(settings, "UNITS_CHANGES_MAX_UNITS", 1)
+    anyio.run(unit_store.store_units, [make_unit(unique_id()), make_unit(unique_id())])
+    body = client.get(CHANGES, params={"since": high_water}).json()
+    assert body["resync_required"] is True and body["units"] == []
+
+
+def test_stored_out_of_range_row_is_still_readable(client):
+    # Filas guardadas antes de validar rangos en la ingesta: la lectura no debe fallar
+    since = _high_water(client)
+    unit_id = unique_id()
+    anyio.run(unit_store.store_units, [make_unit(unit_id, latitude=95.0, longitude=-181.0)])
+
+    response = client.get(CHANGES, params={"since": since})
+    assert response.status_code == 200
+    assert [(unit["latitude"], unit["longitude"]) for unit in response.json()["units"]] == [(95.0, -181.0)]
+
+
+def test_epoch_from_another_database_requires_resync(client):
+    first = client.get(CHANGES, params={"since": 0}).json()
+    assert first["epoch"] == anyio.run(async_session.get_db_epoch)
+    since = first["high_water"]
+    anyio.run(unit_store.store_units, [make_unit(unique_id())])
+
+    same = client.get(CHANGES, params={"since": since, "epoch": first["epoch"]}).json()
+    assert same["resync_required"] is False and len(same["units"]) == 1
+
+    # Misma secuencia, otra base de datos (recreada o restaurada): la secuencia no es comparable
+    other = client.get(CHANGES, params={"since": since, "epoch": "0000"}).json()
+    assert other["resync_required"] is True and other["units"] == []
+    assert other["epoch"] == first["epoch"] and other["high_water"] >= same["high_water"]
@@ -0,0 +1,33 @@
+# ws_espacial/tests/test_units_listing.py
+import json
+
+import anyio
+
+from app.api.v1.pagination import NEXT_CURSOR_HEADER
+from app.services import unit_store
+from tests.conftest import API, make_unit, unique_id
+
+UNITS = f"{API}/client/units"
+
+
+def test_cursor_pages_cover_every_unit_once_in_order(client):
+    anyio.run(unit_store.store_units, [make_unit(unique_id("PAGE")) for _ in range(7)])
+    seen, after = [], None
+    while True:
+        params = {"limit": 3, **({"after": after} if after else {})}
+        response = client.get(UNITS, params=params)
+        assert response.status_code == 200
+        page = [unit["unit_id"] for unit in response.json()]
+        assert len(page) <= 3
+        seen += page
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            break
+
+    streamed = [json.loads(line)["unit_id"] for line in client.get(UNITS, params={"format": "ndjson"}).text.splitlines()]
+    assert seen == sorted(seen) == streamed
+    assert len(set(seen)) == len(seen) >= 7
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get(UNITS, params={"limit": 2, "after": "%%%"}).status_code == 400